@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Limitación de ancho de banda de las transferencias (token bucket)
+Autor: EDF Developer - 2025
+"""
+
+import threading
+import time
+
+from transfer_settings_manager import MB
+
+# Segundos de tráfico que se pueden acumular como ráfaga
+BURST_SECONDS = 0.5
+
+# Espera máxima antes de volver a comprobar cancelación y cambios de límite
+MAX_WAIT_SECONDS = 0.25
+
+
+class TokenBucket:
+    """
+    Token bucket en bytes por segundo, compartido por varios hilos.
+
+    Cada hilo descuenta los bytes que va a transferir (o que acaba de
+    recibir) y, si el depósito queda en negativo, espera hasta que se haya
+    repuesto la deuda. Así un bloque mayor que la ráfaga no bloquea para
+    siempre y la media se mantiene en el límite. El límite puede cambiarse
+    mientras hay hilos esperando; con rate=None no se limita.
+    """
+
+    def __init__(self, rate=None):
+        self._condition = threading.Condition()
+        self._rate = None
+        self._tokens = 0.0
+        self._updated = time.monotonic()
+        self.set_rate(rate)
+
+    @property
+    def rate(self):
+        return self._rate
+
+    @property
+    def rate_mb(self):
+        """Límite en MB/s (0 = sin límite)"""
+        return self._rate / MB if self._rate else 0
+
+    def set_rate(self, rate):
+        """Cambia el límite en bytes/s; None o 0 lo desactivan"""
+        with self._condition:
+            self._refill()
+            rate = float(rate) if rate and rate > 0 else None
+            if rate and not self._rate:
+                self._tokens = rate * BURST_SECONDS
+            self._rate = rate
+            if rate:
+                self._tokens = min(self._tokens, rate * BURST_SECONDS)
+            self._condition.notify_all()
+
+    def set_rate_mb(self, rate_mb):
+        self.set_rate((rate_mb or 0) * MB)
+
+    def _refill(self):
+        now = time.monotonic()
+        if self._rate:
+            self._tokens = min(self._tokens + (now - self._updated) * self._rate,
+                               self._rate * BURST_SECONDS)
+        self._updated = now
+
+    def consume(self, amount, cancel_event=None):
+        """Descuenta amount bytes y espera lo necesario para respetar el límite"""
+        with self._condition:
+            if not self._rate:
+                return
+            self._refill()
+            self._tokens -= amount
+            while self._rate and self._tokens < 0:
+                if cancel_event is not None and cancel_event.is_set():
+                    return
+                self._condition.wait(min(-self._tokens / self._rate, MAX_WAIT_SECONDS))
+                self._refill()
+
+
+# Límite global compartido por todos los trabajos de la aplicación
+GLOBAL_BANDWIDTH = TokenBucket()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Control adaptativo de la concurrencia de las transferencias (AIMD)
+Autor: EDF Developer - 2025
+"""
+
+import threading
+import time
+
+from botocore.exceptions import ClientError
+
+# Códigos de error con los que S3 pide reducir el ritmo de peticiones
+THROTTLE_ERROR_CODES = {
+    'SlowDown', 'ServiceUnavailable', 'Throttling', 'ThrottlingException',
+    'RequestLimitExceeded', 'TooManyRequests', '503',
+}
+
+# Duración de cada ventana de medición
+WINDOW_SECONDS = 1.0
+
+SPARK_CHARS = '▁▂▃▄▅▆▇█'
+
+
+def is_throttle_error(error):
+    """True si el error es una respuesta SlowDown/503 de S3"""
+    if isinstance(error, ClientError):
+        code = error.response.get('Error', {}).get('Code', '')
+        status = error.response.get('ResponseMetadata', {}).get('HTTPStatusCode')
+        return code in THROTTLE_ERROR_CODES or status == 503
+    return False
+
+
+def sparkline(values):
+    """Representa una serie de valores como una línea de caracteres de bloque"""
+    values = list(values)
+    if not values:
+        return ''
+    low, high = min(values), max(values)
+    span = (high - low) or 1
+    return ''.join(
+        SPARK_CHARS[int((value - low) / span * (len(SPARK_CHARS) - 1))] for value in values
+    )
+
+
+class AdaptiveConcurrency:
+    """
+    Limita cuántas tareas se ejecutan a la vez y ajusta ese límite con AIMD.
+
+    En cada ventana de medición se calcula el throughput (bytes/s a partir
+    de bytes_source) y la latencia media de las tareas terminadas:
+
+    - Un error de throttling (SlowDown/503) reduce el límite a la mitad, como
+      mucho una vez por ventana para no encadenar reducciones.
+    - Si el throughput no empeora y todas las plazas estaban ocupadas, el
+      límite sube en uno.
+    - Si el throughput cae y la latencia se dispara, el límite baja en uno.
+
+    Args:
+        initial (int): Concurrencia inicial.
+        minimum, maximum (int): Rango permitido.
+        bytes_source: Función sin argumentos que devuelve los bytes
+            transferidos hasta el momento.
+        on_adjust: Función opcional llamada como on_adjust(controller, reason)
+            tras cerrar cada ventana, con reason None si el límite no cambió.
+    """
+
+    def __init__(self, initial, minimum=1, maximum=64, bytes_source=None,
+                 on_adjust=None, window_seconds=WINDOW_SECONDS):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = max(self.minimum, min(self.maximum, initial))
+        self.bytes_source = bytes_source or (lambda: 0)
+        self.on_adjust = on_adjust
+        self.window_seconds = window_seconds
+        self.active = 0
+        # Muestras (segundos desde el inicio, límite, bytes/s, latencia media)
+        self.samples = []
+
+        self._condition = threading.Condition()
+        self._started = time.monotonic()
+        self._window_start = self._started
+        self._window_bytes = self.bytes_source()
+        self._window_latencies = []
+        self._window_saturated = False
+        self._window_throttled = False
+        self._last_decrease = 0.0
+        self._previous_throughput = None
+        self._previous_latency = None
+
+    def acquire(self, cancel_event=None):
+        """Espera una plaza libre; devuelve False si se canceló mientras tanto"""
+        with self._condition:
+            while self.active >= self.limit:
+                if cancel_event is not None and cancel_event.is_set():
+                    return False
+                self._condition.wait(0.25)
+            self.active += 1
+            if self.active >= self.limit:
+                self._window_saturated = True
+            return True
+
+    def release(self, latency=None):
+        """Libera una plaza y anota la latencia de la tarea terminada"""
+        adjusted = None
+        with self._condition:
+            self.active -= 1
+            if latency is not None:
+                self._window_latencies.append(latency)
+            if time.monotonic() - self._window_start >= self.window_seconds:
+                adjusted = self._close_window()
+            self._condition.notify_all()
+        if adjusted is not None and self.on_adjust:
+            self.on_adjust(self, adjusted or None)
+
+    def record_throttle(self):
+        """Reduce el límite a la mitad ante un SlowDown/503"""
+        reason = None
+        with self._condition:
+            self._window_throttled = True
+            now = time.monotonic()
+            if now - self._last_decrease >= self.window_seconds and self.limit > self.minimum:
+                self.limit = max(self.minimum, self.limit // 2)
+                self._last_decrease = now
+                reason = 'throttling de S3'
+        if reason and self.on_adjust:
+            self.on_adjust(self, reason)
+
+    def _close_window(self):
+        """Cierra la ventana actual; devuelve el motivo del cambio o ''"""
+        now = time.monotonic()
+        total_bytes = self.bytes_source()
+        throughput = (total_bytes - self._window_bytes) / max(now - self._window_start, 1e-6)
+        latency = (sum(self._window_latencies) / len(self._window_latencies)
+                   if self._window_latencies else None)
+
+        reason = ''
+        previous = self._previous_throughput
+        if self._window_throttled:
+            pass  # La reducción ya se aplicó en record_throttle
+        elif (previous is not None and latency is not None and self._previous_latency
+              and throughput < previous * 0.8 and latency > self._previous_latency * 1.5):
+            if self.limit > self.minimum:
+                self.limit -= 1
+                reason = 'latencia en aumento'
+        elif (self._window_saturated and self.limit < self.maximum
+              and (previous is None or throughput >= previous * 0.95)):
+            self.limit += 1
+            reason = 'throughput estable'
+
+        self.samples.append((now - self._started, self.limit, throughput, latency))
+        self._previous_throughput = throughput
+        if latency is not None:
+            self._previous_latency = latency
+        self._window_start = now
+        self._window_bytes = total_bytes
+        self._window_latencies = []
+        self._window_saturated = self.active >= self.limit
+        self._window_throttled = False
+        return reason
+
+    @property
+    def throughput(self):
+        """Throughput de la última ventana cerrada en bytes/s"""
+        return self.samples[-1][2] if self.samples else 0.0
+
+    def curve(self):
+        """Curvas de concurrencia y throughput como líneas de texto"""
+        return (sparkline(sample[1] for sample in self.samples),
+                sparkline(sample[2] for sample in self.samples))
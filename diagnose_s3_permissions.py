@@ -12,6 +12,12 @@ from botocore.exceptions import ClientError, NoCredentialsError
 import json
 from datetime import datetime
 
+from bandwidth_limiter import GLOBAL_BANDWIDTH
+from s3_batch_delete import DEFAULT_DELETE_WORKERS, delete_keys, iter_bucket_for_emptying
+from s3_transfer_engine import DownloadEngine
+from transfer_settings_manager import TransferSettingsManager
+from transfer_journal import TransferJournal
+
 def print_header():
     """Imprime el encabezado del diagnóstico"""
     print("=" * 60)
@@ -159,17 +165,54 @@ def check_bucket_configuration(s3_client, bucket_name):
     except ClientError as e:
         print(f"   ✗ Error verificando configuración: {e}")
 
-def list_bucket_contents(s3_client, bucket_name):
-    """Lista el contenido de un bucket y devuelve la lista de objetos"""
+def iter_bucket_pages(s3_client, bucket_name, prefix='', cancel_event=None):
+    """
+    Recorre el listado de un bucket (o de un prefijo) y devuelve la lista de
+    objetos de cada página según llega. Si se activa cancel_event no se pide
+    la página siguiente.
+    """
+    paginator = s3_client.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=bucket_name, Prefix=prefix):
+        yield page.get('Contents', [])
+        if cancel_event is not None and cancel_event.is_set():
+            return
+
+def iter_folder_pages(s3_client, bucket_name, prefix='', cancel_event=None):
+    """
+    Lista un único nivel de un prefijo, como una carpeta: con Delimiter='/'
+    S3 agrupa lo que hay debajo de cada subcarpeta en una entrada de
+    CommonPrefixes, así que abrir la raíz de un bucket enorme cuesta una
+    petición y no un recorrido completo.
+
+    Yields:
+        tuple: (subprefijos de la página, objetos de la página). El objeto
+               vacío que algunas herramientas crean como marcador de la
+               propia carpeta (clave igual al prefijo) se omite.
+    """
+    paginator = s3_client.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=bucket_name, Prefix=prefix, Delimiter='/'):
+        folders = [entry['Prefix'] for entry in page.get('CommonPrefixes', [])]
+        objects = [obj for obj in page.get('Contents', []) if obj['Key'] != prefix]
+        yield folders, objects
+        if cancel_event is not None and cancel_event.is_set():
+            return
+
+def iter_bucket_contents(s3_client, bucket_name, prefix='', cancel_event=None):
+    """
+    Recorre los objetos de un bucket (o de un prefijo) página a página sin
+    acumularlos en memoria. Los objetos llegan ordenados por clave.
+    """
+    for page in iter_bucket_pages(s3_client, bucket_name, prefix, cancel_event):
+        yield from page
+
+def list_bucket_contents(s3_client, bucket_name, prefix=''):
+    """
+    Lista el contenido de un bucket y devuelve la lista de objetos. Para
+    buckets grandes es preferible iter_bucket_pages, que no espera al
+    listado completo.
+    """
     try:
-        paginator = s3_client.get_paginator('list_objects_v2')
-        objects = []
-        
-        for page in paginator.paginate(Bucket=bucket_name):
-            if 'Contents' in page:
-                objects.extend(page['Contents'])
-        
-        return objects
+        return list(iter_bucket_contents(s3_client, bucket_name, prefix))
     except Exception as e:
         print(f"Error listando contenido del bucket: {e}")
         return []
@@ -257,36 +300,48 @@ def show_file_selection_menu(objects):
         except Exception as e:
             print(f"Error procesando selección: {e}")
 
-def download_selected_files(s3_client, bucket_name, selected_objects, local_path):
+def download_selected_files(s3_client, bucket_name, selected_objects, local_path,
+                            max_workers=None, settings=None):
     """Descarga los archivos seleccionados de un bucket a una carpeta local"""
     if not selected_objects:
         print("No hay archivos para descargar.")
         return True
     
-    print(f"\nDescargando {len(selected_objects)} archivo(s) del bucket {bucket_name}...")
+    # Usar la configuración de transferencias guardada para el perfil activo
+    settings = settings or TransferSettingsManager.load_settings()
+    
+    def show_progress(progress, key, finished):
+        # Solo se informa al terminar cada objeto para no saturar la consola
+        if finished:
+            percent = (progress.finished_objects / progress.total_objects) * 100
+            print(f"   Descargado: {key}")
+            print(f"   Progreso: {percent:.1f}% ({progress.finished_objects}/{progress.total_objects})")
     
+    journal = None
     try:
-        # Crear directorio local si no existe
-        os.makedirs(local_path, exist_ok=True)
+        # El diario permite reanudar la descarga si se interrumpe
+        journal = TransferJournal.open_default()
+        engine = DownloadEngine(s3_client, max_workers=max_workers,
+                                progress_callback=show_progress, settings=settings,
+                                journal=journal)
+        print(f"\nDescargando {len(selected_objects)} archivo(s) del bucket {bucket_name} "
+              f"({engine.max_workers} descargas en paralelo)...")
+        result = engine.download(bucket_name, selected_objects, local_path)
         
-        downloaded_files = 0
-        total_files = len(selected_objects)
+        if result.resumed:
+            print(f"   ↻ {len(result.resumed)} archivo(s) ya descargados en un intento anterior")
+        if result.skipped:
+            print(f"   = {len(result.skipped)} archivo(s) sin cambios omitidos "
+                  f"({result.skipped_bytes / (1024 * 1024):.2f} MB, "
+                  f"{result.skipped_requests} peticiones ahorradas)")
+        if result.verification:
+            print(f"   🔒 Integridad: {result.verification.summary()}")
+        for key, error in result.failed:
+            print(f"   ✗ Error descargando {key}: {error}")
         
-        for obj in selected_objects:
-            # Crear estructura de directorios local
-            local_file_path = os.path.join(local_path, obj['Key'])
-            local_dir = os.path.dirname(local_file_path)
-            if local_dir:
-                os.makedirs(local_dir, exist_ok=True)
-            
-            # Descargar archivo
-            print(f"   Descargando: {obj['Key']}")
-            s3_client.download_file(bucket_name, obj['Key'], local_file_path)
-            downloaded_files += 1
-            
-            # Mostrar progreso
-            progress = (downloaded_files / total_files) * 100
-            print(f"   Progreso: {progress:.1f}% ({downloaded_files}/{total_files})")
+        if not result.success:
+            print(f"\n   ✗ Descarga incompleta: {result.summary()}")
+            return False
         
         print("\n   ✓ Descarga completada")
         print(f"   Archivos descargados en: {local_path}")
@@ -295,6 +350,44 @@ def download_selected_files(s3_client, bucket_name, selected_objects, local_path
     except Exception as e:
         print(f"\n   ✗ Error durante la descarga: {e}")
         return False
+    finally:
+        if journal:
+            journal.close()
+
+def push_folder_to_bucket(s3_client, bucket_name, local_path, prefix, delete_extras=False):
+    """Sincroniza una carpeta local con un prefijo del bucket subiendo solo los cambios"""
+    # Importación local: s3_sync depende de este módulo
+    from s3_sync import push_folder_to_prefix
+    
+    print(f"\nComparando {local_path} con s3://{bucket_name}/{prefix}...")
+    
+    def show_progress(progress, key, finished):
+        if finished:
+            print(f"   Sincronizado ({progress.finished_objects}/{progress.total_objects}): {key}")
+    
+    try:
+        result = push_folder_to_prefix(
+            s3_client, bucket_name, local_path, prefix,
+            delete_extras=delete_extras,
+            settings=TransferSettingsManager.load_settings(),
+            progress_callback=show_progress
+        )
+        print(f"   Diferencias: {result.diff.summary()}")
+        if result.transfer:
+            for key, error in result.transfer.failed:
+                print(f"   ✗ Error subiendo {key}: {error}")
+        for key, error in result.remove_errors:
+            print(f"   ✗ Error eliminando {key}: {error}")
+        
+        if result.success:
+            print(f"\n   ✓ Sincronización completada: {result.summary()}")
+        else:
+            print(f"\n   ✗ Sincronización incompleta: {result.summary()}")
+        return result.success
+        
+    except Exception as e:
+        print(f"\n   ✗ Error durante la sincronización: {e}")
+        return False
 
 def download_bucket(s3_client, bucket_name, local_path):
     """Descarga contenido seleccionado de un bucket a una carpeta local"""
@@ -329,6 +422,47 @@ def download_bucket(s3_client, bucket_name, local_path):
     
     return download_selected_files(s3_client, bucket_name, selected_objects, local_path)
 
+def mirror_bucket_prefix(s3_client, bucket_name, prefix, local_path, delete_extras=False):
+    """Sincroniza un prefijo del bucket con una carpeta local descargando solo los cambios"""
+    # Importación local: s3_sync depende de este módulo
+    from s3_sync import mirror_prefix_to_folder
+    
+    print(f"\nComparando s3://{bucket_name}/{prefix} con {local_path}...")
+    
+    def show_progress(progress, key, finished):
+        if finished:
+            print(f"   Sincronizado ({progress.finished_objects}/{progress.total_objects}): {key}")
+    
+    journal = None
+    try:
+        journal = TransferJournal.open_default()
+        result = mirror_prefix_to_folder(
+            s3_client, bucket_name, prefix, local_path,
+            delete_extras=delete_extras,
+            settings=TransferSettingsManager.load_settings(),
+            journal=journal,
+            progress_callback=show_progress
+        )
+        print(f"   Diferencias: {result.diff.summary()}")
+        if result.transfer:
+            for key, error in result.transfer.failed:
+                print(f"   ✗ Error descargando {key}: {error}")
+        for path, error in result.remove_errors:
+            print(f"   ✗ Error eliminando {path}: {error}")
+        
+        if result.success:
+            print(f"\n   ✓ Sincronización completada: {result.summary()}")
+        else:
+            print(f"\n   ✗ Sincronización incompleta: {result.summary()}")
+        return result.success
+        
+    except Exception as e:
+        print(f"\n   ✗ Error durante la sincronización: {e}")
+        return False
+    finally:
+        if journal:
+            journal.close()
+
 def show_file_deletion_menu(objects):
     """Muestra los archivos del bucket y permite seleccionar cuáles eliminar"""
     if not objects:
@@ -428,35 +562,47 @@ def show_file_deletion_menu(objects):
         except Exception as e:
             print(f"Error procesando selección: {e}")
 
-def delete_selected_files(s3_client, bucket_name, selected_objects):
-    """Elimina los archivos seleccionados de un bucket"""
+def delete_selected_files(s3_client, bucket_name, selected_objects, progress_callback=None):
+    """
+    Elimina los archivos seleccionados de un bucket con DeleteObjects, en
+    lotes de hasta 1000 claves enviados en paralelo.
+
+    Args:
+        progress_callback: Función opcional llamada tras cada lote como
+            callback(result, batch_deleted, batch_errors).
+    """
     if not selected_objects:
         print("No hay archivos para eliminar.")
         return True
     
-    print(f"\n🔥 Eliminando {len(selected_objects)} archivo(s) del bucket {bucket_name}...")
+    total_files = len(selected_objects)
+    print(f"\n🔥 Eliminando {total_files} archivo(s) del bucket {bucket_name}...")
+    
+    def report_batch(result, batch_deleted, batch_errors):
+        processed = result.deleted + len(result.errors)
+        progress = (processed / total_files) * 100
+        print(f"   🗑️  Lote de {len(batch_deleted) + len(batch_errors)} claves: "
+              f"{len(batch_deleted)} eliminadas, {len(batch_errors)} con error")
+        print(f"   Progreso: {progress:.1f}% ({processed}/{total_files})")
+        if progress_callback:
+            progress_callback(result, batch_deleted, batch_errors)
     
     try:
-        deleted_files = 0
-        total_files = len(selected_objects)
-        
-        # Eliminar archivos de uno en uno para mejor control
-        for obj in selected_objects:
-            print(f"   🗑️  Eliminando: {obj['Key']}")
-            s3_client.delete_object(Bucket=bucket_name, Key=obj['Key'])
-            deleted_files += 1
-            
-            # Mostrar progreso
-            progress = (deleted_files / total_files) * 100
-            print(f"   Progreso: {progress:.1f}% ({deleted_files}/{total_files})")
-        
-        print("\n   ✅ Eliminación completada")
-        print(f"   Archivos eliminados: {deleted_files}")
-        return True
-        
+        result = delete_keys(s3_client, bucket_name, selected_objects,
+                             progress_callback=report_batch)
     except Exception as e:
         print(f"\n   ❌ Error durante la eliminación: {e}")
         return False
+    
+    for key, message in result.errors:
+        print(f"   ❌ {key}: {message}")
+    
+    if result.errors:
+        print("\n   ⚠️ Eliminación completada con errores")
+    else:
+        print("\n   ✅ Eliminación completada")
+    print(f"   Archivos eliminados: {result.deleted}")
+    return result.success
 
 def delete_bucket_contents(s3_client, bucket_name, delete_bucket=False):
     """Elimina contenido seleccionado de un bucket y opcionalmente el bucket mismo"""
@@ -517,43 +663,63 @@ def delete_bucket_contents(s3_client, bucket_name, delete_bucket=False):
     
     return success
 
-def delete_bucket_and_contents(s3_client, bucket_name):
+def delete_bucket_and_contents(s3_client, bucket_name, progress_callback=None,
+                               cancel_event=None, max_workers=DEFAULT_DELETE_WORKERS):
     """
     Vacía y elimina un bucket de S3, manejando el versionado.
 
+    Las versiones y los marcadores de borrado se listan página a página y se
+    eliminan en lotes de 1000 claves enviados en paralelo mientras sigue el
+    listado, sin cargar el bucket entero en memoria.
+
     Args:
         s3_client: Cliente de boto3 S3.
         bucket_name (str): El nombre del bucket a eliminar.
+        progress_callback: Función opcional llamada tras cada lote como
+            callback(objetos eliminados, bytes eliminados, objetos listados).
+        cancel_event (threading.Event): Evento opcional para detener el
+            borrado; lo ya eliminado no se recupera y el bucket se conserva.
+        max_workers (int): Lotes DeleteObjects enviados a la vez.
 
     Returns:
         tuple: (bool, str) donde el booleano indica el éxito y el string
                es un mensaje de estado.
     """
     try:
-        # Paso 1: Vaciar el bucket. Esto es diferente si el bucket está versionado.
+        # Paso 1: Vaciar el bucket (versiones incluidas si las hay)
         print(f"Iniciando el borrado del bucket '{bucket_name}' y todo su contenido.")
         
-        # Comprobar si el versionado está activado
-        s3_resource = boto3.resource('s3')
-        bucket_versioning = s3_resource.BucketVersioning(bucket_name)
+        def report_batch(result, batch_deleted, batch_errors):
+            print(f"   - {result.deleted} objetos eliminados "
+                  f"({result.deleted_bytes / (1024 * 1024):.2f} MB)")
+            if progress_callback:
+                progress_callback(result.deleted, result.deleted_bytes, result.listed)
         
-        if bucket_versioning.status == 'Enabled':
-            print("   - El bucket tiene el versionado activado. Eliminando todas las versiones de objetos y marcadores de borrado.")
-            bucket = s3_resource.Bucket(bucket_name)
-            bucket.object_versions.delete()
-        else:
-            print("   - El bucket no tiene el versionado activado. Eliminando todos los objetos.")
-            bucket = s3_resource.Bucket(bucket_name)
-            bucket.objects.all().delete()
-            
-        print("   ✓ Contenido del bucket eliminado con éxito.")
+        result = delete_keys(s3_client, bucket_name, iter_bucket_for_emptying(s3_client, bucket_name),
+                             max_workers=max_workers, progress_callback=report_batch,
+                             cancel_event=cancel_event)
+        size_mb = result.deleted_bytes / (1024 * 1024)
+        
+        if result.cancelled:
+            print("   ✗ Borrado cancelado.")
+            return False, (f"Borrado del bucket '{bucket_name}' cancelado: se eliminaron "
+                           f"{result.deleted} objetos ({size_mb:.2f} MB) y el bucket se conserva.")
+        if result.errors:
+            for key, message in result.errors[:20]:
+                print(f"   ✗ {key}: {message}")
+            return False, (f"No se pudieron eliminar {len(result.errors)} objetos del bucket "
+                           f"'{bucket_name}' (primero: {result.errors[0][0]}: {result.errors[0][1]}); "
+                           f"el bucket se conserva.")
+        
+        print(f"   ✓ Contenido del bucket eliminado con éxito ({result.deleted} objetos, {size_mb:.2f} MB).")
 
         # Paso 2: Eliminar el bucket ahora que está vacío.
         print("   - Intentando eliminar el bucket...")
         s3_client.delete_bucket(Bucket=bucket_name)
         print(f"   ✓ Bucket '{bucket_name}' eliminado con éxito.")
         
-        return True, f"El bucket '{bucket_name}' y todo su contenido han sido eliminados."
+        return True, (f"El bucket '{bucket_name}' y todo su contenido han sido eliminados "
+                      f"({result.deleted} objetos, {size_mb:.2f} MB).")
 
     except ClientError as e:
         error_code = e.response.get("Error", {}).get("Code")
@@ -617,10 +783,12 @@ def show_menu(s3_client, buckets):
         print("2. Descargar contenido de un bucket")
         print("3. Eliminar contenido de un bucket")
         print("4. Eliminar bucket completo")
-        print("5. Salir")
+        print("5. Sincronizar un prefijo con una carpeta local")
+        print("6. Sincronizar una carpeta local con un prefijo")
+        print("7. Salir")
         
         try:
-            opcion = input("\nSeleccione una opción (1-5): ")
+            opcion = input("\nSeleccione una opción (1-7): ")
             
             if opcion == "1":
                 # Verificar permisos para cada bucket
@@ -634,7 +802,7 @@ def show_menu(s3_client, buckets):
                         status_icon = "✓" if status else "✗"
                         print(f"   {status_icon} {perm.capitalize()}: {'OK' if status else 'Error'}")
             
-            elif opcion in ["2", "3", "4"]:
+            elif opcion in ["2", "3", "4", "5", "6"]:
                 # Mostrar buckets disponibles
                 print("\nBuckets disponibles:")
                 for i, bucket in enumerate(buckets, 1):
@@ -655,10 +823,22 @@ def show_menu(s3_client, buckets):
                     elif opcion == "4":
                         if input(f"¿Está seguro de eliminar el bucket {bucket_name} y TODO su contenido? (s/N): ").lower() == 's':
                             delete_bucket_contents(s3_client, bucket_name, delete_bucket=True)
+                    
+                    elif opcion == "5":
+                        prefix = input("Prefijo a sincronizar (vacío para todo el bucket): ")
+                        local_path = input("Ingrese la carpeta local destino: ")
+                        delete_extras = input("¿Eliminar archivos locales que ya no existen en el bucket? (s/N): ").lower() == 's'
+                        mirror_bucket_prefix(s3_client, bucket_name, prefix, local_path, delete_extras)
+                    
+                    elif opcion == "6":
+                        local_path = input("Ingrese la carpeta local a subir: ")
+                        prefix = input("Prefijo de destino (vacío para la raíz): ")
+                        delete_extras = input("¿Eliminar del bucket los objetos que no existen en la carpeta? (s/N): ").lower() == 's'
+                        push_folder_to_bucket(s3_client, bucket_name, local_path, prefix, delete_extras)
                 else:
                     print("Número de bucket inválido")
             
-            elif opcion == "5":
+            elif opcion == "7":
                 print("\nSaliendo...")
                 break
             
@@ -697,6 +877,9 @@ def main():
         print("\n⚠️  No se encontraron buckets")
         return
     
+    # Límite global de ancho de banda configurado para el perfil
+    GLOBAL_BANDWIDTH.set_rate_mb(TransferSettingsManager.load_settings().max_bandwidth_mb_s)
+    
     # Mostrar menú de operaciones
     show_menu(s3_client, buckets)
 
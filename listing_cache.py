@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Caché persistente (SQLite) de los listados de buckets por carpeta
+Autor: EDF Developer - 2025
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from local_metadata_cache import remote_timestamp
+
+
+def entry_sort_key(entry):
+    """Subcarpetas primero y después objetos, cada grupo por nombre"""
+    return ('Prefix' not in entry, entry.get('Prefix') or entry['Key'])
+
+
+def listing_fingerprint(entries):
+    """
+    Huella de un nivel listado: cambia si se añade, elimina o modifica
+    (otro ETag o tamaño) cualquier objeto o subcarpeta. No depende del
+    orden en que llegaron las entradas.
+    """
+    digest = hashlib.sha1()
+    for entry in sorted(entries, key=entry_sort_key):
+        if 'Prefix' in entry:
+            digest.update(f"P\0{entry['Prefix']}\0".encode('utf-8'))
+        else:
+            digest.update(f"K\0{entry['Key']}\0{entry.get('ETag')}\0{entry.get('Size', 0)}\0".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def format_age(seconds):
+    """Antigüedad legible de un listado"""
+    seconds = max(0, int(seconds))
+    if seconds < 60:
+        return "hace unos segundos"
+    if seconds < 3600:
+        return f"hace {seconds // 60} min"
+    if seconds < 86400:
+        return f"hace {seconds // 3600} h"
+    return f"hace {seconds // 86400} días"
+
+
+class ListingCache:
+    """
+    Guarda el último listado de cada carpeta (bucket + prefijo) visitada,
+    con sus subcarpetas y objetos, para mostrarlo al instante la próxima
+    vez, también tras reiniciar la aplicación, mientras se comprueba en
+    segundo plano si ha cambiado.
+
+    Cada nivel guarda una huella de su contenido: al volver a listarlo solo
+    se reescribe (y se vuelve a dibujar) si la huella es distinta.
+
+    Todas las operaciones son thread-safe: se comparte una conexión
+    protegida por un lock.
+    """
+
+    CACHE_DIR = Path.home() / '.s3manager'
+    CACHE_FILE = 'listing_cache.sqlite3'
+
+    def __init__(self, db_path):
+        self.db_path = str(db_path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        with self._lock, self._conn:
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS levels (
+                    bucket TEXT NOT NULL,
+                    prefix TEXT NOT NULL,
+                    listed_at REAL NOT NULL,
+                    fingerprint TEXT NOT NULL,
+                    PRIMARY KEY (bucket, prefix)
+                );
+                CREATE TABLE IF NOT EXISTS entries (
+                    bucket TEXT NOT NULL,
+                    prefix TEXT NOT NULL,
+                    object_key TEXT NOT NULL,
+                    is_folder INTEGER NOT NULL,
+                    size INTEGER,
+                    etag TEXT,
+                    last_modified REAL,
+                    storage_class TEXT,
+                    PRIMARY KEY (bucket, prefix, object_key)
+                );
+            """)
+
+    @classmethod
+    def open_default(cls):
+        """Abre la caché en ~/.s3manager/listing_cache.sqlite3"""
+        cls.CACHE_DIR.mkdir(mode=0o700, parents=True, exist_ok=True)
+        return cls(cls.CACHE_DIR / cls.CACHE_FILE)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def get_level(self, bucket_name, prefix):
+        """
+        Listado guardado de una carpeta.
+
+        Returns:
+            tuple: (entradas en el formato de list_objects_v2, con las
+                    subcarpetas como {'Prefix': ...} delante de los objetos,
+                    momento del listado en segundos epoch), o (None, None)
+                    si no está en la caché.
+        """
+        with self._lock:
+            level = self._conn.execute(
+                "SELECT listed_at FROM levels WHERE bucket = ? AND prefix = ?",
+                (bucket_name, prefix)
+            ).fetchone()
+            if level is None:
+                return None, None
+            rows = self._conn.execute(
+                "SELECT object_key, is_folder, size, etag, last_modified, storage_class "
+                "FROM entries WHERE bucket = ? AND prefix = ? ORDER BY is_folder DESC, object_key",
+                (bucket_name, prefix)
+            ).fetchall()
+
+        entries = []
+        for key, is_folder, size, etag, last_modified, storage_class in rows:
+            if is_folder:
+                entries.append({'Prefix': key})
+                continue
+            entry = {'Key': key, 'Size': size, 'ETag': etag, 'StorageClass': storage_class}
+            if last_modified is not None:
+                entry['LastModified'] = datetime.fromtimestamp(last_modified, tz=timezone.utc)
+            entries.append(entry)
+        return entries, level[0]
+
+    def store_level(self, bucket_name, prefix, entries, listed_at=None):
+        """
+        Guarda el listado completo de una carpeta. Si su huella coincide con
+        la guardada solo se actualiza la fecha del listado.
+
+        Returns:
+            bool: True si el contenido cambió (o no estaba en la caché).
+        """
+        listed_at = time.time() if listed_at is None else listed_at
+        fingerprint = listing_fingerprint(entries)
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT fingerprint FROM levels WHERE bucket = ? AND prefix = ?",
+                (bucket_name, prefix)
+            ).fetchone()
+            changed = row is None or row[0] != fingerprint
+            if changed:
+                self._conn.execute(
+                    "DELETE FROM entries WHERE bucket = ? AND prefix = ?", (bucket_name, prefix))
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO entries "
+                    "(bucket, prefix, object_key, is_folder, size, etag, last_modified, storage_class) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        (bucket_name, prefix, entry['Prefix'], 1, None, None, None, None)
+                        if 'Prefix' in entry else
+                        (bucket_name, prefix, entry['Key'], 0, entry.get('Size', 0), entry.get('ETag'),
+                         remote_timestamp(entry), entry.get('StorageClass'))
+                        for entry in entries
+                    )
+                )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO levels (bucket, prefix, listed_at, fingerprint) VALUES (?, ?, ?, ?)",
+                (bucket_name, prefix, listed_at, fingerprint)
+            )
+        return changed
+
+    def stale_levels(self, bucket_name, older_than, exclude=None):
+        """Carpetas guardadas de un bucket listadas hace más de older_than segundos"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT prefix FROM levels WHERE bucket = ? AND listed_at < ? ORDER BY listed_at, prefix",
+                (bucket_name, time.time() - older_than)
+            ).fetchall()
+        return [row[0] for row in rows if row[0] != exclude]
+
+    def forget_level(self, bucket_name, prefix):
+        """Olvida una carpeta y todas las que cuelgan de ella"""
+        pattern = prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        with self._lock, self._conn:
+            for table in ('entries', 'levels'):
+                self._conn.execute(
+                    f"DELETE FROM {table} WHERE bucket = ? AND prefix LIKE ? ESCAPE '\\'",
+                    (bucket_name, pattern)
+                )
+
+    def forget_bucket(self, bucket_name):
+        with self._lock, self._conn:
+            for table in ('entries', 'levels'):
+                self._conn.execute(f"DELETE FROM {table} WHERE bucket = ?", (bucket_name,))
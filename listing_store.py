@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Almacén compacto por columnas para listados de buckets muy grandes
+Autor: EDF Developer - 2025
+"""
+
+import math
+from array import array
+from datetime import datetime, timezone
+
+from local_metadata_cache import remote_timestamp
+
+# Valor de la columna de partes del ETag cuando no se pudo empaquetar
+# (falta, o no es un MD5 en hexadecimal): se guarda aparte tal cual
+ETAG_UNPACKED = -1
+
+# Partes que caben en la columna de partes del ETag (S3 admite 10000)
+MAX_ETAG_PARTS = 32767
+
+# Tamaño de las subcarpetas ({'Prefix': ...}) en la columna de tamaños
+FOLDER_SIZE = -1
+
+
+def split_key(key):
+    """Separa una clave (o una subcarpeta acabada en '/') en (carpeta, nombre)"""
+    cut = key.rfind('/', 0, len(key) - 1) + 1
+    return key[:cut], key[cut:]
+
+
+def pack_etag(etag):
+    """
+    Convierte un ETag de S3 ('"<md5>"' o '"<md5>-<partes>"') en 16 bytes y
+    el número de partes (0 si no es multiparte).
+
+    Returns:
+        tuple: (bytes, partes), o None si el ETag no tiene ese formato y no
+               se puede reconstruir idéntico.
+    """
+    if not etag or len(etag) < 34 or etag[0] != '"' or etag[-1] != '"':
+        return None
+    digest, _, parts = etag[1:-1].partition('-')
+    try:
+        packed = bytes.fromhex(digest)
+    except ValueError:
+        return None
+    if len(packed) != 16 or packed.hex() != digest:
+        return None
+    if not parts:
+        return packed, 0
+    if not parts.isdigit() or str(int(parts)) != parts or not 0 < int(parts) <= MAX_ETAG_PARTS:
+        return None
+    return packed, int(parts)
+
+
+def unpack_etag(packed, parts):
+    return f'"{packed.hex()}-{parts}"' if parts else f'"{packed.hex()}"'
+
+
+class ListingStore:
+    """
+    Lista de objetos de un listado guardada por columnas en arrays en lugar
+    de un dict de boto3 por objeto, que con millones de claves ocupa
+    cientos de bytes cada uno.
+
+    - Claves: la carpeta se guarda una sola vez en una tabla de prefijos y
+      cada objeto solo su índice y el nombre en UTF-8 dentro de un búfer
+      común.
+    - Tamaño y fecha de modificación como enteros y segundos epoch.
+    - ETag como los 16 bytes del MD5 más el número de partes.
+    - Clase de almacenamiento como índice en una tabla.
+
+    Se comporta como una secuencia de solo lectura con append/extend: al
+    acceder a un elemento se reconstruye el dict ({'Key', 'Size', 'ETag',
+    'LastModified', 'StorageClass'}, o {'Prefix'} para una subcarpeta), así
+    que el código que recibía la lista de dicts sigue funcionando. Los
+    demás campos del listado (Owner, ChecksumAlgorithm...) no se guardan.
+    """
+
+    def __init__(self, entries=()):
+        self.clear()
+        self.extend(entries)
+
+    def clear(self):
+        self._prefixes = []
+        self._prefix_ids = {}
+        self._storage_classes = [None]
+        self._storage_class_ids = {None: 0}
+        self._prefix = array('I')
+        self._names = bytearray()
+        self._name_ends = array('I')  # Pasa a 'Q' si los nombres superan 4 GB
+        self._sizes = array('q')
+        self._mtimes = array('d')
+        self._etags = bytearray()
+        self._etag_parts = array('h')
+        self._storage_class = array('B')
+        self._other_etags = {}  # índice -> ETag sin empaquetar (o None si faltaba)
+
+    def _intern(self, table, ids, value):
+        index = ids.get(value)
+        if index is None:
+            index = ids[value] = len(table)
+            table.append(value)
+        return index
+
+    def append(self, entry):
+        """Añade un objeto de list_objects_v2 o una subcarpeta {'Prefix': ...}"""
+        folder = 'Prefix' in entry
+        prefix, name = split_key(entry['Prefix'] if folder else entry['Key'])
+        self._prefix.append(self._intern(self._prefixes, self._prefix_ids, prefix))
+        self._names += name.encode('utf-8')
+        if len(self._names) > 0xFFFFFFFF and self._name_ends.typecode == 'I':
+            self._name_ends = array('Q', self._name_ends)
+        self._name_ends.append(len(self._names))
+
+        if folder:
+            self._sizes.append(FOLDER_SIZE)
+            self._mtimes.append(math.nan)
+            self._etags += bytes(16)
+            self._etag_parts.append(0)
+            self._storage_class.append(0)
+            return
+
+        self._sizes.append(entry.get('Size', 0))
+        timestamp = remote_timestamp(entry)
+        self._mtimes.append(math.nan if timestamp is None else timestamp)
+        etag = entry.get('ETag')
+        packed = pack_etag(etag)
+        if packed is None:
+            self._other_etags[len(self._etag_parts)] = etag
+            packed = (bytes(16), ETAG_UNPACKED)
+        self._etags += packed[0]
+        self._etag_parts.append(packed[1])
+        self._storage_class.append(
+            self._intern(self._storage_classes, self._storage_class_ids, entry.get('StorageClass')))
+
+    def extend(self, entries):
+        for entry in entries:
+            self.append(entry)
+
+    def __len__(self):
+        return len(self._sizes)
+
+    def _index(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('índice fuera del listado')
+        return index
+
+    def key(self, index):
+        """Clave (o subcarpeta) del elemento sin reconstruir el dict"""
+        index = self._index(index)
+        start = self._name_ends[index - 1] if index else 0
+        name = self._names[start:self._name_ends[index]].decode('utf-8')
+        return self._prefixes[self._prefix[index]] + name
+
+    def is_folder(self, index):
+        return self._sizes[self._index(index)] == FOLDER_SIZE
+
+    def size(self, index):
+        return max(self._sizes[self._index(index)], 0)
+
+    def total_size(self):
+        """Suma de los tamaños de los objetos (las subcarpetas no cuentan)"""
+        return sum(size for size in self._sizes if size > 0)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        index = self._index(index)
+        key = self.key(index)
+        if self._sizes[index] == FOLDER_SIZE:
+            return {'Prefix': key}
+
+        entry = {'Key': key, 'Size': self._sizes[index]}
+        parts = self._etag_parts[index]
+        if parts == ETAG_UNPACKED:
+            etag = self._other_etags[index]
+        else:
+            etag = unpack_etag(bytes(self._etags[index * 16:index * 16 + 16]), parts)
+        if etag is not None:
+            entry['ETag'] = etag
+        if not math.isnan(self._mtimes[index]):
+            entry['LastModified'] = datetime.fromtimestamp(self._mtimes[index], tz=timezone.utc)
+        storage_class = self._storage_classes[self._storage_class[index]]
+        if storage_class is not None:
+            entry['StorageClass'] = storage_class
+        return entry
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def nbytes(self):
+        """Memoria aproximada de las columnas y las tablas, en bytes"""
+        columns = (self._prefix, self._name_ends, self._sizes, self._mtimes,
+                   self._etag_parts, self._storage_class)
+        total = sum(column.itemsize * len(column) for column in columns)
+        total += len(self._names) + len(self._etags)
+        total += sum(len(prefix) + 49 for prefix in self._prefixes)
+        total += sum(len(etag or '') + 49 for etag in self._other_etags.values())
+        return total
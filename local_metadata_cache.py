@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Caché de metadatos junto a una carpeta local descargada desde S3
+Autor: EDF Developer - 2025
+"""
+
+import os
+import sqlite3
+import threading
+
+
+def remote_timestamp(obj):
+    """Convierte el LastModified de un listado a segundos epoch (float)"""
+    last_modified = obj.get('LastModified')
+    if last_modified is None:
+        return None
+    if hasattr(last_modified, 'timestamp'):
+        return last_modified.timestamp()
+    return float(last_modified)
+
+
+class LocalMetadataCache:
+    """
+    Guarda, para cada archivo descargado, el ETag/tamaño/fecha del objeto
+    remoto y el tamaño/mtime del archivo local en el momento de escribirlo.
+
+    Se almacena en un archivo SQLite oculto dentro de la carpeta destino,
+    de modo que viaja con la carpeta y no hay que cargarlo entero en memoria.
+
+    También guarda el ETag calculado de los archivos locales que se suben,
+    indexado por tamaño y mtime, para no volver a leer su contenido mientras
+    no cambien.
+    """
+
+    CACHE_FILE = '.s3manager_metadata.sqlite3'
+
+    def __init__(self, local_path):
+        self.local_path = os.path.abspath(local_path)
+        os.makedirs(self.local_path, exist_ok=True)
+        self.db_path = os.path.join(self.local_path, self.CACHE_FILE)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS downloaded_objects (
+                    bucket TEXT NOT NULL,
+                    object_key TEXT NOT NULL,
+                    etag TEXT,
+                    size INTEGER NOT NULL,
+                    last_modified REAL,
+                    local_size INTEGER NOT NULL,
+                    local_mtime_ns INTEGER NOT NULL,
+                    PRIMARY KEY (bucket, object_key)
+                )
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS local_hashes (
+                    relative_path TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    part_size INTEGER NOT NULL,
+                    etag TEXT NOT NULL
+                )
+            """)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def record_download(self, bucket_name, obj, local_file_path):
+        """Registra un objeto recién descargado con el estado actual del archivo"""
+        stat = os.stat(local_file_path)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO downloaded_objects "
+                "(bucket, object_key, etag, size, last_modified, local_size, local_mtime_ns) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (bucket_name, obj['Key'], obj.get('ETag'), obj.get('Size', 0),
+                 remote_timestamp(obj), stat.st_size, stat.st_mtime_ns)
+            )
+
+    def forget(self, bucket_name, key):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM downloaded_objects WHERE bucket = ? AND object_key = ?",
+                (bucket_name, key)
+            )
+
+    def is_unchanged(self, bucket_name, obj, local_file_path):
+        """
+        True si la copia local es idéntica al objeto remoto.
+
+        Con entrada en la caché se exige el mismo ETag y tamaño remotos y que
+        el archivo local no se haya tocado desde la descarga. Sin entrada se
+        compara con las estadísticas del archivo: mismo tamaño y mtime igual
+        al LastModified remoto (la fecha que se fija al descargar).
+        """
+        try:
+            stat = os.stat(local_file_path)
+        except OSError:
+            return False
+        size = obj.get('Size', 0)
+        if stat.st_size != size:
+            return False
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, size, local_size, local_mtime_ns FROM downloaded_objects "
+                "WHERE bucket = ? AND object_key = ?",
+                (bucket_name, obj['Key'])
+            ).fetchone()
+        if row is not None:
+            etag, cached_size, local_size, local_mtime_ns = row
+            return (etag == obj.get('ETag') and cached_size == size
+                    and local_size == stat.st_size and local_mtime_ns == stat.st_mtime_ns)
+
+        last_modified = remote_timestamp(obj)
+        return last_modified is not None and int(stat.st_mtime) == int(last_modified)
+
+    # --- ETag de archivos locales ---
+
+    def cached_local_etag(self, relative_path, stat, part_size):
+        """
+        ETag guardado de un archivo local, o None si el archivo cambió de
+        tamaño o de mtime desde que se calculó o se usó otro tamaño de parte.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, mtime_ns, part_size, etag FROM local_hashes "
+                "WHERE relative_path = ?",
+                (relative_path,)
+            ).fetchone()
+        if row is None or row[:3] != (stat.st_size, stat.st_mtime_ns, part_size or 0):
+            return None
+        return row[3]
+
+    def record_local_etag(self, relative_path, stat, part_size, etag):
+        """Guarda el ETag de un archivo local junto con su tamaño y mtime"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO local_hashes "
+                "(relative_path, size, mtime_ns, part_size, etag) VALUES (?, ?, ?, ?, ?)",
+                (relative_path, stat.st_size, stat.st_mtime_ns, part_size or 0, etag)
+            )
+
+    def forget_local_etag(self, relative_path):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM local_hashes WHERE relative_path = ?", (relative_path,))
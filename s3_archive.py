@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Exportación de objetos de S3 a un único archivo zip o tar
+Autor: EDF Developer - 2025
+"""
+
+import io
+import os
+import tarfile
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from local_metadata_cache import remote_timestamp
+from s3_transfer_engine import (
+    PARTIAL_SUFFIX, RANGE_READ_SIZE, TransferEngine, TransferProgress, TransferResult
+)
+from transfer_settings_manager import MB
+
+try:
+    import zstandard
+except ImportError:  # Dependencia opcional: solo necesaria para .tar.zst
+    zstandard = None
+
+# Memoria máxima ocupada por los objetos pequeños leídos por adelantado
+PREFETCH_BUFFER_BYTES = 64 * MB
+
+# Extensión del archivo -> (formato, compresión)
+ARCHIVE_EXTENSIONS = {
+    '.tar.zst': ('tar', 'zstd'),
+    '.tar.gz': ('tar', 'gzip'),
+    '.tgz': ('tar', 'gzip'),
+    '.tar': ('tar', None),
+    '.zip': ('zip', None),
+}
+
+
+def archive_format_for_path(path):
+    """
+    Deduce el formato y la compresión a partir de la extensión del archivo.
+
+    Returns:
+        tuple: (formato, compresión), por ejemplo ('tar', 'zstd').
+
+    Raises:
+        ValueError: Si la extensión no corresponde a ningún formato soportado.
+    """
+    lower = path.lower()
+    for extension, archive_format in ARCHIVE_EXTENSIONS.items():
+        if lower.endswith(extension):
+            return archive_format
+    raise ValueError(
+        f"Extensión no soportada: {os.path.basename(path)} "
+        f"(use {', '.join(ARCHIVE_EXTENSIONS)})"
+    )
+
+
+def archive_entry_name(key, strip_prefix=''):
+    """Nombre de un objeto dentro del archivo, sin el prefijo ni barras iniciales"""
+    if strip_prefix and key.startswith(strip_prefix):
+        key = key[len(strip_prefix):]
+    return key.lstrip('/')
+
+
+class _CountingReader:
+    """Envuelve el cuerpo de un objeto para contar bytes y atender la cancelación"""
+
+    def __init__(self, body, on_read, cancel_event):
+        self._body = body
+        self._on_read = on_read
+        self._cancel_event = cancel_event
+
+    def read(self, size=-1):
+        if self._cancel_event.is_set():
+            raise RuntimeError("Exportación cancelada")
+        data = self._body.read(size)
+        if data:
+            self._on_read(len(data))
+        return data
+
+
+class ArchiveEngine(TransferEngine):
+    """
+    Escribe objetos de S3 directamente en un único zip o tar, sin crear un
+    archivo local por objeto.
+
+    El archivo se escribe en el hilo que llama, en el orden de la selección.
+    Mientras tanto el pool descarga por adelantado los objetos pequeños
+    (hasta PREFETCH_BUFFER_BYTES en memoria) para que el escritor no espere
+    a la latencia de cada petición. Los objetos mayores que el tamaño de
+    parte se leen en streaming desde la respuesta de S3 al llegar su turno.
+    """
+
+    def export(self, bucket_name, objects, output_path, archive_format='zip',
+               compression=None, strip_prefix=''):
+        """
+        Exporta los objetos a output_path. Mientras se escribe se usa un
+        archivo con sufijo .s3part que solo se renombra al terminar; si se
+        cancela o falla la escritura se elimina.
+
+        Returns:
+            TransferResult: claves archivadas, fallidas y si se canceló.
+        """
+        if archive_format not in ('zip', 'tar'):
+            raise ValueError(f"Formato de archivo no soportado: {archive_format}")
+        if compression not in (None, 'gzip', 'zstd'):
+            raise ValueError(f"Compresión no soportada: {compression}")
+        if archive_format == 'zip' and compression == 'zstd':
+            raise ValueError("La compresión zstd solo está disponible para archivos tar")
+        if compression == 'zstd' and zstandard is None:
+            raise ValueError("La compresión zstd requiere el paquete 'zstandard'")
+
+        objects = [obj for obj in objects if not obj['Key'].endswith('/')]
+        result = TransferResult()
+        self.progress = TransferProgress(objects)
+        partial_path = output_path + PARTIAL_SUFFIX
+
+        output_dir = os.path.dirname(os.path.abspath(output_path))
+        os.makedirs(output_dir, exist_ok=True)
+        try:
+            with open(partial_path, 'wb') as out:
+                if archive_format == 'zip':
+                    self._write_zip(bucket_name, objects, out, compression, strip_prefix, result)
+                elif compression == 'zstd':
+                    compressor = zstandard.ZstdCompressor()
+                    with compressor.stream_writer(out, closefd=False) as compressed:
+                        self._write_tar(bucket_name, objects, compressed, None,
+                                        strip_prefix, result)
+                else:
+                    self._write_tar(bucket_name, objects, out, compression, strip_prefix, result)
+        except BaseException:
+            self._remove_partial(partial_path)
+            if not self.cancel_event.is_set():
+                raise
+
+        result.cancelled = self.cancel_event.is_set()
+        if result.cancelled:
+            self._remove_partial(partial_path)
+        else:
+            os.replace(partial_path, output_path)
+        return result
+
+    @staticmethod
+    def _remove_partial(partial_path):
+        try:
+            os.remove(partial_path)
+        except OSError:
+            pass
+
+    def _fetch_small(self, bucket_name, obj):
+        """Lee un objeto pequeño completo en memoria; se ejecuta en el pool"""
+        if self.cancel_event.is_set():
+            raise RuntimeError("Exportación cancelada")
+        response = self.s3_client.get_object(Bucket=bucket_name, Key=obj['Key'])
+        data = response['Body'].read()
+        self._throttle(len(data))
+        return data
+
+    def _iter_prefetched(self, bucket_name, objects):
+        """
+        Devuelve (obj, datos, error) en el orden de la selección. datos es
+        None para los objetos grandes, que el escritor leerá en streaming.
+        """
+        stream_threshold = self.settings.multipart_chunksize
+        window = self.max_workers * 2
+        pending = deque()
+        buffered = 0
+        remaining = iter(objects)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while True:
+                while len(pending) < window and (buffered < PREFETCH_BUFFER_BYTES or not pending):
+                    obj = next(remaining, None)
+                    if obj is None or self.cancel_event.is_set():
+                        break
+                    if obj.get('Size', 0) > stream_threshold:
+                        pending.append((obj, None))
+                    else:
+                        pending.append((obj, executor.submit(self._fetch_small, bucket_name, obj)))
+                        buffered += obj.get('Size', 0)
+                if not pending:
+                    break
+
+                obj, future = pending.popleft()
+                if future is None:
+                    yield obj, None, None
+                    continue
+                buffered -= obj.get('Size', 0)
+                try:
+                    yield obj, future.result(), None
+                except Exception as e:
+                    yield obj, None, e
+
+                if self.cancel_event.is_set():
+                    for _, pending_future in pending:
+                        if pending_future:
+                            pending_future.cancel()
+                    break
+
+    def _entries(self, bucket_name, objects, result):
+        """
+        Recorre los objetos listos para escribir como (obj, lector, tamaño).
+        Los fallos de lectura se anotan en result y el objeto se omite.
+        """
+        for obj, data, error in self._iter_prefetched(bucket_name, objects):
+            key = obj['Key']
+            if error is not None:
+                self.progress.mark_done(key, False)
+                result.failed.append((key, str(error)))
+                self._notify(key, True)
+                continue
+
+            def on_read(amount, key=key, streamed=data is None):
+                if streamed:
+                    self._throttle(amount)  # Los prefetch ya se limitaron al leerse
+                self.progress.add_bytes(key, amount)
+                self._notify(key, False)
+
+            if data is not None:
+                reader = _CountingReader(io.BytesIO(data), on_read, self.cancel_event)
+                size = len(data)
+            else:
+                try:
+                    response = self.s3_client.get_object(Bucket=bucket_name, Key=key)
+                except Exception as e:
+                    self.progress.mark_done(key, False)
+                    result.failed.append((key, str(e)))
+                    self._notify(key, True)
+                    continue
+                reader = _CountingReader(response['Body'], on_read, self.cancel_event)
+                size = response.get('ContentLength', obj.get('Size', 0))
+            yield obj, reader, size
+
+            self.progress.mark_done(key, True)
+            result.succeeded.append(key)
+            self._notify(key, True)
+
+    def _write_tar(self, bucket_name, objects, out, compression, strip_prefix, result):
+        mode = 'w|gz' if compression == 'gzip' else 'w|'
+        with tarfile.open(fileobj=out, mode=mode, format=tarfile.PAX_FORMAT) as archive:
+            for obj, reader, size in self._entries(bucket_name, objects, result):
+                info = tarfile.TarInfo(archive_entry_name(obj['Key'], strip_prefix))
+                info.size = size
+                info.mtime = remote_timestamp(obj) or time.time()
+                info.mode = 0o644
+                archive.addfile(info, reader)
+
+    def _write_zip(self, bucket_name, objects, out, compression, strip_prefix, result):
+        zip_compression = zipfile.ZIP_DEFLATED if compression == 'gzip' else zipfile.ZIP_STORED
+        with zipfile.ZipFile(out, 'w', compression=zip_compression, allowZip64=True) as archive:
+            for obj, reader, size in self._entries(bucket_name, objects, result):
+                timestamp = remote_timestamp(obj) or time.time()
+                info = zipfile.ZipInfo(
+                    archive_entry_name(obj['Key'], strip_prefix),
+                    date_time=time.localtime(max(timestamp, 315532800))[:6]
+                )
+                info.compress_type = zip_compression
+                info.file_size = size
+                with archive.open(info, 'w', force_zip64=size >= zipfile.ZIP64_LIMIT) as entry:
+                    while True:
+                        chunk = reader.read(RANGE_READ_SIZE)
+                        if not chunk:
+                            break
+                        entry.write(chunk)
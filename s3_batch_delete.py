@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Eliminación de objetos con DeleteObjects en lotes paralelos
+Autor: EDF Developer - 2025
+"""
+
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+
+from concurrency_controller import THROTTLE_ERROR_CODES, is_throttle_error
+
+# Máximo de claves por petición DeleteObjects
+DELETE_BATCH_SIZE = 1000
+
+# Lotes enviados a la vez si no se indica otra cosa
+DEFAULT_DELETE_WORKERS = 8
+
+# Reintentos de un lote (o de sus claves) rechazado con SlowDown/503
+MAX_DELETE_RETRIES = 3
+
+# Espera antes del primer reintento; se duplica en cada intento
+RETRY_BACKOFF = 0.5
+
+
+def iter_object_versions(s3_client, bucket_name, prefix=''):
+    """
+    Recorre las versiones y los marcadores de borrado de un bucket página a
+    página, sin acumularlos en memoria.
+    """
+    paginator = s3_client.get_paginator('list_object_versions')
+    for page in paginator.paginate(Bucket=bucket_name, Prefix=prefix):
+        yield from page.get('Versions', [])
+        yield from page.get('DeleteMarkers', [])
+
+
+def delete_entry(item):
+    """
+    Convierte una clave, un dict de listado ({'Key': ...}) o una versión
+    ({'Key': ..., 'VersionId': ...}) en una entrada de DeleteObjects.
+    """
+    if isinstance(item, str):
+        return {'Key': item}
+    entry = {'Key': item['Key']}
+    if item.get('VersionId'):
+        entry['VersionId'] = item['VersionId']
+    return entry
+
+
+class DeleteResult:
+    """Resultado de una eliminación por lotes"""
+
+    def __init__(self):
+        self.deleted = 0   # Objetos eliminados; las claves solo llegan al callback
+        self.errors = []   # Tuplas (clave, mensaje de error)
+        self.deleted_bytes = 0
+        self.listed = 0    # Elementos recibidos del iterable hasta ahora
+        self.batches = 0
+        self.cancelled = False
+
+    @property
+    def success(self):
+        return not self.errors and not self.cancelled
+
+    def summary(self):
+        message = f"{self.deleted} objetos eliminados en {self.batches} peticiones"
+        if self.errors:
+            message += f", {len(self.errors)} con error"
+        if self.cancelled:
+            message += " (cancelado)"
+        return message
+
+
+class BatchDeleter:
+    """
+    Elimina objetos agrupándolos en peticiones DeleteObjects de hasta
+    DELETE_BATCH_SIZE claves y envía varios lotes a la vez. Los errores de
+    cada clave se leen de la respuesta del lote, de modo que un objeto sin
+    permiso no impide borrar el resto.
+
+    Las claves pueden llegar de un generador (por ejemplo, un listado
+    paginado): solo se mantienen en memoria los lotes en curso, y el
+    resultado guarda contadores y errores, no las claves eliminadas (que
+    se pasan lote a lote al callback). Si los elementos traen 'Size' se
+    suman los bytes eliminados.
+
+    Args:
+        s3_client: Cliente de boto3 S3.
+        max_workers (int): Lotes enviados a la vez.
+        progress_callback: Función opcional llamada tras cada lote como
+            callback(result, batch_deleted, batch_errors).
+        cancel_event (threading.Event): Evento opcional para cancelar; los
+            lotes ya enviados terminan y no se envían más.
+    """
+
+    def __init__(self, s3_client, max_workers=DEFAULT_DELETE_WORKERS,
+                 progress_callback=None, cancel_event=None):
+        self.s3_client = s3_client
+        self.max_workers = max(1, int(max_workers or DEFAULT_DELETE_WORKERS))
+        self.progress_callback = progress_callback
+        self.cancel_event = cancel_event or threading.Event()
+
+    def delete(self, bucket_name, items):
+        """
+        Elimina items (claves, objetos de un listado o versiones).
+
+        Returns:
+            DeleteResult
+        """
+        result = DeleteResult()
+        items = iter(items)
+
+        def next_batch():
+            batch = list(islice(items, DELETE_BATCH_SIZE))
+            result.listed += len(batch)
+            return batch
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = set()
+            exhausted = False
+            while True:
+                while not exhausted and len(pending) < self.max_workers and not self.cancel_event.is_set():
+                    batch = next_batch()
+                    if not batch:
+                        exhausted = True
+                        break
+                    pending.add(executor.submit(self._delete_batch, bucket_name, batch))
+                if not pending:
+                    break
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    deleted, errors, deleted_bytes = future.result()
+                    result.batches += 1
+                    result.deleted += len(deleted)
+                    result.deleted_bytes += deleted_bytes
+                    result.errors.extend(errors)
+                    if self.progress_callback:
+                        self.progress_callback(result, deleted, errors)
+
+        result.cancelled = self.cancel_event.is_set() and not exhausted
+        return result
+
+    def _delete_batch(self, bucket_name, batch):
+        """
+        Envía un lote. Las claves rechazadas por saturación (el lote entero o
+        claves sueltas con SlowDown) se reintentan con espera exponencial.
+
+        Returns:
+            tuple: (claves eliminadas, lista de tuplas (clave, mensaje de error),
+                    bytes eliminados)
+        """
+        sizes = {}
+        for item in batch:
+            if not isinstance(item, str):
+                sizes[(item['Key'], item.get('VersionId') or None)] = item.get('Size', 0)
+        batch = [delete_entry(item) for item in batch]
+        deleted = []
+        errors = []
+        deleted_bytes = 0
+        for attempt in range(MAX_DELETE_RETRIES + 1):
+            if attempt:
+                time.sleep(RETRY_BACKOFF * 2 ** (attempt - 1))
+            last_attempt = attempt == MAX_DELETE_RETRIES
+            try:
+                response = self.s3_client.delete_objects(
+                    Bucket=bucket_name, Delete={'Objects': batch, 'Quiet': True}
+                )
+            except Exception as e:
+                if is_throttle_error(e) and not last_attempt:
+                    continue
+                errors.extend((entry['Key'], str(e)) for entry in batch)
+                return deleted, errors, deleted_bytes
+
+            failed = {}
+            retry = []
+            for error in response.get('Errors', []):
+                if error.get('Code') in THROTTLE_ERROR_CODES and not last_attempt:
+                    retry.append(delete_entry(error))
+                else:
+                    failed[(error['Key'], error.get('VersionId'))] = error.get('Message', error.get('Code', ''))
+            retried = {(entry['Key'], entry.get('VersionId')) for entry in retry}
+            for entry in batch:
+                identity = (entry['Key'], entry.get('VersionId'))
+                if identity in failed:
+                    errors.append((entry['Key'], failed[identity]))
+                elif identity not in retried:
+                    deleted.append(entry['Key'])
+                    deleted_bytes += sizes.get(identity, 0)
+            if not retry:
+                break
+            batch = retry
+        return deleted, errors, deleted_bytes
+
+
+def delete_keys(s3_client, bucket_name, items, max_workers=DEFAULT_DELETE_WORKERS,
+                progress_callback=None, cancel_event=None):
+    """Atajo de BatchDeleter(...).delete(bucket_name, items)"""
+    deleter = BatchDeleter(s3_client, max_workers=max_workers,
+                           progress_callback=progress_callback, cancel_event=cancel_event)
+    return deleter.delete(bucket_name, items)
+
+
+def iter_bucket_for_emptying(s3_client, bucket_name):
+    """
+    Todo lo que hay que borrar para poder eliminar el bucket: versiones y
+    marcadores de borrado si el versionado está o estuvo activado, o los
+    objetos actuales si nunca lo estuvo (así no hace falta el permiso
+    ListBucketVersions).
+    """
+    status = s3_client.get_bucket_versioning(Bucket=bucket_name).get('Status')
+    if status in ('Enabled', 'Suspended'):
+        return iter_object_versions(s3_client, bucket_name)
+    paginator = s3_client.get_paginator('list_objects_v2')
+    return (obj for page in paginator.paginate(Bucket=bucket_name)
+            for obj in page.get('Contents', []))
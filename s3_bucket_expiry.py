@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Vaciado de buckets muy grandes mediante reglas de ciclo de vida
+Autor: EDF Developer - 2025
+"""
+
+import threading
+
+from botocore.exceptions import ClientError
+
+# Identificadores de las reglas que instala el modo "caducar todo"
+EXPIRE_ALL_RULE_ID = 'S3Manager-caducar-todo'
+EXPIRE_MARKERS_RULE_ID = 'S3Manager-caducar-marcadores'
+EXPIRE_RULE_IDS = {EXPIRE_ALL_RULE_ID, EXPIRE_MARKERS_RULE_ID}
+
+# Segundos entre comprobaciones; S3 aplica el ciclo de vida una vez al día
+POLL_INTERVAL = 15 * 60
+
+# Páginas de list_object_versions (1000 entradas cada una) por estimación
+ESTIMATE_PAGES = 10
+
+
+def expire_all_rules():
+    """
+    Reglas que eliminan todo el contenido del bucket: caducan las versiones
+    actuales y las antiguas, abortan las subidas multiparte incompletas y,
+    en una regla aparte (S3 no admite ExpiredObjectDeleteMarker junto con
+    Days), eliminan los marcadores de borrado que quedan huérfanos.
+    """
+    return [
+        {
+            'ID': EXPIRE_ALL_RULE_ID,
+            'Filter': {'Prefix': ''},
+            'Status': 'Enabled',
+            'Expiration': {'Days': 1},
+            'NoncurrentVersionExpiration': {'NoncurrentDays': 1},
+            'AbortIncompleteMultipartUpload': {'DaysAfterInitiation': 1},
+        },
+        {
+            'ID': EXPIRE_MARKERS_RULE_ID,
+            'Filter': {'Prefix': ''},
+            'Status': 'Enabled',
+            'Expiration': {'ExpiredObjectDeleteMarker': True},
+        },
+    ]
+
+
+def get_lifecycle_rules(s3_client, bucket_name):
+    """Reglas de ciclo de vida actuales del bucket ([] si no tiene)"""
+    try:
+        response = s3_client.get_bucket_lifecycle_configuration(Bucket=bucket_name)
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') == 'NoSuchLifecycleConfiguration':
+            return []
+        raise
+    return response.get('Rules', [])
+
+
+def install_expire_all_rules(s3_client, bucket_name):
+    """
+    Añade las reglas de caducidad total a las que ya tuviera el bucket. Si
+    ya estaban instaladas (por un borrado anterior que se dejó esperando)
+    no se modifica nada.
+
+    Returns:
+        bool: True si se instalaron, False si ya estaban.
+    """
+    rules = get_lifecycle_rules(s3_client, bucket_name)
+    if EXPIRE_RULE_IDS <= {rule.get('ID') for rule in rules}:
+        return False
+    rules = [rule for rule in rules if rule.get('ID') not in EXPIRE_RULE_IDS]
+    s3_client.put_bucket_lifecycle_configuration(
+        Bucket=bucket_name,
+        LifecycleConfiguration={'Rules': rules + expire_all_rules()}
+    )
+    return True
+
+
+def remove_expire_all_rules(s3_client, bucket_name):
+    """Quita las reglas de caducidad total y deja las demás como estaban"""
+    rules = [rule for rule in get_lifecycle_rules(s3_client, bucket_name)
+             if rule.get('ID') not in EXPIRE_RULE_IDS]
+    if rules:
+        s3_client.put_bucket_lifecycle_configuration(
+            Bucket=bucket_name, LifecycleConfiguration={'Rules': rules}
+        )
+    else:
+        s3_client.delete_bucket_lifecycle(Bucket=bucket_name)
+
+
+def estimate_remaining(s3_client, bucket_name, max_pages=ESTIMATE_PAGES):
+    """
+    Cuenta versiones y marcadores de borrado leyendo como mucho max_pages
+    páginas. En buckets muy grandes el resultado es una cota inferior.
+
+    Returns:
+        tuple: (entradas contadas, True si quedaban más sin contar)
+    """
+    paginator = s3_client.get_paginator('list_object_versions')
+    count = 0
+    for pages, page in enumerate(paginator.paginate(Bucket=bucket_name), 1):
+        count += len(page.get('Versions', [])) + len(page.get('DeleteMarkers', []))
+        if page.get('IsTruncated') and pages >= max_pages:
+            return count, True
+    return count, False
+
+
+def format_estimate(count, truncated):
+    return f"más de {count}" if truncated else str(count)
+
+
+def expire_bucket_and_delete(s3_client, bucket_name, progress_callback=None, cancel_event=None,
+                             poll_interval=POLL_INTERVAL, max_pages=ESTIMATE_PAGES, stop_event=None):
+    """
+    Vacía un bucket dejando que S3 caduque su contenido y lo elimina al
+    quedar vacío. Pensado para buckets con cientos de millones de
+    versiones, en los que borrar desde el cliente no es práctico: S3 aplica
+    las reglas en uno o dos días sin coste de peticiones.
+
+    Cada poll_interval segundos se estima lo que queda con un listado
+    parcial y se intenta borrar el bucket cuando el listado sale vacío. Si
+    se cancela, se quitan las reglas instaladas y el bucket se conserva con
+    lo que aún no hubiera caducado.
+
+    Args:
+        progress_callback: Función opcional llamada tras cada estimación como
+            callback(restantes, cota_inferior, iniciales, iniciales_cota_inferior).
+        stop_event (threading.Event): Evento opcional para dejar de esperar
+            sin quitar las reglas (por ejemplo, al cerrar la aplicación); S3
+            sigue vaciando el bucket y otra llamada retoma la espera.
+
+    Returns:
+        tuple: (bool, str) éxito y mensaje de estado.
+    """
+    cancel_event = cancel_event or threading.Event()
+    stop_event = stop_event or threading.Event()
+    try:
+        if install_expire_all_rules(s3_client, bucket_name):
+            print(f"   - Reglas de caducidad instaladas en '{bucket_name}'.")
+        else:
+            print(f"   - '{bucket_name}' ya tenía las reglas de caducidad; esperando a que se vacíe.")
+
+        initial = None
+        while True:
+            remaining, truncated = estimate_remaining(s3_client, bucket_name, max_pages)
+            if initial is None:
+                initial = (remaining, truncated)
+            print(f"   - Quedan {format_estimate(remaining, truncated)} versiones y marcadores.")
+            if progress_callback:
+                progress_callback(remaining, truncated, *initial)
+
+            if not remaining:
+                try:
+                    s3_client.delete_bucket(Bucket=bucket_name)
+                    print(f"   ✓ Bucket '{bucket_name}' eliminado con éxito.")
+                    return True, (f"El bucket '{bucket_name}' y todo su contenido han sido eliminados "
+                                  f"(caducidad por ciclo de vida).")
+                except ClientError as e:
+                    # Quedan subidas multiparte o llegaron objetos nuevos
+                    if e.response.get('Error', {}).get('Code') != 'BucketNotEmpty':
+                        raise
+
+            if cancel_event.wait(poll_interval) or stop_event.is_set():
+                if stop_event.is_set():
+                    return False, (f"Se dejó de esperar a que caduque '{bucket_name}': las reglas siguen "
+                                   f"activas y quedan {format_estimate(remaining, truncated)} versiones. "
+                                   f"Vuelva a elegir Caducar Todo para eliminar el bucket cuando quede vacío.")
+                remove_expire_all_rules(s3_client, bucket_name)
+                return False, (f"Caducidad del bucket '{bucket_name}' cancelada: se quitaron las reglas "
+                               f"y quedan {format_estimate(remaining, truncated)} versiones.")
+
+    except ClientError as e:
+        error_code = e.response.get("Error", {}).get("Code")
+        error_message = e.response.get("Error", {}).get("Message")
+        print(f"   ✗ Error de cliente AWS al caducar el bucket: {error_code} - {error_message}")
+        return False, f"Error de AWS ({error_code}): {error_message}"
+    except Exception as e:
+        print(f"   ✗ Error inesperado al caducar el bucket: {str(e)}")
+        return False, f"Error inesperado: {str(e)}"
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Cálculo de sumas de verificación compatibles con los ETag de S3
+Autor: EDF Developer - 2025
+"""
+
+import base64
+import hashlib
+import threading
+import time
+import zlib
+
+try:
+    from awscrt import checksums as crt_checksums
+except ImportError:  # Dependencia opcional: solo necesaria para CRC32C
+    crt_checksums = None
+
+# Tamaño de lectura al calcular el hash de un archivo local
+HASH_READ_SIZE = 1024 * 1024
+
+# Cifrados con los que el ETag ya no es el MD5 del contenido
+NON_MD5_ENCRYPTION = ('aws:kms', 'aws:kms:dsse')
+
+
+class IntegrityError(Exception):
+    """El contenido descargado no coincide con el checksum del objeto"""
+
+
+class S3ETagHasher:
+    """
+    Calcula de forma incremental el ETag que S3 asigna a un objeto subido
+    sin cifrado KMS: el MD5 del contenido para subidas simples, o el MD5 de
+    la concatenación de los MD5 de cada parte seguido de '-N' para subidas
+    multiparte de N partes.
+    """
+
+    def __init__(self, part_size=None):
+        self.part_size = part_size
+        self._part_digests = []
+        self._current = hashlib.md5()
+        self._current_size = 0
+
+    def update(self, data):
+        if not self.part_size:
+            self._current.update(data)
+            return
+        view = memoryview(data)
+        while view:
+            room = self.part_size - self._current_size
+            chunk = view[:room]
+            self._current.update(chunk)
+            self._current_size += len(chunk)
+            view = view[len(chunk):]
+            if self._current_size == self.part_size:
+                self._part_digests.append(self._current.digest())
+                self._current = hashlib.md5()
+                self._current_size = 0
+
+    def hexdigest(self):
+        """ETag resultante, sin comillas"""
+        if not self.part_size:
+            return self._current.hexdigest()
+        digests = list(self._part_digests)
+        if self._current_size or not digests:
+            digests.append(self._current.digest())
+        combined = hashlib.md5(b''.join(digests)).hexdigest()
+        return f"{combined}-{len(digests)}"
+
+
+def normalize_etag(etag):
+    """Quita las comillas con las que S3 devuelve los ETag"""
+    return (etag or '').strip('"')
+
+
+def file_etag(path, part_size=None):
+    """ETag S3 de un archivo local (part_size=None para subida simple)"""
+    hasher = S3ETagHasher(part_size)
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(HASH_READ_SIZE)
+            if not chunk:
+                break
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def etag_is_comparable(remote_etag, part_count):
+    """
+    Indica si el ETag remoto puede compararse con uno calculado localmente
+    con part_count partes (0 = subida simple). Si el objeto se subió con
+    otro número de partes el MD5 no es comparable.
+    """
+    remote_etag = normalize_etag(remote_etag)
+    if '-' in remote_etag:
+        return part_count > 0 and remote_etag.rsplit('-', 1)[1] == str(part_count)
+    return part_count == 0 and len(remote_etag) == 32
+
+
+def is_multipart_etag(etag):
+    return '-' in normalize_etag(etag)
+
+
+def etag_is_content_md5(response):
+    """
+    True si el ETag de una respuesta GET/HEAD es el MD5 del contenido (o
+    de sus partes): no lo es con SSE-KMS ni con claves del cliente (SSE-C).
+    """
+    if response.get('SSECustomerAlgorithm'):
+        return False
+    return response.get('ServerSideEncryption') not in NON_MD5_ENCRYPTION
+
+
+class _Crc32Hasher:
+    """CRC32 o CRC32C incremental con la interfaz de hashlib"""
+
+    def __init__(self, function):
+        self._function = function
+        self._value = 0
+
+    def update(self, data):
+        self._value = self._function(data, self._value)
+
+    def digest(self):
+        return self._value.to_bytes(4, 'big')
+
+
+# Checksums adicionales de S3: campo de la respuesta -> fábrica del hash
+ADDITIONAL_CHECKSUMS = {
+    'ChecksumSHA256': lambda: hashlib.sha256(),
+    'ChecksumSHA1': lambda: hashlib.sha1(),
+    'ChecksumCRC32C': (lambda: _Crc32Hasher(crt_checksums.crc32c)) if crt_checksums else None,
+    'ChecksumCRC32': lambda: _Crc32Hasher(zlib.crc32),
+}
+
+
+class StreamVerifier:
+    """
+    Calcula el checksum de un objeto a medida que se escriben sus bytes, en
+    el mismo hilo que los escribe, y acumula el tiempo dedicado a ello.
+
+    Para 'ETag' se usa S3ETagHasher (MD5 simple o fórmula multiparte); para
+    los checksums adicionales (ChecksumSHA256, ChecksumCRC32C...) el valor
+    esperado está en base64.
+    """
+
+    def __init__(self, algorithm, expected, part_size=None):
+        self.algorithm = algorithm
+        self.expected = expected
+        if algorithm == 'ETag':
+            self._hasher = S3ETagHasher(part_size)
+        else:
+            self._hasher = ADDITIONAL_CHECKSUMS[algorithm]()
+        self.seconds = 0.0
+        self.bytes = 0
+
+    def update(self, data):
+        start = time.perf_counter()
+        self._hasher.update(data)
+        self.seconds += time.perf_counter() - start
+        self.bytes += len(data)
+
+    def actual(self):
+        if self.algorithm == 'ETag':
+            return self._hasher.hexdigest()
+        return base64.b64encode(self._hasher.digest()).decode('ascii')
+
+    def verify(self, key):
+        """Lanza IntegrityError si el checksum calculado no coincide"""
+        expected = normalize_etag(self.expected) if self.algorithm == 'ETag' else self.expected
+        actual = self.actual()
+        if actual != expected:
+            raise IntegrityError(
+                f"El {self.algorithm} de {key} no coincide: esperado {expected}, obtenido {actual}"
+            )
+
+
+class PartDigestVerifier:
+    """
+    Verifica un ETag multiparte a partir de rangos alineados con las partes
+    originales, que pueden descargarse en paralelo y en cualquier orden.
+    """
+
+    def __init__(self, expected, part_size):
+        self.algorithm = 'ETag'
+        self.expected = expected
+        self.part_size = part_size
+        self.seconds = 0.0
+        self.bytes = 0
+        self._lock = threading.Lock()
+        self._digests = {}  # Inicio del rango -> MD5 de la parte
+
+    def part_hasher(self):
+        return hashlib.md5()
+
+    def update_part(self, hasher, data):
+        start = time.perf_counter()
+        hasher.update(data)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.seconds += elapsed
+            self.bytes += len(data)
+
+    def add_part(self, range_start, hasher):
+        with self._lock:
+            self._digests[range_start] = hasher.digest()
+
+    def actual(self):
+        digests = [self._digests[start] for start in sorted(self._digests)]
+        return f"{hashlib.md5(b''.join(digests)).hexdigest()}-{len(digests)}"
+
+    verify = StreamVerifier.verify
+
+
+def verifier_for_response(response, part_size=None):
+    """
+    Elige cómo verificar un objeto a partir de la respuesta de get_object
+    (con ChecksumMode='ENABLED'): primero un checksum adicional de objeto
+    completo, después el ETag si es un MD5 del contenido. Para un ETag
+    multiparte hace falta part_size (tamaño de la parte 1).
+
+    Returns:
+        StreamVerifier o None si el objeto no se puede verificar.
+    """
+    for field, factory in ADDITIONAL_CHECKSUMS.items():
+        value = response.get(field)
+        # Los checksums compuestos de subidas multiparte terminan en '-N'
+        if value and factory and '-' not in value:
+            return StreamVerifier(field, value)
+
+    etag = response.get('ETag')
+    if not etag or not etag_is_content_md5(response):
+        return None
+    if is_multipart_etag(etag):
+        return StreamVerifier('ETag', etag, part_size) if part_size else None
+    return StreamVerifier('ETag', etag)
+
+
+class VerificationStats:
+    """Resumen thread-safe de la verificación de un trabajo"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.verified = []      # Claves verificadas correctamente
+        self.unverifiable = []  # Claves sin checksum utilizable
+        self.mismatched = []    # Claves cuyo checksum no coincidía
+        self.seconds = 0.0      # Tiempo de CPU dedicado a calcular checksums
+        self.bytes = 0
+
+    def record(self, key, verifier, ok=True):
+        with self._lock:
+            if verifier is None:
+                self.unverifiable.append(key)
+                return
+            self.seconds += verifier.seconds
+            self.bytes += verifier.bytes
+            (self.verified if ok else self.mismatched).append(key)
+
+    @property
+    def throughput(self):
+        """Bytes por segundo de cálculo de checksums"""
+        return self.bytes / self.seconds if self.seconds else 0.0
+
+    def summary(self):
+        message = f"{len(self.verified)} verificados"
+        if self.mismatched:
+            message += f", {len(self.mismatched)} con checksum incorrecto"
+        if self.unverifiable:
+            message += f", {len(self.unverifiable)} sin checksum verificable"
+        return message + f" ({self.seconds:.2f} s de cálculo)"
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Clientes S3 compartidos con el pool de conexiones dimensionado para las transferencias
+Autor: EDF Developer - 2025
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError
+
+from s3_transfer_engine import MAX_WORKERS_LIMIT, clamp_workers
+
+# Conexiones por cliente que usa botocore si no se indica otra cosa
+DEFAULT_POOL_CONNECTIONS = 10
+
+
+def pool_size_for(settings, max_workers=None):
+    """
+    Conexiones necesarias para que ningún hilo espere por una conexión
+    libre: una por objeto en paralelo más los hilos de un objeto grande.
+    """
+    workers = MAX_WORKERS_LIMIT if settings.adaptive_concurrency else clamp_workers(
+        settings.max_workers if max_workers is None else max_workers)
+    return max(DEFAULT_POOL_CONNECTIONS, workers + settings.effective_concurrency)
+
+
+def bucket_region(s3_client, bucket_name):
+    """
+    Región del bucket según get_bucket_location. S3 devuelve None para
+    us-east-1 y 'EU' para los buckets antiguos de eu-west-1.
+    """
+    location = s3_client.get_bucket_location(Bucket=bucket_name).get('LocationConstraint')
+    return {None: 'us-east-1', '': 'us-east-1', 'EU': 'eu-west-1'}.get(location, location)
+
+
+def client_config(max_pool_connections):
+    """Config de botocore con el tamaño de pool indicado"""
+    return Config(max_pool_connections=max_pool_connections)
+
+
+class S3ClientPool:
+    """
+    Reutiliza un cliente S3 por región y credenciales entre trabajos, para
+    que las conexiones HTTPS ya abiertas (TLS incluido) sirvan al siguiente
+    trabajo. Si un trabajo necesita más conexiones de las que tiene el
+    cliente guardado, se sustituye por uno con un pool mayor.
+
+    Las credenciales de la clave son las que resuelve boto3 (variables de
+    entorno, perfil, rol...), no solo las variables de entorno; aun así hay
+    que llamar a clear() al guardar credenciales nuevas.
+    """
+
+    _lock = threading.Lock()
+    _clients = {}  # (región, perfil, origen, access key) -> (cliente, conexiones)
+    _warmed = set()  # (id del cliente, bucket)
+    _regions = {}  # bucket -> región (None si no se pudo consultar)
+
+    @classmethod
+    def _cache_key(cls, session, region_name):
+        credentials = session.get_credentials()
+        if credentials is None:
+            return (region_name, session.profile_name, None, None)
+        return (region_name, session.profile_name, credentials.method, credentials.access_key)
+
+    @classmethod
+    def get_client(cls, max_pool_connections=DEFAULT_POOL_CONNECTIONS, region_name=None):
+        """Devuelve el cliente compartido con al menos max_pool_connections conexiones"""
+        session = boto3.Session()
+        key = cls._cache_key(session, region_name)
+        with cls._lock:
+            cached = cls._clients.get(key)
+            if cached and cached[1] >= max_pool_connections:
+                return cached[0]
+            client = session.client('s3', region_name=region_name,
+                                    config=client_config(max_pool_connections))
+            cls._clients[key] = (client, max_pool_connections)
+            return client
+
+    @classmethod
+    def get_bucket_client(cls, s3_client, bucket_name, max_pool_connections=DEFAULT_POOL_CONNECTIONS):
+        """
+        Cliente compartido en la región del bucket, para que las peticiones
+        no pasen por una redirección de región. La región se consulta con
+        s3_client una vez por bucket; si no hay permiso para consultarla se
+        usa la región por defecto.
+        """
+        with cls._lock:
+            known = bucket_name in cls._regions
+            region = cls._regions.get(bucket_name)
+        if not known:
+            try:
+                region = bucket_region(s3_client, bucket_name)
+            except (ClientError, BotoCoreError):
+                region = None
+            with cls._lock:
+                cls._regions[bucket_name] = region
+        return cls.get_client(max_pool_connections, region_name=region)
+
+    @classmethod
+    def warm_up(cls, s3_client, bucket_name, connections):
+        """
+        Abre connections conexiones al bucket con peticiones head_bucket
+        simultáneas, de modo que las primeras descargas no paguen el
+        establecimiento de la conexión. Solo se hace una vez por cliente y
+        bucket; los errores se ignoran porque la conexión queda abierta igual.
+
+        Returns:
+            bool: True si se calentó el pool, False si ya lo estaba.
+        """
+        marker = (id(s3_client), bucket_name)
+        with cls._lock:
+            if marker in cls._warmed:
+                return False
+            cls._warmed.add(marker)
+
+        def ping(_):
+            try:
+                s3_client.head_bucket(Bucket=bucket_name)
+            except Exception:
+                pass
+
+        with ThreadPoolExecutor(max_workers=connections) as executor:
+            list(executor.map(ping, range(connections)))
+        return True
+
+    @classmethod
+    def clear(cls):
+        """Olvida los clientes guardados (por ejemplo, al cambiar de credenciales)"""
+        with cls._lock:
+            cls._clients.clear()
+            cls._warmed.clear()
+            cls._regions.clear()
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Copia y movimiento de objetos en el lado del servidor, entre buckets y regiones
+Autor: EDF Developer - 2025
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from diagnose_s3_permissions import iter_bucket_contents
+from s3_batch_delete import DELETE_BATCH_SIZE
+from s3_client_pool import DEFAULT_POOL_CONNECTIONS, S3ClientPool, bucket_region
+from s3_sync import delete_remote_keys, normalize_prefix
+from s3_transfer_engine import TransferEngine, TransferProgress, TransferResult, split_ranges, upload_part_size
+
+# Tamaño máximo que admite una única petición copy_object
+COPY_OBJECT_LIMIT = 5 * 1024 ** 3
+
+# Cabeceras que copy_object conserva por sí solo y que una copia multiparte
+# debe repetir al crear la subida
+COPIED_HEADERS = (
+    'ContentType', 'CacheControl', 'ContentDisposition', 'ContentEncoding',
+    'ContentLanguage', 'Metadata', 'StorageClass',
+)
+
+
+def copy_destination_key(key, dest_prefix='', strip_prefix=''):
+    """Clave de destino: dest_prefix + la clave sin strip_prefix"""
+    if strip_prefix and key.startswith(strip_prefix):
+        key = key[len(strip_prefix):]
+    return normalize_prefix(dest_prefix) + key.lstrip('/')
+
+
+def copy_part_size(size, settings):
+    """
+    Tamaño de parte para copiar un objeto con UploadPartCopy, o None si se
+    copia con una única petición copy_object. Por encima de 5 GB las partes
+    son obligatorias; desde el umbral multiparte se usan para copiar en
+    paralelo.
+    """
+    if size > COPY_OBJECT_LIMIT or (
+            size >= settings.multipart_threshold and size > settings.multipart_chunksize):
+        return upload_part_size(size, settings.multipart_chunksize)
+    return None
+
+
+def client_for_bucket(s3_client, bucket_name, max_pool_connections=DEFAULT_POOL_CONNECTIONS):
+    """
+    Devuelve un cliente en la región del bucket. Las copias se envían a la
+    región de destino; si coincide con la del cliente se reutiliza y si no
+    se toma el cliente compartido de esa región.
+    """
+    region = bucket_region(s3_client, bucket_name)
+    if region == s3_client.meta.region_name:
+        return s3_client
+    return S3ClientPool.get_client(max_pool_connections, region_name=region)
+
+
+class CopyResult(TransferResult):
+    """Resultado de una copia o un movimiento de objetos"""
+
+    def __init__(self):
+        super().__init__()
+        self.moved = []  # Claves de origen eliminadas tras copiarse
+        self.delete_errors = []  # Tuplas (clave, mensaje de error)
+
+    @property
+    def success(self):
+        return super().success and not self.delete_errors
+
+    def summary(self):
+        message = f"{len(self.succeeded)} objeto(s) copiados"
+        if self.moved:
+            message += f", {len(self.moved)} eliminados del origen"
+        if self.failed:
+            message += f", {len(self.failed)} con errores"
+        if self.delete_errors:
+            message += f", {len(self.delete_errors)} no se pudieron eliminar del origen"
+        if self.abort_errors:
+            message += f", {len(self.abort_errors)} copias multiparte sin abortar"
+        if self.cancelled:
+            message += " (operación cancelada)"
+        return message
+
+
+class CopyEngine(TransferEngine):
+    """
+    Copia objetos sin pasar sus datos por el equipo local: S3 lee el origen
+    y escribe el destino. Los objetos pequeños se copian con copy_object y
+    los grandes con UploadPartCopy en partes paralelas.
+
+    Como los bytes no atraviesan la conexión local, los límites de ancho de
+    banda no se aplican; el progreso se cuenta en bytes copiados.
+
+    Acepta los mismos argumentos que TransferEngine y además:
+
+        dest_client: Cliente para el bucket de destino, si está en otra región
+            (por defecto s3_client). El origen se lee y elimina con s3_client.
+    """
+
+    def __init__(self, s3_client, max_workers=None, progress_callback=None,
+                 cancel_event=None, settings=None, bandwidth=None, dest_client=None, job=None):
+        super().__init__(s3_client, max_workers, progress_callback, cancel_event, settings,
+                         bandwidth, job)
+        self.dest_client = dest_client or s3_client
+
+    def copy(self, source_bucket, objects, dest_bucket, dest_prefix='', strip_prefix='',
+             move=False):
+        """
+        Copia los objetos a dest_bucket bajo dest_prefix. Con move=True cada
+        objeto se elimina del origen solo después de confirmarse su copia:
+        los confirmados se eliminan en lotes de DELETE_BATCH_SIZE mientras la
+        copia sigue, así que si se interrumpe solo queda sin eliminar el
+        último lote (cuyas copias ya existen).
+
+        Returns:
+            CopyResult: claves copiadas, fallidas, movidas y si se canceló.
+
+        Raises:
+            ValueError: Si algún objeto se copiaría sobre sí mismo.
+        """
+        items = []
+        for obj in objects:
+            item = dict(obj, DestKey=copy_destination_key(obj['Key'], dest_prefix, strip_prefix))
+            if source_bucket == dest_bucket and item['DestKey'] == obj['Key']:
+                raise ValueError(f"El origen y el destino coinciden: {obj['Key']}")
+            items.append(item)
+
+        result = CopyResult()
+        self.progress = TransferProgress(items)
+        confirmed = []
+
+        def delete_confirmed():
+            deleted, errors = delete_remote_keys(self.s3_client, source_bucket, confirmed)
+            result.moved.extend(deleted)
+            result.delete_errors.extend(errors)
+            confirmed.clear()
+
+        def on_success(item):
+            confirmed.append(item['Key'])
+            if len(confirmed) >= DELETE_BATCH_SIZE:
+                delete_confirmed()
+
+        self._run_parallel(
+            items, lambda item: self._copy_one(source_bucket, dest_bucket, item), result,
+            on_success if move else None)
+
+        if confirmed:
+            delete_confirmed()
+        return result
+
+    def _copy_one(self, source_bucket, dest_bucket, item):
+        """Copia un único objeto; se ejecuta en un hilo del pool"""
+        if self.cancel_event.is_set():
+            raise RuntimeError("Copia cancelada")
+        key = item['Key']
+        part_size = copy_part_size(item.get('Size', 0), self.settings)
+        if part_size:
+            item['CopiedETag'] = self._copy_multipart(source_bucket, dest_bucket, item, part_size)
+            return
+
+        extra_args = {'CopySourceIfMatch': item['ETag']} if item.get('ETag') else {}
+        response = self.dest_client.copy_object(
+            Bucket=dest_bucket, Key=item['DestKey'],
+            CopySource={'Bucket': source_bucket, 'Key': key}, **extra_args
+        )
+        item['CopiedETag'] = response.get('CopyObjectResult', {}).get('ETag')
+        self.progress.add_bytes(key, item.get('Size', 0))
+        self._notify(key, False)
+
+    def _copy_multipart(self, source_bucket, dest_bucket, item, part_size):
+        """Copia un objeto grande con UploadPartCopy en paralelo y devuelve su ETag"""
+        key = item['Key']
+        dest_key = item['DestKey']
+        ranges = split_ranges(item['Size'], part_size)
+        failed = threading.Event()
+        source = {'Bucket': source_bucket, 'Key': key}
+        # CopySourceIfMatch garantiza que todas las partes vienen de la misma versión
+        extra_args = {'CopySourceIfMatch': item['ETag']} if item.get('ETag') else {}
+
+        head = self.s3_client.head_object(Bucket=source_bucket, Key=key)
+        headers = {name: head[name] for name in COPIED_HEADERS if head.get(name)}
+        upload_id = self.dest_client.create_multipart_upload(
+            Bucket=dest_bucket, Key=dest_key, **headers)['UploadId']
+
+        def copy_part(numbered_range):
+            part_number, (start, end) = numbered_range
+            if failed.is_set() or self.cancel_event.is_set():
+                raise RuntimeError("Copia cancelada")
+            try:
+                response = self.dest_client.upload_part_copy(
+                    Bucket=dest_bucket, Key=dest_key, UploadId=upload_id,
+                    PartNumber=part_number, CopySource=source,
+                    CopySourceRange=f"bytes={start}-{end}", **extra_args
+                )
+            except Exception:
+                failed.set()
+                raise
+            self.progress.add_bytes(key, end - start + 1)
+            self._notify(key, False)
+            return {'PartNumber': part_number, 'ETag': response['CopyPartResult']['ETag']}
+
+        try:
+            workers = min(self.settings.effective_concurrency, len(ranges))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                parts = list(executor.map(copy_part, enumerate(ranges, 1)))
+            response = self.dest_client.complete_multipart_upload(
+                Bucket=dest_bucket, Key=dest_key, UploadId=upload_id,
+                MultipartUpload={'Parts': parts}
+            )
+            return response.get('ETag')
+        except BaseException:
+            self._abort_multipart(self.dest_client, dest_bucket, dest_key, upload_id)
+            raise
+
+
+class PrefixRenameEngine(CopyEngine):
+    """
+    Renombra un prefijo dentro de un bucket. S3 no tiene renombrado: cada
+    objeto se copia en el servidor a la nueva clave y el original se
+    elimina después de confirmarse la copia.
+
+    El listado del prefijo se consume en lotes de DELETE_BATCH_SIZE objetos
+    sin cargarlo entero en memoria: cada lote se copia en paralelo y sus
+    originales se eliminan con una única petición DeleteObjects.
+
+    Con un diario (TransferJournal) cada copia confirmada queda registrada
+    antes de eliminar el original. Si el trabajo se interrumpe, al repetirlo
+    con los mismos prefijos el listado solo devuelve los objetos que siguen
+    en el origen, y los que ya se habían copiado con el mismo ETag se
+    eliminan sin volver a copiarse.
+    """
+
+    def rename(self, bucket_name, source_prefix, dest_prefix, journal=None):
+        """
+        Mueve todos los objetos de source_prefix a dest_prefix.
+
+        Returns:
+            CopyResult: claves copiadas (succeeded), eliminadas del origen
+            (moved), reanudadas del diario, fallidas y si se canceló.
+
+        Raises:
+            ValueError: Si falta el prefijo de origen o un prefijo contiene al otro.
+        """
+        source_prefix = normalize_prefix(source_prefix)
+        dest_prefix = normalize_prefix(dest_prefix)
+        if not source_prefix:
+            raise ValueError("Hay que indicar el prefijo de origen")
+        if source_prefix.startswith(dest_prefix) or dest_prefix.startswith(source_prefix):
+            raise ValueError(
+                f"Los prefijos '{source_prefix}' y '{dest_prefix}' no pueden contenerse uno a otro")
+
+        result = CopyResult()
+        self.progress = TransferProgress([])
+        job_id = journal.start_job('rename', bucket_name, source_prefix, dest_prefix) if journal else None
+
+        listing = iter_bucket_contents(self.s3_client, bucket_name, source_prefix)
+        while not self.cancel_event.is_set():
+            batch = list(islice(listing, DELETE_BATCH_SIZE))
+            if not batch:
+                break
+            self.progress.add_objects(batch)
+            self._rename_batch(bucket_name, batch, source_prefix, dest_prefix,
+                               journal, job_id, result)
+
+        result.cancelled = self.cancel_event.is_set()
+        if journal and result.success:
+            journal.finish_job(job_id)
+        return result
+
+    def _rename_batch(self, bucket_name, batch, source_prefix, dest_prefix, journal, job_id,
+                      result):
+        """Copia un lote en paralelo y elimina los originales confirmados"""
+        confirmed = []
+        pending = []
+        for obj in batch:
+            if journal and journal.is_object_done(job_id, obj['Key'], obj.get('ETag')):
+                # Copiado en una ejecución anterior que no llegó a eliminarlo
+                self.progress.add_bytes(obj['Key'], obj.get('Size', 0))
+                self.progress.mark_done(obj['Key'], True)
+                result.succeeded.append(obj['Key'])
+                result.resumed.append(obj['Key'])
+                confirmed.append(obj['Key'])
+            else:
+                pending.append(dict(
+                    obj, DestKey=copy_destination_key(obj['Key'], dest_prefix, source_prefix)))
+
+        def on_success(item):
+            if journal:
+                journal.mark_object_done(job_id, item['Key'], item.get('ETag'), item.get('Size'))
+            confirmed.append(item['Key'])
+
+        self._run_parallel(
+            pending, lambda item: self._copy_one(bucket_name, bucket_name, item), result,
+            on_success
+        )
+        if confirmed:
+            deleted, errors = delete_remote_keys(self.s3_client, bucket_name, confirmed)
+            result.moved.extend(deleted)
+            result.delete_errors.extend(errors)
+            self._notify(None, False)
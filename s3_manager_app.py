@@ -9,6 +9,7 @@ import sys
 import os
 import threading
 import tempfile
+import time
 from datetime import datetime
 from pathlib import Path
 
@@ -17,7 +18,8 @@ from PySide6.QtWidgets import (
     QHBoxLayout, QLabel, QPushButton, QListWidget, QListWidgetItem,
     QTextEdit, QProgressBar, QComboBox, QCheckBox, QFileDialog,
     QMessageBox, QSplitter, QGroupBox, QTableWidget, QTableWidgetItem,
-    QHeaderView, QStatusBar, QMenuBar, QToolBar, QLineEdit, QDialog, QInputDialog, QDialogButtonBox
+    QHeaderView, QStatusBar, QMenuBar, QToolBar, QLineEdit, QDialog, QInputDialog, QDialogButtonBox,
+    QSpinBox
 )
 from PySide6.QtCore import Qt, QThread, Signal as pyqtSignal, QTimer, QSize
 from PySide6.QtGui import QIcon, QFont, QPixmap, QAction
@@ -27,7 +29,7 @@ from botocore.exceptions import ClientError, NoCredentialsError
 
 # Importar funciones del script original
 from diagnose_s3_permissions import (
-    check_aws_credentials, test_s3_connection, list_bucket_contents,
+    check_aws_credentials, test_s3_connection, iter_folder_pages,
     check_bucket_permissions, check_bucket_configuration,
     download_selected_files, delete_selected_files, delete_bucket_and_contents,
     create_s3_bucket
@@ -36,6 +38,47 @@ from diagnose_s3_permissions import (
 # Importar gestor de credenciales
 from aws_credentials_manager import AWSCredentialsManager
 
+# Importar motor de transferencias concurrentes y su configuración
+from s3_transfer_engine import MAX_WORKERS_LIMIT, DownloadEngine, ProgressReporter, UploadEngine, collect_upload_items
+from transfer_settings_manager import TransferSettings, TransferSettingsManager
+from transfer_journal import TransferJournal
+from listing_cache import ListingCache, entry_sort_key, format_age
+from listing_store import ListingStore
+from sharded_listing import ShardedLister
+from transfer_queue import TransferQueue
+from bandwidth_limiter import GLOBAL_BANDWIDTH, TokenBucket
+from s3_archive import ArchiveEngine, archive_format_for_path
+from s3_copy import CopyEngine, PrefixRenameEngine, client_for_bucket
+from s3_batch_delete import delete_keys
+from s3_bucket_expiry import expire_bucket_and_delete, format_estimate
+from s3_client_pool import S3ClientPool, pool_size_for
+from s3_sync import mirror_prefix_to_folder, normalize_prefix, push_folder_to_prefix
+
+# Operaciones que se ejecutan en la cola de transferencias, a la vez que otras
+QUEUED_OPERATIONS = {'download_files', 'upload_files', 'copy_objects'}
+
+# Operaciones que pueden durar días y van en su propio worker, sin ocupar el principal
+BACKGROUND_OPERATIONS = {'expire_bucket'}
+
+# Antigüedad (s) a partir de la cual se revisan en segundo plano las carpetas guardadas
+LISTING_REFRESH_AGE = 5 * 60
+
+# Carpetas guardadas que se revisan como mucho tras cada listado
+MAX_BACKGROUND_LEVELS = 50
+
+# Operaciones que pueden detenerse con el botón Cancelar de la barra de estado
+CANCELLABLE_OPERATIONS = {'list_files', 'delete_files', 'delete_bucket'}
+
+
+def queue_workers_for(settings):
+    """
+    Hilos de la cola de transferencias: los archivos en paralelo de la
+    configuración o, con concurrencia adaptativa, el máximo que puede
+    alcanzar el controlador AIMD de cada trabajo.
+    """
+    return MAX_WORKERS_LIMIT if settings.adaptive_concurrency else settings.max_workers
+
+
 class S3Worker(QThread):
     """Worker thread para operaciones S3 que no bloqueen la UI"""
     
@@ -44,7 +87,13 @@ class S3Worker(QThread):
     operation_completed = pyqtSignal(bool, str)
     bucket_list_ready = pyqtSignal(list)
     file_list_ready = pyqtSignal(list)
+    # Página de un listado en curso; se añade a lo recibido desde file_list_ready
+    file_page_ready = pyqtSignal(list)
+    # Momento (epoch) del listado mostrado, 0 si aún no hay ninguno, y si se está actualizando
+    listing_age = pyqtSignal(float, bool)
     log_message = pyqtSignal(str, str)  # mensaje, tipo (info, warning, error)
+    # Progreso de transferencias: limitado a 10 Hz y sin pasar por el log
+    transfer_progress = pyqtSignal(int, str)
     
     def __init__(self):
         super().__init__()
@@ -54,17 +103,73 @@ class S3Worker(QThread):
         self.local_path = None
         self.s3_client = None
         self.region = None
+        self.max_workers = None
+        self.transfer_settings = None
+        self.local_paths = []
+        self.prefix = ''
+        self.delete_extras = False
+        self.dest_bucket = None
+        self.move = False
+        self.new_prefix = ''
+        self.flat_listing = False
+        self.queue_job = None
+        self.cancel_event = threading.Event()
+        self.stop_event = threading.Event()
+        self.job_bandwidth = TokenBucket()
+        self._concurrency = None
+        self._reported_limit = None
+        self._client_stale = False
+        
+    def reset_client(self):
+        """
+        Descarta el cliente S3 (por ejemplo, al cambiar de credenciales). Si
+        hay una operación en curso la termina con el cliente actual y se
+        crea uno nuevo en la siguiente.
+        """
+        self._client_stale = True
         
     def set_operation(self, operation, **kwargs):
         """Configura la operación a realizar"""
+        if self._client_stale:
+            self.s3_client = None
+            self._client_stale = False
         self.operation = operation
         self.bucket_name = kwargs.get('bucket_name')
         self.selected_files = kwargs.get('selected_files', [])
         self.local_path = kwargs.get('local_path')
         self.region = kwargs.get('region')
+        self.max_workers = kwargs.get('max_workers')
+        self.transfer_settings = kwargs.get('transfer_settings')
+        self.local_paths = kwargs.get('local_paths', [])
+        self.prefix = kwargs.get('prefix', '')
+        self.delete_extras = kwargs.get('delete_extras', False)
+        self.dest_bucket = kwargs.get('dest_bucket')
+        self.move = kwargs.get('move', False)
+        self.new_prefix = kwargs.get('new_prefix', '')
+        self.flat_listing = kwargs.get('flat_listing', False)
+        self.queue_job = kwargs.get('queue_job')
+        self.cancel_event = threading.Event()
+        self.stop_event = threading.Event()
+        # Límite propio de este trabajo; puede cambiarse mientras se ejecuta
+        self.job_bandwidth = TokenBucket()
+        self.job_bandwidth.set_rate_mb(kwargs.get('bandwidth_limit_mb', 0))
+        
+    def cancel(self):
+        """Pide a la operación en curso que se detenga cuanto antes"""
+        self.cancel_event.set()
+    
+    def stop_waiting(self):
+        """
+        Detiene una caducidad de bucket sin deshacerla (las reglas siguen
+        instaladas), por ejemplo al cerrar la aplicación.
+        """
+        self.stop_event.set()
+        self.cancel_event.set()
         
     def run(self):
         """Ejecuta la operación en el hilo separado"""
+        self._concurrency = None
+        self._reported_limit = None
         try:
             if self.operation == 'list_buckets':
                 self._list_buckets()
@@ -72,18 +177,92 @@ class S3Worker(QThread):
                 self._list_files()
             elif self.operation == 'download_files':
                 self._download_files()
+            elif self.operation == 'upload_files':
+                self._upload_files()
+            elif self.operation == 'export_archive':
+                self._export_archive()
+            elif self.operation == 'copy_objects':
+                self._copy_objects()
+            elif self.operation == 'rename_prefix':
+                self._rename_prefix()
+            elif self.operation == 'mirror_prefix':
+                self._mirror_prefix()
+            elif self.operation == 'push_folder':
+                self._push_folder()
             elif self.operation == 'delete_files':
                 self._delete_files()
             elif self.operation == 'check_permissions':
                 self._check_permissions()
             elif self.operation == 'delete_bucket':
                 self._delete_bucket()
+            elif self.operation == 'expire_bucket':
+                self._expire_bucket()
             elif self.operation == 'create_bucket':
                 self._create_bucket()
                 
         except Exception as e:
             self.log_message.emit(f"Error en operación: {str(e)}", "error")
             self.operation_completed.emit(False, str(e))
+        finally:
+            self._log_concurrency_curve()
+    
+    def _progress_reporter(self, label):
+        """
+        Callback de progreso para los motores: notifica bytes, throughput y
+        ETA como mucho 10 veces por segundo y anota los cambios de la
+        concurrencia adaptativa.
+        """
+        reporter = ProgressReporter(self.transfer_progress.emit, label)
+        
+        def on_progress(progress, key, finished):
+            self._report_concurrency(progress)
+            reporter(progress, key, finished)
+        
+        return on_progress
+    
+    def _transfer_client(self, settings):
+        """
+        Cliente compartido, en la región del bucket, con una conexión por
+        hilo de la transferencia. La primera vez que se usa con un bucket se
+        abren las conexiones por adelantado para que los objetos pequeños no
+        esperen al handshake.
+        """
+        if not self.s3_client:
+            self.s3_client = boto3.client('s3')
+        connections = pool_size_for(settings, self.max_workers)
+        client = S3ClientPool.get_bucket_client(self.s3_client, self.bucket_name, connections)
+        if S3ClientPool.warm_up(client, self.bucket_name, connections):
+            self.log_message.emit(
+                f"Abiertas {connections} conexiones con {self.bucket_name}", "info")
+        return client
+    
+    def _report_concurrency(self, progress):
+        """Anota en el log cada cambio de la concurrencia adaptativa"""
+        controller = progress.concurrency
+        if controller is None or controller.limit == self._reported_limit:
+            return
+        previous, self._reported_limit = self._reported_limit, controller.limit
+        self._concurrency = controller
+        if previous is None:
+            self.log_message.emit(
+                f"Concurrencia adaptativa: {controller.limit} transferencias simultáneas", "info")
+        else:
+            self.log_message.emit(
+                f"Concurrencia {previous} → {controller.limit} "
+                f"({controller.throughput / (1024 * 1024):.2f} MB/s)", "info"
+            )
+    
+    def _log_concurrency_curve(self):
+        """Muestra en el log la evolución de la concurrencia y el throughput"""
+        controller = self._concurrency
+        if controller is None or not controller.samples:
+            return
+        limits, throughput = controller.curve()
+        peak = max(sample[2] for sample in controller.samples) / (1024 * 1024)
+        self.log_message.emit(
+            f"Concurrencia ({min(s[1] for s in controller.samples)}-"
+            f"{max(s[1] for s in controller.samples)}): {limits}", "info")
+        self.log_message.emit(f"Throughput (máx. {peak:.2f} MB/s): {throughput}", "info")
     
     def _list_buckets(self):
         """Lista todos los buckets disponibles"""
@@ -98,62 +277,503 @@ class S3Worker(QThread):
             self.operation_completed.emit(False, str(e))
     
     def _list_files(self):
-        """Lista archivos en un bucket específico"""
+        """
+        Lista archivos en un bucket específico.
+        
+        Por defecto se lista solo el nivel de self.prefix, con sus
+        subcarpetas como entradas {'Prefix': ...}. Si la carpeta está en la
+        caché de listados se muestra al instante y se vuelve a listar en
+        segundo plano; la tabla solo se redibuja si el contenido cambió.
+        Sin caché, la tabla se vacía y recibe cada página según llega.
+        Después se revisan otras carpetas guardadas del bucket que lleven
+        tiempo sin listarse.
+        
+        Con flat_listing se listan todos los objetos que hay debajo del
+        prefijo, sin usar la caché y repartidos en rangos de claves que se
+        listan en paralelo.
+        """
         try:
             if not self.s3_client:
                 self.s3_client = boto3.client('s3')
             
-            objects = list_bucket_contents(self.s3_client, self.bucket_name)
-            self.file_list_ready.emit(objects)
-            self.log_message.emit(f"Se encontraron {len(objects)} archivos en {self.bucket_name}", "info")
+            location = f"{self.bucket_name}/{self.prefix}"
+            if self.flat_listing:
+                self.file_list_ready.emit([])
+                self.listing_age.emit(0.0, True)
+                lister = ShardedLister(self.s3_client, cancel_event=self.cancel_event)
+                pages = (([], [obj for obj in objects if obj['Key'] != self.prefix])
+                         for objects in lister.iter_pages(self.bucket_name, self.prefix))
+                # La vista plana no se guarda en la caché: basta con enviar las páginas
+                total = self._collect_listing(pages, location, stream=True, keep=False)
+                self.listing_age.emit(0.0 if total is None else time.time(), False)
+                return
+            
+            cache = ListingCache.open_default()
+            try:
+                cached, listed_at = cache.get_level(self.bucket_name, self.prefix)
+                if cached is not None:
+                    self.file_list_ready.emit(cached)
+                    self.listing_age.emit(listed_at, True)
+                else:
+                    self.file_list_ready.emit([])
+                    self.listing_age.emit(0.0, True)
+                
+                pages = iter_folder_pages(self.s3_client, self.bucket_name, self.prefix,
+                                          cancel_event=self.cancel_event)
+                entries = self._collect_listing(pages, location, stream=cached is None)
+                if entries is None:
+                    self.listing_age.emit(listed_at or 0.0, False)
+                    return
+                listed_at = time.time()
+                if cache.store_level(self.bucket_name, self.prefix, entries, listed_at) and cached is not None:
+                    self.file_list_ready.emit(sorted(entries, key=entry_sort_key))
+                    self.log_message.emit(f"El contenido de {location} cambió desde el último listado", "info")
+                self.listing_age.emit(listed_at, False)
+                
+                self._refresh_cached_levels(cache)
+            finally:
+                cache.close()
             
         except Exception as e:
             self.operation_completed.emit(False, str(e))
     
+    def _collect_listing(self, pages, location, stream, keep=True):
+        """
+        Reúne las páginas (subcarpetas, objetos) de un listado. Con stream
+        cada página se envía a la tabla según llega; con keep=False además
+        no se guardan, para no duplicar en memoria un listado que ya tiene
+        la tabla.
+        
+        Returns:
+            ListingStore: Entradas del listado (con keep=False, el número de
+            objetos), o None si se canceló.
+        """
+        entries = ListingStore() if keep else None
+        total = 0
+        folders = 0
+        for page_folders, objects in pages:
+            page = [{'Prefix': prefix} for prefix in page_folders] + objects
+            if stream and page:
+                self.file_page_ready.emit(page)
+            if keep:
+                entries.extend(page)
+            total += len(objects)
+            folders += len(page_folders)
+            self.transfer_progress.emit(-1, f"Listando {location}: {total} archivos...")
+        
+        if self.cancel_event.is_set():
+            self.log_message.emit(f"Listado de {location} detenido tras {total} archivos", "warning")
+            return None
+        self.log_message.emit(f"Se encontraron {total} archivos y {folders} carpetas en {location}", "info")
+        return entries if keep else total
+    
+    def _refresh_cached_levels(self, cache):
+        """
+        Vuelve a listar las carpetas guardadas del bucket que llevan más de
+        LISTING_REFRESH_AGE segundos sin listarse y actualiza solo las que
+        cambiaron. Las que ya no existen se olvidan. Se detiene en cuanto se
+        cancela, por ejemplo al iniciar otra operación.
+        """
+        stale = cache.stale_levels(self.bucket_name, LISTING_REFRESH_AGE, exclude=self.prefix)
+        checked = changed = 0
+        for prefix in stale[:MAX_BACKGROUND_LEVELS]:
+            if self.cancel_event.is_set():
+                break
+            self.transfer_progress.emit(-1, f"Actualizando caché de listados: {self.bucket_name}/{prefix}")
+            entries = []
+            for page_folders, objects in iter_folder_pages(self.s3_client, self.bucket_name, prefix,
+                                                           cancel_event=self.cancel_event):
+                entries.extend([{'Prefix': p} for p in page_folders] + objects)
+            if self.cancel_event.is_set():
+                break
+            checked += 1
+            if not entries and prefix:
+                cache.forget_level(self.bucket_name, prefix)
+                changed += 1
+            elif cache.store_level(self.bucket_name, prefix, entries):
+                changed += 1
+        if checked:
+            self.log_message.emit(
+                f"Caché de listados de {self.bucket_name}: {checked} carpetas revisadas, {changed} con cambios",
+                "info")
+    
     def _download_files(self):
-        """Descarga archivos seleccionados"""
+        """Descarga archivos seleccionados en paralelo"""
         try:
             if not self.s3_client:
                 self.s3_client = boto3.client('s3')
             
             total_files = len(self.selected_files)
-            for i, file_obj in enumerate(self.selected_files):
-                # Actualizar progreso
-                progress = int((i / total_files) * 100)
-                self.progress_updated.emit(progress, f"Descargando: {file_obj['Key']}")
-                
-                # Crear ruta local
-                local_file_path = os.path.join(self.local_path, file_obj['Key'])
-                local_dir = os.path.dirname(local_file_path)
-                if local_dir:
-                    os.makedirs(local_dir, exist_ok=True)
-                
-                # Descargar archivo
-                self.s3_client.download_file(self.bucket_name, file_obj['Key'], local_file_path)
-                
+            
+            on_progress = self._progress_reporter("Descargando")
+            
+            settings = self.transfer_settings or TransferSettingsManager.load_settings()
+            journal = TransferJournal.open_default()
+            engine = DownloadEngine(
+                self._transfer_client(settings),
+                max_workers=self.max_workers,
+                progress_callback=on_progress,
+                settings=settings,
+                journal=journal,
+                bandwidth=self.job_bandwidth,
+                job=self.queue_job
+            )
+            self.log_message.emit(
+                f"Descargando {total_files} archivos con {engine.max_workers} hilos "
+                f"(partes de {settings.multipart_chunksize_mb} MB, "
+                f"{settings.effective_concurrency} hilos por objeto"
+                f"{', modo dividido' if settings.ranged_download else ''}"
+                f"{f', vía rápida hasta {settings.small_object_kb} KB' if settings.small_object_kb else ''})",
+                "info"
+            )
+            try:
+                result = engine.download(self.bucket_name, self.selected_files, self.local_path)
+            finally:
+                journal.close()
+            
+            if result.resumed:
+                self.log_message.emit(
+                    f"Reanudado: {len(result.resumed)} archivos ya estaban descargados", "info"
+                )
+            if result.skipped:
+                self.log_message.emit(
+                    f"Omitidos {len(result.skipped)} archivos sin cambios: "
+                    f"{result.skipped_bytes / (1024 * 1024):.2f} MB y "
+                    f"{result.skipped_requests} peticiones ahorradas", "info"
+                )
+            if result.verification:
+                self.log_message.emit(
+                    f"Integridad: {result.verification.summary()}",
+                    "error" if result.verification.mismatched else "info"
+                )
+            for key, error in result.failed:
+                self.log_message.emit(f"Error descargando {key}: {error}", "error")
+            
             self.progress_updated.emit(100, "Descarga completada")
-            self.operation_completed.emit(True, f"Se descargaron {total_files} archivos exitosamente")
+            if result.success:
+                self.operation_completed.emit(True, f"Se descargaron {total_files} archivos exitosamente")
+            else:
+                self.operation_completed.emit(False, f"Descarga incompleta: {result.summary()}")
+            
+        except Exception as e:
+            self.operation_completed.emit(False, str(e))
+    
+    def _upload_files(self):
+        """Sube archivos y carpetas locales en paralelo (multiparte si son grandes)"""
+        try:
+            if not self.s3_client:
+                self.s3_client = boto3.client('s3')
+            
+            items = collect_upload_items(self.local_paths, self.prefix)
+            if not items:
+                self.operation_completed.emit(False, "No se encontraron archivos para subir")
+                return
+            total_files = len(items)
+            
+            on_progress = self._progress_reporter("Subiendo")
+            
+            settings = self.transfer_settings or TransferSettingsManager.load_settings()
+            engine = UploadEngine(
+                self.s3_client,
+                max_workers=self.max_workers,
+                progress_callback=on_progress,
+                settings=settings,
+                bandwidth=self.job_bandwidth,
+                job=self.queue_job
+            )
+            total_mb = sum(item['Size'] for item in items) / (1024 * 1024)
+            self.log_message.emit(
+                f"Subiendo {total_files} archivos ({total_mb:.2f} MB) a {self.bucket_name} "
+                f"con {engine.max_workers} hilos (partes de {settings.multipart_chunksize_mb} MB)",
+                "info"
+            )
+            result = engine.upload(self.bucket_name, items)
+            
+            for key, error in result.failed:
+                self.log_message.emit(f"Error subiendo {key}: {error}", "error")
+            for key, error in result.abort_errors:
+                self.log_message.emit(
+                    f"No se pudo abortar la subida multiparte de {key}: {error}", "warning")
+            
+            self.progress_updated.emit(100, "Subida completada")
+            if result.success:
+                self.operation_completed.emit(True, f"Se subieron {total_files} archivos exitosamente")
+            else:
+                self.operation_completed.emit(False, f"Subida incompleta: {result.summary()}")
+            
+        except Exception as e:
+            self.operation_completed.emit(False, str(e))
+    
+    def _export_archive(self):
+        """Exporta los archivos seleccionados a un único zip o tar"""
+        try:
+            if not self.s3_client:
+                self.s3_client = boto3.client('s3')
+            
+            archive_format, compression = archive_format_for_path(self.local_path)
+            total_files = len(self.selected_files)
+            
+            on_progress = self._progress_reporter("Archivando")
+            
+            engine = ArchiveEngine(
+                self.s3_client,
+                max_workers=self.max_workers,
+                progress_callback=on_progress,
+                settings=self.transfer_settings or TransferSettingsManager.load_settings(),
+                bandwidth=self.job_bandwidth
+            )
+            self.log_message.emit(
+                f"Exportando {total_files} archivos a {self.local_path} "
+                f"con {engine.max_workers} lecturas anticipadas", "info"
+            )
+            result = engine.export(
+                self.bucket_name, self.selected_files, self.local_path,
+                archive_format, compression
+            )
+            
+            for key, error in result.failed:
+                self.log_message.emit(f"Error leyendo {key}: {error}", "error")
+            
+            self.progress_updated.emit(100, "Exportación completada")
+            if result.success:
+                size_mb = os.path.getsize(self.local_path) / (1024 * 1024)
+                self.operation_completed.emit(
+                    True, f"Se exportaron {len(result.succeeded)} archivos a "
+                          f"{os.path.basename(self.local_path)} ({size_mb:.2f} MB)"
+                )
+            else:
+                self.operation_completed.emit(False, f"Exportación incompleta: {result.summary()}")
+            
+        except Exception as e:
+            self.operation_completed.emit(False, str(e))
+    
+    def _copy_objects(self):
+        """Copia o mueve los archivos seleccionados a otro bucket o prefijo"""
+        try:
+            if not self.s3_client:
+                self.s3_client = boto3.client('s3')
+            
+            destination = f"s3://{self.dest_bucket}/{normalize_prefix(self.prefix)}"
+            verb = "Moviendo" if self.move else "Copiando"
+            self.log_message.emit(
+                f"{verb} {len(self.selected_files)} archivos de {self.bucket_name} a {destination}",
+                "info"
+            )
+            
+            settings = self.transfer_settings or TransferSettingsManager.load_settings()
+            engine = CopyEngine(
+                self.s3_client,
+                max_workers=self.max_workers,
+                progress_callback=self._progress_reporter(verb),
+                settings=settings,
+                dest_client=client_for_bucket(self.s3_client, self.dest_bucket,
+                                              pool_size_for(settings, self.max_workers)),
+                job=self.queue_job
+            )
+            result = engine.copy(
+                self.bucket_name, self.selected_files, self.dest_bucket, self.prefix,
+                move=self.move
+            )
+            
+            for key, error in result.failed:
+                self.log_message.emit(f"Error copiando {key}: {error}", "error")
+            for key, error in result.delete_errors:
+                self.log_message.emit(f"Error eliminando {key} del origen: {error}", "error")
+            for key, error in result.abort_errors:
+                self.log_message.emit(
+                    f"No se pudo abortar la copia multiparte de {key}: {error}", "warning")
+            
+            self.progress_updated.emit(100, "Copia completada")
+            if result.success:
+                action = "movieron" if self.move else "copiaron"
+                self.operation_completed.emit(
+                    True, f"Se {action} {len(result.succeeded)} archivos a {destination}")
+            else:
+                self.operation_completed.emit(False, f"Copia incompleta: {result.summary()}")
+            
+        except Exception as e:
+            self.operation_completed.emit(False, str(e))
+    
+    def _rename_prefix(self):
+        """Renombra un prefijo del bucket copiando y eliminando sus objetos"""
+        try:
+            if not self.s3_client:
+                self.s3_client = boto3.client('s3')
+            
+            source = normalize_prefix(self.prefix)
+            destination = normalize_prefix(self.new_prefix)
+            self.log_message.emit(
+                f"Renombrando s3://{self.bucket_name}/{source} a {destination}", "info")
+            
+            engine = PrefixRenameEngine(
+                self.s3_client,
+                max_workers=self.max_workers,
+                progress_callback=self._progress_reporter("Renombrando"),
+                settings=self.transfer_settings or TransferSettingsManager.load_settings()
+            )
+            journal = TransferJournal.open_default()
+            try:
+                result = engine.rename(self.bucket_name, source, destination, journal=journal)
+            finally:
+                journal.close()
+            
+            if result.resumed:
+                self.log_message.emit(
+                    f"Reanudado: {len(result.resumed)} objetos ya copiados en un intento anterior",
+                    "info"
+                )
+            for key, error in result.failed:
+                self.log_message.emit(f"Error copiando {key}: {error}", "error")
+            for key, error in result.delete_errors:
+                self.log_message.emit(f"Error eliminando {key} del origen: {error}", "error")
+            for key, error in result.abort_errors:
+                self.log_message.emit(
+                    f"No se pudo abortar la copia multiparte de {key}: {error}", "warning")
+            
+            self.progress_updated.emit(100, "Renombrado completado")
+            if result.success:
+                self.operation_completed.emit(
+                    True, f"Se movieron {len(result.moved)} objetos de {source} a {destination}")
+            else:
+                self.operation_completed.emit(
+                    False, f"Renombrado incompleto (puede repetirse para reanudarlo): {result.summary()}")
+            
+        except Exception as e:
+            self.operation_completed.emit(False, str(e))
+    
+    def _mirror_prefix(self):
+        """Sincroniza un prefijo del bucket con una carpeta local"""
+        try:
+            if not self.s3_client:
+                self.s3_client = boto3.client('s3')
+            
+            source = f"s3://{self.bucket_name}/{normalize_prefix(self.prefix)}"
+            self.log_message.emit(f"Comparando {source} con {self.local_path}...", "info")
+            
+            on_progress = self._progress_reporter("Sincronizando")
+            
+            settings = self.transfer_settings or TransferSettingsManager.load_settings()
+            journal = TransferJournal.open_default()
+            try:
+                result = mirror_prefix_to_folder(
+                    self._transfer_client(settings),
+                    self.bucket_name,
+                    self.prefix,
+                    self.local_path,
+                    delete_extras=self.delete_extras,
+                    settings=settings,
+                    journal=journal,
+                    progress_callback=on_progress,
+                    bandwidth=self.job_bandwidth
+                )
+            finally:
+                journal.close()
+            
+            self.log_message.emit(f"Diferencias: {result.diff.summary()}", "info")
+            if result.diff.unchanged_count:
+                self.log_message.emit(
+                    f"Omitidos {result.diff.unchanged_count} archivos sin cambios "
+                    f"({result.diff.unchanged_bytes / (1024 * 1024):.2f} MB)", "info"
+                )
+            if result.transfer:
+                if result.transfer.verification:
+                    self.log_message.emit(
+                        f"Integridad: {result.transfer.verification.summary()}",
+                        "error" if result.transfer.verification.mismatched else "info"
+                    )
+                for key, error in result.transfer.failed:
+                    self.log_message.emit(f"Error descargando {key}: {error}", "error")
+            for path, error in result.remove_errors:
+                self.log_message.emit(f"Error eliminando {path}: {error}", "error")
+            
+            self.progress_updated.emit(100, "Sincronización completada")
+            if result.success:
+                self.operation_completed.emit(True, f"Sincronización completada: {result.summary()}")
+            else:
+                self.operation_completed.emit(False, f"Sincronización incompleta: {result.summary()}")
+            
+        except Exception as e:
+            self.operation_completed.emit(False, str(e))
+    
+    def _push_folder(self):
+        """Sincroniza una carpeta local con un prefijo del bucket"""
+        try:
+            if not self.s3_client:
+                self.s3_client = boto3.client('s3')
+            
+            destination = f"s3://{self.bucket_name}/{normalize_prefix(self.prefix)}"
+            self.log_message.emit(f"Comparando {self.local_path} con {destination}...", "info")
+            
+            on_progress = self._progress_reporter("Sincronizando")
+            
+            result = push_folder_to_prefix(
+                self.s3_client,
+                self.bucket_name,
+                self.local_path,
+                self.prefix,
+                delete_extras=self.delete_extras,
+                settings=self.transfer_settings or TransferSettingsManager.load_settings(),
+                progress_callback=on_progress,
+                bandwidth=self.job_bandwidth
+            )
+            
+            self.log_message.emit(f"Diferencias: {result.diff.summary()}", "info")
+            if result.diff.unchanged_count:
+                self.log_message.emit(
+                    f"Omitidos {result.diff.unchanged_count} archivos sin cambios "
+                    f"({result.diff.unchanged_bytes / (1024 * 1024):.2f} MB, "
+                    f"{result.diff.hashed_files} leídos para calcular su hash)", "info"
+                )
+            if result.transfer:
+                for key, error in result.transfer.failed:
+                    self.log_message.emit(f"Error subiendo {key}: {error}", "error")
+            for key, error in result.remove_errors:
+                self.log_message.emit(f"Error eliminando {key}: {error}", "error")
+            
+            self.progress_updated.emit(100, "Sincronización completada")
+            if result.success:
+                self.operation_completed.emit(True, f"Se subieron los cambios de la carpeta: {result.summary()}")
+            else:
+                self.operation_completed.emit(False, f"Sincronización incompleta: {result.summary()}")
             
         except Exception as e:
             self.operation_completed.emit(False, str(e))
     
     def _delete_files(self):
-        """Elimina archivos seleccionados"""
+        """Elimina archivos seleccionados con DeleteObjects en lotes de 1000"""
         try:
             if not self.s3_client:
                 self.s3_client = boto3.client('s3')
             
             total_files = len(self.selected_files)
-            for i, file_obj in enumerate(self.selected_files):
-                # Actualizar progreso
-                progress = int((i / total_files) * 100)
-                self.progress_updated.emit(progress, f"Eliminando: {file_obj['Key']}")
-                
-                # Eliminar archivo
-                self.s3_client.delete_object(Bucket=self.bucket_name, Key=file_obj['Key'])
-                
+            self.progress_updated.emit(0, f"Eliminando {total_files} archivos...")
+            
+            def on_batch(result, batch_deleted, batch_errors):
+                processed = result.deleted + len(result.errors)
+                self.transfer_progress.emit(
+                    int(processed / total_files * 100),
+                    f"Eliminados {result.deleted}/{total_files} archivos"
+                )
+                for key, message in batch_errors:
+                    self.log_message.emit(f"No se pudo eliminar {key}: {message}", "error")
+            
+            result = delete_keys(self.s3_client, self.bucket_name, self.selected_files,
+                                 max_workers=self.max_workers, progress_callback=on_batch,
+                                 cancel_event=self.cancel_event)
+            
             self.progress_updated.emit(100, "Eliminación completada")
-            self.operation_completed.emit(True, f"Se eliminaron {total_files} archivos exitosamente")
+            if result.cancelled:
+                self.operation_completed.emit(
+                    False, f"Eliminación cancelada: se eliminaron {result.deleted} de {total_files} archivos"
+                )
+            elif result.errors:
+                self.operation_completed.emit(
+                    False,
+                    f"Se eliminaron {result.deleted} de {total_files} archivos; "
+                    f"{len(result.errors)} con error (ver registro)"
+                )
+            else:
+                self.operation_completed.emit(True, f"Se eliminaron {total_files} archivos exitosamente")
             
         except Exception as e:
             self.operation_completed.emit(False, str(e))
@@ -201,9 +821,51 @@ class S3Worker(QThread):
             if not self.s3_client:
                 self.s3_client = boto3.client('s3')
             
+            def on_batch(deleted, deleted_bytes, listed):
+                # El total no se conoce hasta terminar el listado: barra indeterminada
+                self.transfer_progress.emit(
+                    -1,
+                    f"Vaciando {self.bucket_name}: {deleted} objetos eliminados "
+                    f"({deleted_bytes / (1024 * 1024):.1f} MB), {listed} listados"
+                )
+            
             success, message = delete_bucket_and_contents(
                 self.s3_client,
-                self.bucket_name
+                self.bucket_name,
+                progress_callback=on_batch,
+                cancel_event=self.cancel_event
+            )
+            self.operation_completed.emit(success, message)
+            
+        except Exception as e:
+            self.operation_completed.emit(False, str(e))
+
+    def _expire_bucket(self):
+        """Vacía el bucket con reglas de ciclo de vida y lo elimina al quedar vacío"""
+        try:
+            if not self.s3_client:
+                self.s3_client = boto3.client('s3')
+            
+            def on_estimate(remaining, truncated, initial, initial_truncated):
+                # Con el total inicial completo se puede dar un porcentaje
+                if initial and not initial_truncated:
+                    value = int((initial - remaining) / initial * 100)
+                else:
+                    value = -1
+                self.transfer_progress.emit(
+                    value,
+                    f"Caducando {self.bucket_name}: quedan {format_estimate(remaining, truncated)} "
+                    f"versiones (próxima comprobación en unos minutos)"
+                )
+            
+            self.log_message.emit(
+                f"Reglas de caducidad en '{self.bucket_name}': S3 puede tardar uno o dos días en vaciarlo", "info")
+            success, message = expire_bucket_and_delete(
+                self.s3_client,
+                self.bucket_name,
+                progress_callback=on_estimate,
+                cancel_event=self.cancel_event,
+                stop_event=self.stop_event
             )
             self.operation_completed.emit(success, message)
             
@@ -267,6 +929,44 @@ class CreateBucketDialog(QDialog):
         """Devuelve el nombre y la región del bucket."""
         return self.bucket_name_input.text().strip(), self.region_combo.currentText()
 
+class CopyObjectsDialog(QDialog):
+    """Diálogo para elegir el destino de una copia o un movimiento."""
+    def __init__(self, buckets, current_bucket, count, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Copiar o Mover Archivos")
+        self.setMinimumWidth(400)
+
+        layout = QVBoxLayout()
+        layout.addWidget(QLabel(f"{count} archivo(s) seleccionados en {current_bucket}"))
+
+        # Bucket de destino (puede estar en otra región)
+        layout.addWidget(QLabel("Bucket de destino:"))
+        self.bucket_combo = QComboBox()
+        self.bucket_combo.setEditable(True)
+        self.bucket_combo.addItems(buckets)
+        self.bucket_combo.setCurrentText(current_bucket)
+        layout.addWidget(self.bucket_combo)
+
+        # Prefijo de destino
+        layout.addWidget(QLabel("Prefijo de destino (vacío para la raíz):"))
+        self.prefix_input = QLineEdit()
+        self.prefix_input.setPlaceholderText("ej: copias/2025/")
+        layout.addWidget(self.prefix_input)
+
+        self.move_check = QCheckBox("Mover (eliminar del origen cada archivo una vez copiado)")
+        layout.addWidget(self.move_check)
+
+        button_box = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
+        button_box.accepted.connect(self.accept)
+        button_box.rejected.connect(self.reject)
+        layout.addWidget(button_box)
+
+        self.setLayout(layout)
+
+    def get_copy_details(self):
+        return (self.bucket_combo.currentText().strip(), self.prefix_input.text().strip(),
+                self.move_check.isChecked())
+
 class BucketTab(QWidget):
     """Pestaña para gestión de buckets"""
     
@@ -455,6 +1155,16 @@ Región: {region}
 
         bucket_name = self.parent.selected_bucket
 
+        if bucket_name in self.parent.background_workers:
+            answer = QMessageBox.question(
+                self, "Caducidad en Curso",
+                f"El bucket <b>{bucket_name}</b> ya se está vaciando por caducidad.<br>"
+                f"¿Quiere cancelarla? Se quitarán las reglas y el bucket se conservará "
+                f"con lo que aún no haya caducado.")
+            if answer == QMessageBox.StandardButton.Yes:
+                self.parent.cancel_background_operation(bucket_name)
+            return
+
         title = "⚠️ Confirmación de Borrado Irreversible"
         label = (f"Está a punto de eliminar el bucket <b>{bucket_name}</b> y todo su contenido.<br>"
                  f"Esta acción no se puede deshacer.<br><br>"
@@ -464,7 +1174,22 @@ Región: {region}
         
         if ok:
             if text.strip() == bucket_name:
-                self.delete_bucket(bucket_name)
+                mode = QMessageBox(self)
+                mode.setWindowTitle("Modo de Borrado")
+                mode.setText(f"¿Cómo quiere vaciar <b>{bucket_name}</b>?")
+                mode.setInformativeText(
+                    "Borrar ahora elimina los objetos desde esta aplicación.\n"
+                    "Caducar todo instala reglas de ciclo de vida para que S3 lo vacíe "
+                    "(uno o dos días, recomendado con cientos de millones de versiones) "
+                    "y elimina el bucket cuando quede vacío.")
+                delete_now = mode.addButton("🗑️ Borrar Ahora", QMessageBox.ButtonRole.AcceptRole)
+                expire = mode.addButton("⏳ Caducar Todo", QMessageBox.ButtonRole.AcceptRole)
+                mode.addButton(QMessageBox.StandardButton.Cancel)
+                mode.exec()
+                if mode.clickedButton() is delete_now:
+                    self.delete_bucket(bucket_name)
+                elif mode.clickedButton() is expire:
+                    self.expire_bucket(bucket_name)
             else:
                 QMessageBox.critical(self, "Error de Confirmación", 
                                      "El nombre del bucket no coincide. Borrado cancelado.")
@@ -474,6 +1199,11 @@ Región: {region}
         self.parent.log_tab.add_log(f"Iniciando borrado del bucket {bucket_name}...", "info")
         self.parent.start_operation('delete_bucket', bucket_name=bucket_name)
 
+    def expire_bucket(self, bucket_name):
+        """Inicia el borrado del bucket por caducidad de ciclo de vida."""
+        self.parent.log_tab.add_log(f"Iniciando caducidad del bucket {bucket_name}...", "info")
+        self.parent.start_operation('expire_bucket', bucket_name=bucket_name)
+
     def open_create_bucket_dialog(self):
         """Abre el diálogo para crear un nuevo bucket."""
         dialog = CreateBucketDialog(self)
@@ -496,10 +1226,18 @@ class FilesTab(QWidget):
         super().__init__(parent)
         self.parent = parent
         self.current_bucket = None
-        self.files = []
+        self.current_prefix = ''
+        self.files = ListingStore()
         self.selected_files = []
+        self.listed_at = 0.0
+        self.listing_refreshing = False
         self.init_ui()
         
+        # Mantener al día la antigüedad mostrada del listado
+        self.age_timer = QTimer(self)
+        self.age_timer.timeout.connect(self.update_cache_age_label)
+        self.age_timer.start(30000)
+        
     def init_ui(self):
         layout = QVBoxLayout()
         
@@ -516,10 +1254,26 @@ class FilesTab(QWidget):
         
         layout.addLayout(header_layout)
         
+        # Ruta actual (bucket / carpeta / subcarpeta), cada tramo navegable
+        navigation_layout = QHBoxLayout()
+        self.breadcrumb_layout = QHBoxLayout()
+        navigation_layout.addLayout(self.breadcrumb_layout)
+        navigation_layout.addStretch()
+        self.cache_age_label = QLabel("")
+        self.cache_age_label.setToolTip("Los listados se guardan en disco y se actualizan en segundo plano")
+        navigation_layout.addWidget(self.cache_age_label)
+        self.flat_view_check = QCheckBox("Vista plana")
+        self.flat_view_check.setToolTip("Lista todos los objetos bajo la carpeta actual, no solo su primer nivel")
+        self.flat_view_check.toggled.connect(self.refresh_files)
+        navigation_layout.addWidget(self.flat_view_check)
+        layout.addLayout(navigation_layout)
+        
         # Tabla de archivos
         self.files_table = QTableWidget()
         self.files_table.setColumnCount(4)
         self.files_table.setHorizontalHeaderLabels(["Seleccionar", "Nombre", "Tamaño (MB)", "Fecha"])
+        self.files_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.files_table.cellDoubleClicked.connect(self.open_row)
         
         # Configurar tabla
         header = self.files_table.horizontalHeader()
@@ -556,6 +1310,46 @@ class FilesTab(QWidget):
         self.download_btn.setEnabled(False)
         action_layout.addWidget(self.download_btn)
         
+        self.export_btn = QPushButton("📦 Exportar como Archivo")
+        self.export_btn.clicked.connect(self.export_selected)
+        self.export_btn.setEnabled(False)
+        self.export_btn.setToolTip("Guarda los archivos seleccionados en un único zip o tar")
+        action_layout.addWidget(self.export_btn)
+        
+        self.copy_btn = QPushButton("📋 Copiar/Mover")
+        self.copy_btn.clicked.connect(self.copy_selected)
+        self.copy_btn.setEnabled(False)
+        self.copy_btn.setToolTip("Copia o mueve los archivos seleccionados a otro bucket o prefijo sin descargarlos")
+        action_layout.addWidget(self.copy_btn)
+        
+        self.rename_btn = QPushButton("✏️ Renombrar Prefijo")
+        self.rename_btn.clicked.connect(self.rename_prefix)
+        self.rename_btn.setEnabled(False)
+        self.rename_btn.setToolTip("Mueve todos los objetos de un prefijo a otro; si se interrumpe puede reanudarse")
+        action_layout.addWidget(self.rename_btn)
+        
+        self.upload_files_btn = QPushButton("⬆️ Subir Archivos")
+        self.upload_files_btn.clicked.connect(self.upload_files)
+        self.upload_files_btn.setEnabled(False)
+        action_layout.addWidget(self.upload_files_btn)
+        
+        self.upload_folder_btn = QPushButton("📂 Subir Carpeta")
+        self.upload_folder_btn.clicked.connect(self.upload_folder)
+        self.upload_folder_btn.setEnabled(False)
+        action_layout.addWidget(self.upload_folder_btn)
+        
+        self.mirror_btn = QPushButton("🔁 Espejar a Carpeta")
+        self.mirror_btn.clicked.connect(self.mirror_to_folder)
+        self.mirror_btn.setEnabled(False)
+        self.mirror_btn.setToolTip("Descarga solo los cambios de un prefijo a una carpeta local")
+        action_layout.addWidget(self.mirror_btn)
+        
+        self.push_btn = QPushButton("⏫ Sincronizar Carpeta")
+        self.push_btn.clicked.connect(self.push_folder)
+        self.push_btn.setEnabled(False)
+        self.push_btn.setToolTip("Sube solo los archivos nuevos o modificados de una carpeta local")
+        action_layout.addWidget(self.push_btn)
+        
         self.delete_btn = QPushButton("🗑️ Eliminar Seleccionados")
         self.delete_btn.clicked.connect(self.delete_selected)
         self.delete_btn.setEnabled(False)
@@ -563,6 +1357,15 @@ class FilesTab(QWidget):
         action_layout.addWidget(self.delete_btn)
         
         action_layout.addStretch()
+        
+        # Número de transferencias simultáneas
+        action_layout.addWidget(QLabel("Transferencias paralelas:"))
+        self.workers_spin = QSpinBox()
+        self.workers_spin.setRange(1, MAX_WORKERS_LIMIT)
+        self.workers_spin.setValue(TransferSettingsManager.load_settings().max_workers)
+        self.workers_spin.setToolTip("Número de archivos que se transfieren a la vez")
+        action_layout.addWidget(self.workers_spin)
+        
         layout.addLayout(action_layout)
         
         self.setLayout(layout)
@@ -570,28 +1373,105 @@ class FilesTab(QWidget):
     def load_bucket_files(self, bucket_name):
         """Carga archivos de un bucket específico"""
         self.current_bucket = bucket_name
+        self.current_prefix = ''
         self.bucket_label.setText(f"📁 Archivos en: {bucket_name}")
         self.refresh_files_btn.setEnabled(True)
+        self.upload_files_btn.setEnabled(True)
+        self.upload_folder_btn.setEnabled(True)
+        self.mirror_btn.setEnabled(True)
+        self.push_btn.setEnabled(True)
+        self.rename_btn.setEnabled(True)
         self.refresh_files()
     
     def refresh_files(self):
-        """Actualiza la lista de archivos"""
+        """Actualiza la lista de archivos de la carpeta actual"""
         if self.current_bucket:
-            self.parent.start_operation('list_files', bucket_name=self.current_bucket)
+            self.update_breadcrumbs()
+            self.parent.start_operation(
+                'list_files',
+                bucket_name=self.current_bucket,
+                prefix=self.current_prefix,
+                flat_listing=self.flat_view_check.isChecked()
+            )
+    
+    def set_listing_age(self, listed_at, refreshing):
+        """Recibe del worker la fecha del listado mostrado y si se está actualizando"""
+        self.listed_at = listed_at
+        self.listing_refreshing = refreshing
+        self.update_cache_age_label()
+    
+    def update_cache_age_label(self):
+        if not self.listed_at:
+            text = "⏳ Listando..." if self.listing_refreshing else ""
+        elif self.listing_refreshing:
+            text = f"🗄️ Caché {format_age(time.time() - self.listed_at)} · actualizando..."
+        else:
+            text = f"✅ Actualizado {format_age(time.time() - self.listed_at)}"
+        self.cache_age_label.setText(text)
+    
+    def open_prefix(self, prefix):
+        """Navega a una carpeta (prefijo) del bucket actual"""
+        self.current_prefix = prefix
+        self.refresh_files()
+    
+    def open_row(self, row, column):
+        """Abre la carpeta de la fila con doble clic"""
+        if row < len(self.files) and self.files.is_folder(row):
+            self.open_prefix(self.files.key(row))
+    
+    def update_breadcrumbs(self):
+        """Reconstruye la ruta navegable bucket / carpeta / subcarpeta"""
+        while self.breadcrumb_layout.count():
+            widget = self.breadcrumb_layout.takeAt(0).widget()
+            if widget:
+                widget.deleteLater()
+        
+        crumbs = [(f"🪣 {self.current_bucket}", '')]
+        path = ''
+        for part in self.current_prefix.split('/')[:-1]:
+            path += part + '/'
+            crumbs.append((part, path))
+        
+        for i, (label, prefix) in enumerate(crumbs):
+            if i:
+                self.breadcrumb_layout.addWidget(QLabel("/"))
+            button = QPushButton(label)
+            button.setFlat(True)
+            button.setEnabled(prefix != self.current_prefix)
+            button.clicked.connect(lambda checked=False, p=prefix: self.open_prefix(p))
+            self.breadcrumb_layout.addWidget(button)
     
     def update_files_table(self, files):
-        """Actualiza la tabla con la lista de archivos"""
-        self.files = files
-        self.files_table.setRowCount(len(files))
-        
-        for row, file_obj in enumerate(files):
+        """Reemplaza el contenido de la tabla por la lista de archivos"""
+        self.files = ListingStore()
+        self.files_table.setRowCount(0)
+        self.append_files(files)
+        self.update_selection()
+    
+    def append_files(self, files):
+        """Añade a la tabla una página de archivos de un listado en curso"""
+        start = len(self.files)
+        self.files.extend(files)
+        self.files_table.setUpdatesEnabled(False)
+        self.files_table.setRowCount(len(self.files))
+        
+        for row, file_obj in enumerate(files, start):
+            if 'Prefix' in file_obj:
+                # Subcarpeta: se abre con doble clic y no se selecciona
+                name = file_obj['Prefix'][len(self.current_prefix):]
+                self.files_table.setItem(row, 1, QTableWidgetItem(f"📁 {name}"))
+                self.files_table.setItem(row, 2, QTableWidgetItem(""))
+                self.files_table.setItem(row, 3, QTableWidgetItem(""))
+                continue
+            
             # Checkbox para selección
             checkbox = QCheckBox()
             checkbox.stateChanged.connect(self.update_selection)
             self.files_table.setCellWidget(row, 0, checkbox)
             
-            # Nombre del archivo
-            name_item = QTableWidgetItem(file_obj['Key'])
+            # Nombre del archivo, relativo a la carpeta actual
+            name_item = QTableWidgetItem(file_obj['Key'][len(self.current_prefix):])
+            name_item.setToolTip(file_obj['Key'])
             self.files_table.setItem(row, 1, name_item)
             
             # Tamaño en MB
@@ -604,19 +1484,21 @@ class FilesTab(QWidget):
             date_item = QTableWidgetItem(date_str)
             self.files_table.setItem(row, 3, date_item)
         
-        self.update_selection()
+        self.files_table.setUpdatesEnabled(True)
     
     def select_all_files(self):
         """Selecciona todos los archivos"""
         for row in range(self.files_table.rowCount()):
             checkbox = self.files_table.cellWidget(row, 0)
-            checkbox.setChecked(True)
+            if checkbox:
+                checkbox.setChecked(True)
     
     def select_no_files(self):
         """Deselecciona todos los archivos"""
         for row in range(self.files_table.rowCount()):
             checkbox = self.files_table.cellWidget(row, 0)
-            checkbox.setChecked(False)
+            if checkbox:
+                checkbox.setChecked(False)
     
     def update_selection(self):
         """Actualiza la lista de archivos seleccionados"""
@@ -625,13 +1507,15 @@ class FilesTab(QWidget):
         
         for row in range(self.files_table.rowCount()):
             checkbox = self.files_table.cellWidget(row, 0)
-            if checkbox.isChecked():
+            if checkbox and checkbox.isChecked():
                 self.selected_files.append(self.files[row])
                 selected_count += 1
         
         # Actualizar UI
         self.selected_count_label.setText(f"{selected_count} archivos seleccionados")
         self.download_btn.setEnabled(selected_count > 0)
+        self.export_btn.setEnabled(selected_count > 0)
+        self.copy_btn.setEnabled(selected_count > 0)
         self.delete_btn.setEnabled(selected_count > 0)
     
     def download_selected(self):
@@ -651,9 +1535,240 @@ class FilesTab(QWidget):
                 'download_files',
                 bucket_name=self.current_bucket,
                 selected_files=self.selected_files,
-                local_path=download_dir
+                local_path=download_dir,
+                max_workers=self.workers_spin.value(),
+                transfer_settings=TransferSettingsManager.load_settings()
             )
     
+    def export_selected(self):
+        """Exporta los archivos seleccionados a un único archivo comprimido"""
+        if not self.selected_files:
+            return
+        
+        output_path, selected_filter = QFileDialog.getSaveFileName(
+            self,
+            "Exportar como archivo",
+            str(Path.home() / "Downloads" / f"{self.current_bucket}.zip"),
+            "Zip (*.zip);;Tar (*.tar);;Tar gzip (*.tar.gz *.tgz);;Tar zstd (*.tar.zst)"
+        )
+        if not output_path:
+            return
+        try:
+            archive_format_for_path(output_path)
+        except ValueError:
+            # Añadir la extensión del filtro elegido si el nombre no la incluye
+            output_path += selected_filter.split('(*')[1].split()[0].rstrip(')')
+        
+        self.parent.start_operation(
+            'export_archive',
+            bucket_name=self.current_bucket,
+            selected_files=self.selected_files,
+            local_path=output_path,
+            max_workers=self.workers_spin.value(),
+            transfer_settings=TransferSettingsManager.load_settings()
+        )
+    
+    def copy_selected(self):
+        """Copia o mueve los archivos seleccionados en el lado del servidor"""
+        if not self.selected_files:
+            return
+        
+        buckets = [bucket['Name'] for bucket in getattr(self.parent.bucket_tab, 'buckets', [])]
+        dialog = CopyObjectsDialog(buckets, self.current_bucket, len(self.selected_files), self)
+        if not dialog.exec():
+            return
+        dest_bucket, prefix, move = dialog.get_copy_details()
+        if not dest_bucket:
+            return
+        
+        self.parent.start_operation(
+            'copy_objects',
+            bucket_name=self.current_bucket,
+            selected_files=self.selected_files,
+            dest_bucket=dest_bucket,
+            prefix=prefix,
+            move=move,
+            max_workers=self.workers_spin.value(),
+            transfer_settings=TransferSettingsManager.load_settings()
+        )
+    
+    def rename_prefix(self):
+        """Renombra una "carpeta" (prefijo) del bucket actual"""
+        if not self.current_bucket:
+            return
+        
+        source, ok = QInputDialog.getText(
+            self,
+            "Renombrar prefijo",
+            f"Prefijo de {self.current_bucket} a renombrar:",
+            QLineEdit.EchoMode.Normal,
+            self.current_prefix
+        )
+        if not ok or not source.strip():
+            return
+        
+        destination, ok = QInputDialog.getText(
+            self,
+            "Renombrar prefijo",
+            f"Nuevo nombre para '{source.strip()}':",
+            QLineEdit.EchoMode.Normal,
+            source.strip()
+        )
+        if not ok or not destination.strip():
+            return
+        
+        reply = QMessageBox.question(
+            self,
+            "Confirmar Renombrado",
+            f"¿Mover todos los objetos de '{source.strip()}' a '{destination.strip()}'?\n\n"
+            "Los originales se eliminan a medida que se confirma cada copia.",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+            QMessageBox.StandardButton.No
+        )
+        if reply != QMessageBox.StandardButton.Yes:
+            return
+        
+        self.parent.start_operation(
+            'rename_prefix',
+            bucket_name=self.current_bucket,
+            prefix=source.strip(),
+            new_prefix=destination.strip(),
+            max_workers=self.workers_spin.value(),
+            transfer_settings=TransferSettingsManager.load_settings()
+        )
+    
+    def upload_files(self):
+        """Sube uno o varios archivos locales al bucket actual"""
+        if not self.current_bucket:
+            return
+        
+        file_paths, _ = QFileDialog.getOpenFileNames(
+            self,
+            "Seleccionar archivos a subir",
+            str(Path.home())
+        )
+        if file_paths:
+            self.start_upload(file_paths)
+    
+    def upload_folder(self):
+        """Sube una carpeta local completa al bucket actual"""
+        if not self.current_bucket:
+            return
+        
+        folder = QFileDialog.getExistingDirectory(
+            self,
+            "Seleccionar carpeta a subir",
+            str(Path.home())
+        )
+        if folder:
+            self.start_upload([folder])
+    
+    def start_upload(self, local_paths):
+        """Pide el prefijo de destino e inicia la subida"""
+        prefix, ok = QInputDialog.getText(
+            self,
+            "Prefijo de destino",
+            f"Prefijo dentro de {self.current_bucket} (vacío para la raíz):",
+            QLineEdit.EchoMode.Normal,
+            self.current_prefix
+        )
+        if not ok:
+            return
+        
+        self.parent.start_operation(
+            'upload_files',
+            bucket_name=self.current_bucket,
+            local_paths=local_paths,
+            prefix=prefix.strip(),
+            max_workers=self.workers_spin.value(),
+            transfer_settings=TransferSettingsManager.load_settings()
+        )
+    
+    def mirror_to_folder(self):
+        """Espeja un prefijo del bucket actual en una carpeta local"""
+        if not self.current_bucket:
+            return
+        
+        prefix, ok = QInputDialog.getText(
+            self,
+            "Prefijo a espejar",
+            f"Prefijo de {self.current_bucket} a sincronizar (vacío para todo el bucket):",
+            QLineEdit.EchoMode.Normal,
+            self.current_prefix
+        )
+        if not ok:
+            return
+        
+        local_dir = QFileDialog.getExistingDirectory(
+            self,
+            "Seleccionar carpeta destino",
+            str(Path.home() / "Downloads")
+        )
+        if not local_dir:
+            return
+        
+        reply = QMessageBox.question(
+            self,
+            "Archivos locales adicionales",
+            "¿Eliminar de la carpeta local los archivos que ya no existen en el bucket?",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No | QMessageBox.StandardButton.Cancel,
+            QMessageBox.StandardButton.No
+        )
+        if reply == QMessageBox.StandardButton.Cancel:
+            return
+        
+        self.parent.start_operation(
+            'mirror_prefix',
+            bucket_name=self.current_bucket,
+            prefix=prefix.strip(),
+            local_path=local_dir,
+            delete_extras=reply == QMessageBox.StandardButton.Yes,
+            transfer_settings=TransferSettingsManager.load_settings()
+        )
+    
+    def push_folder(self):
+        """Sincroniza una carpeta local con un prefijo del bucket actual"""
+        if not self.current_bucket:
+            return
+        
+        local_dir = QFileDialog.getExistingDirectory(
+            self,
+            "Seleccionar carpeta a sincronizar",
+            str(Path.home())
+        )
+        if not local_dir:
+            return
+        
+        prefix, ok = QInputDialog.getText(
+            self,
+            "Prefijo de destino",
+            f"Prefijo de {self.current_bucket} a actualizar (vacío para la raíz):",
+            QLineEdit.EchoMode.Normal,
+            self.current_prefix
+        )
+        if not ok:
+            return
+        
+        reply = QMessageBox.question(
+            self,
+            "Objetos adicionales en el bucket",
+            "¿Eliminar del bucket los objetos del prefijo que no existen en la carpeta local?\n\n"
+            "⚠️ ESTA ACCIÓN NO SE PUEDE DESHACER ⚠️",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No | QMessageBox.StandardButton.Cancel,
+            QMessageBox.StandardButton.No
+        )
+        if reply == QMessageBox.StandardButton.Cancel:
+            return
+        
+        self.parent.start_operation(
+            'push_folder',
+            bucket_name=self.current_bucket,
+            prefix=prefix.strip(),
+            local_path=local_dir,
+            delete_extras=reply == QMessageBox.StandardButton.Yes,
+            transfer_settings=TransferSettingsManager.load_settings()
+        )
+    
     def delete_selected(self):
         """Elimina archivos seleccionados"""
         if not self.selected_files:
@@ -676,6 +1791,135 @@ class FilesTab(QWidget):
                 selected_files=self.selected_files
             )
 
+class TransferQueueTab(QWidget):
+    """Pestaña con los trabajos de la cola de transferencias y sus prioridades"""
+    
+    def __init__(self, transfer_queue, parent=None):
+        super().__init__(parent)
+        self.parent = parent
+        self.transfer_queue = transfer_queue
+        self.jobs = []
+        self.init_ui()
+        
+        # Refrescar estados y pendientes mientras haya trabajos
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(self.refresh_jobs)
+        self.refresh_timer.start(500)
+    
+    def init_ui(self):
+        layout = QVBoxLayout()
+        
+        self.summary_label = QLabel()
+        layout.addWidget(self.summary_label)
+        
+        self.jobs_table = QTableWidget()
+        self.jobs_table.setColumnCount(4)
+        self.jobs_table.setHorizontalHeaderLabels(["Trabajo", "Prioridad", "Estado", "Progreso"])
+        self.jobs_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.jobs_table.setSelectionMode(QTableWidget.SelectionMode.SingleSelection)
+        self.jobs_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        header = self.jobs_table.horizontalHeader()
+        header.setSectionResizeMode(0, QHeaderView.ResizeMode.ResizeToContents)
+        header.setSectionResizeMode(1, QHeaderView.ResizeMode.ResizeToContents)
+        header.setSectionResizeMode(2, QHeaderView.ResizeMode.ResizeToContents)
+        header.setSectionResizeMode(3, QHeaderView.ResizeMode.Stretch)
+        layout.addWidget(self.jobs_table)
+        
+        button_layout = QHBoxLayout()
+        
+        promote_btn = QPushButton("⏫ Al Principio")
+        promote_btn.setToolTip("Da al trabajo más prioridad que a todos los demás")
+        promote_btn.clicked.connect(self.promote_job)
+        button_layout.addWidget(promote_btn)
+        
+        up_btn = QPushButton("⬆️ Subir Prioridad")
+        up_btn.clicked.connect(lambda: self.change_priority(1))
+        button_layout.addWidget(up_btn)
+        
+        down_btn = QPushButton("⬇️ Bajar Prioridad")
+        down_btn.clicked.connect(lambda: self.change_priority(-1))
+        button_layout.addWidget(down_btn)
+        
+        self.pause_btn = QPushButton("⏸️ Pausar / Reanudar")
+        self.pause_btn.clicked.connect(self.toggle_pause)
+        button_layout.addWidget(self.pause_btn)
+        
+        promote_file_btn = QPushButton("⚡ Adelantar Archivo...")
+        promote_file_btn.setToolTip("Transfiere un archivo pendiente del trabajo antes que el resto")
+        promote_file_btn.clicked.connect(self.promote_file)
+        button_layout.addWidget(promote_file_btn)
+        
+        button_layout.addStretch()
+        layout.addLayout(button_layout)
+        
+        self.setLayout(layout)
+        self.refresh_jobs()
+    
+    def refresh_jobs(self):
+        """Actualiza la tabla con los trabajos en el orden en que se atienden"""
+        selected = self.selected_job()
+        self.jobs = self.transfer_queue.jobs()
+        self.jobs_table.setRowCount(len(self.jobs))
+        for row, job in enumerate(self.jobs):
+            if job.paused:
+                state = "⏸️ Pausado"
+            elif job.running:
+                state = f"▶️ {job.running} en curso, {job.pending} pendientes"
+            else:
+                state = f"⏳ {job.pending} pendientes"
+            for column, text in enumerate((job.name, str(job.priority), state, job.status)):
+                self.jobs_table.setItem(row, column, QTableWidgetItem(text))
+            if job is selected:
+                self.jobs_table.selectRow(row)
+        self.summary_label.setText(
+            f"{self.transfer_queue.active} de {self.transfer_queue.max_workers} "
+            f"transferencias simultáneas en uso · {len(self.jobs)} trabajo(s)"
+        )
+    
+    def selected_job(self):
+        rows = self.jobs_table.selectionModel().selectedRows() if self.jobs_table.selectionModel() else []
+        if rows and rows[0].row() < len(self.jobs):
+            return self.jobs[rows[0].row()]
+        return None
+    
+    def promote_job(self):
+        job = self.selected_job()
+        if job:
+            top = max(other.priority for other in self.transfer_queue.jobs())
+            job.set_priority(top + 1)
+            self.refresh_jobs()
+    
+    def change_priority(self, delta):
+        job = self.selected_job()
+        if job:
+            job.set_priority(job.priority + delta)
+            self.refresh_jobs()
+    
+    def toggle_pause(self):
+        job = self.selected_job()
+        if job:
+            if job.paused:
+                job.resume()
+            else:
+                job.pause()
+            self.refresh_jobs()
+    
+    def promote_file(self):
+        """Adelanta un archivo pendiente del trabajo seleccionado"""
+        job = self.selected_job()
+        if not job:
+            return
+        keys = job.pending_keys()
+        if not keys:
+            QMessageBox.information(self, "Sin pendientes", "El trabajo no tiene archivos pendientes.")
+            return
+        key, ok = QInputDialog.getItem(self, "Adelantar archivo", "Archivo pendiente:", keys, 0, True)
+        if ok and key:
+            if not job.promote(key):
+                QMessageBox.information(self, "Archivo en curso",
+                                        f"{key} ya se está transfiriendo o no está pendiente.")
+            self.refresh_jobs()
+
 class LogTab(QWidget):
     """Pestaña para logs y diagnósticos"""
     
@@ -770,6 +2014,11 @@ class S3ManagerApp(QMainWindow):
         super().__init__()
         self.selected_bucket = None
         self.worker = S3Worker()
+        # Las transferencias comparten una cola con concurrencia total acotada
+        self.transfer_queue = TransferQueue(queue_workers_for(TransferSettingsManager.load_settings()))
+        self.queued_workers = []
+        # Caducidades de buckets en curso: bucket -> worker propio
+        self.background_workers = {}
         self.init_ui()
         self.setup_worker()
         
@@ -794,11 +2043,13 @@ class S3ManagerApp(QMainWindow):
         # Crear pestañas
         self.bucket_tab = BucketTab(self)
         self.files_tab = FilesTab(self)
+        self.queue_tab = TransferQueueTab(self.transfer_queue, self)
         self.log_tab = LogTab(self)
         
         # Añadir pestañas
         self.tab_widget.addTab(self.bucket_tab, "📦 Buckets")
         self.tab_widget.addTab(self.files_tab, "📁 Archivos")
+        self.tab_widget.addTab(self.queue_tab, "🚦 Cola")
         self.tab_widget.addTab(self.log_tab, "📋 Logs")
         
         # Barra de estado
@@ -809,6 +2060,24 @@ class S3ManagerApp(QMainWindow):
         self.progress_bar = QProgressBar()
         self.progress_bar.setVisible(False)
         self.status_bar.addPermanentWidget(self.progress_bar)
+        self.cancel_btn = QPushButton("⏹️ Cancelar")
+        self.cancel_btn.setVisible(False)
+        self.cancel_btn.clicked.connect(self.cancel_operation)
+        self.status_bar.addPermanentWidget(self.cancel_btn)
+        
+        # Límites de ancho de banda (0 = sin límite), modificables en caliente
+        settings = TransferSettingsManager.load_settings()
+        GLOBAL_BANDWIDTH.set_rate_mb(settings.max_bandwidth_mb_s)
+        self.status_bar.addPermanentWidget(QLabel("Límite global:"))
+        self.global_bandwidth_spin = self._create_bandwidth_spin(settings.max_bandwidth_mb_s)
+        self.global_bandwidth_spin.setToolTip("Ancho de banda máximo de toda la aplicación")
+        self.global_bandwidth_spin.valueChanged.connect(GLOBAL_BANDWIDTH.set_rate_mb)
+        self.status_bar.addPermanentWidget(self.global_bandwidth_spin)
+        self.status_bar.addPermanentWidget(QLabel("Trabajo:"))
+        self.job_bandwidth_spin = self._create_bandwidth_spin(0)
+        self.job_bandwidth_spin.setToolTip("Ancho de banda máximo de la transferencia en curso")
+        self.job_bandwidth_spin.valueChanged.connect(self.set_job_bandwidth)
+        self.status_bar.addPermanentWidget(self.job_bandwidth_spin)
         
         # Crear menú
         self.create_menu()
@@ -816,6 +2085,21 @@ class S3ManagerApp(QMainWindow):
         # Aplicar estilo macOS
         self.apply_macos_style()
     
+    def _create_bandwidth_spin(self, value):
+        """QSpinBox en MB/s para la barra de estado"""
+        spin = QSpinBox()
+        spin.setRange(0, 10000)
+        spin.setSuffix(" MB/s")
+        spin.setSpecialValueText("Sin límite")
+        spin.setValue(value)
+        return spin
+    
+    def set_job_bandwidth(self, value):
+        """Aplica el límite del trabajo, también a los que se están ejecutando"""
+        self.worker.job_bandwidth.set_rate_mb(value)
+        for worker in self.queued_workers:
+            worker.job_bandwidth.set_rate_mb(value)
+    
     def create_menu(self):
         """Crea el menú de la aplicación"""
         menubar = self.menuBar()
@@ -832,6 +2116,10 @@ class S3ManagerApp(QMainWindow):
         config_action.triggered.connect(self.show_config_dialog)
         file_menu.addAction(config_action)
         
+        transfer_action = QAction('⚡ Configuración de Transferencias', self)
+        transfer_action.triggered.connect(self.show_transfer_settings_dialog)
+        file_menu.addAction(transfer_action)
+        
         file_menu.addSeparator()
         
         quit_action = QAction('Salir', self)
@@ -910,10 +2198,14 @@ class S3ManagerApp(QMainWindow):
     def setup_worker(self):
         """Configura las conexiones del worker thread"""
         self.worker.progress_updated.connect(self.update_progress)
+        self.worker.transfer_progress.connect(self.update_transfer_progress)
         self.worker.operation_completed.connect(self.operation_completed)
         self.worker.bucket_list_ready.connect(self.bucket_tab.update_bucket_list)
         self.worker.file_list_ready.connect(self.files_tab.update_files_table)
+        self.worker.file_page_ready.connect(self.files_tab.append_files)
+        self.worker.listing_age.connect(self.files_tab.set_listing_age)
         self.worker.log_message.connect(self.log_tab.add_log)
+        self.worker.finished.connect(self.worker_finished)
 
     def switch_to_files_tab(self):
         """Cambia a la pestaña de archivos y carga su contenido."""
@@ -926,6 +2218,7 @@ class S3ManagerApp(QMainWindow):
         try:
             access_key, secret_key = AWSCredentialsManager.load_credentials()
             if access_key and secret_key:
+                S3ClientPool.clear()
                 self.log_tab.add_log("Credenciales AWS cargadas desde almacenamiento seguro", "success")
                 self.status_bar.showMessage("✅ Credenciales cargadas")
             else:
@@ -952,27 +2245,164 @@ class S3ManagerApp(QMainWindow):
     
     def start_operation(self, operation, **kwargs):
         """Inicia una operación en el worker thread"""
+        if operation in QUEUED_OPERATIONS:
+            kwargs.setdefault('bandwidth_limit_mb', self.job_bandwidth_spin.value())
+            self.enqueue_transfer(operation, **kwargs)
+            return
+        if operation in BACKGROUND_OPERATIONS:
+            self.start_background_operation(operation, **kwargs)
+            return
+        
+        if self.worker.isRunning() and self.worker.operation == 'list_files':
+            # Un listado se puede abandonar: se detiene tras la página en curso
+            self.worker.cancel()
+            self.worker.wait()
+        
         if self.worker.isRunning():
             self.log_tab.add_log("Operación en curso, espera a que termine", "warning")
             return
         
+        kwargs.setdefault('bandwidth_limit_mb', self.job_bandwidth_spin.value())
         self.worker.set_operation(operation, **kwargs)
         self.worker.start()
         
         # Mostrar progreso
+        self.progress_bar.setRange(0, 100)
         self.progress_bar.setVisible(True)
         self.progress_bar.setValue(0)
+        self.cancel_btn.setEnabled(True)
+        self.cancel_btn.setVisible(operation in CANCELLABLE_OPERATIONS)
         self.status_bar.showMessage(f"Ejecutando: {operation}")
     
+    def worker_finished(self):
+        """Oculta los controles de la operación del worker principal al terminar"""
+        if self.worker.isRunning():
+            # Ya empezó otra operación (un listado abandonado termina así)
+            return
+        self.cancel_btn.setVisible(False)
+        if not self.queued_workers:
+            self.progress_bar.setRange(0, 100)
+            self.progress_bar.setVisible(False)
+    
+    def cancel_operation(self):
+        """Detiene la operación en curso del worker principal"""
+        self.worker.cancel()
+        self.cancel_btn.setEnabled(False)
+        self.status_bar.showMessage("Cancelando...")
+        self.log_tab.add_log("Cancelación solicitada por el usuario", "warning")
+    
+    def enqueue_transfer(self, operation, **kwargs):
+        """
+        Añade una transferencia a la cola. Cada trabajo tiene su propio
+        worker thread, pero todos reparten los hilos fijos de la cola.
+        """
+        count = len(kwargs.get('selected_files') or kwargs.get('local_paths') or [])
+        labels = {'download_files': "Descarga", 'upload_files': "Subida", 'copy_objects': "Copia"}
+        job = self.transfer_queue.add_job(
+            f"{labels[operation]} de {count} elemento(s) · {kwargs.get('bucket_name')}")
+        
+        worker = S3Worker()
+        worker.progress_updated.connect(self.update_progress)
+        worker.transfer_progress.connect(self.update_transfer_progress)
+        worker.transfer_progress.connect(lambda value, message: setattr(job, 'status', message))
+        worker.operation_completed.connect(self.operation_completed)
+        worker.log_message.connect(self.log_tab.add_log)
+        worker.finished.connect(lambda: self.transfer_finished(worker, job))
+        worker.set_operation(operation, queue_job=job, **kwargs)
+        self.queued_workers.append(worker)
+        worker.start()
+        
+        self.progress_bar.setVisible(True)
+        self.status_bar.showMessage(f"En cola: {job.name}")
+        self.queue_tab.refresh_jobs()
+    
+    def start_background_operation(self, operation, **kwargs):
+        """
+        Ejecuta una operación larga (la caducidad de un bucket) en un worker
+        propio, uno por bucket, para que el worker principal siga libre
+        para listar, borrar o crear buckets mientras tanto.
+        """
+        bucket_name = kwargs.get('bucket_name')
+        if bucket_name in self.background_workers:
+            self.log_tab.add_log(f"El bucket {bucket_name} ya se está caducando", "warning")
+            return
+        
+        worker = S3Worker()
+        worker.transfer_progress.connect(lambda value, message: self.status_bar.showMessage(message))
+        worker.operation_completed.connect(self.operation_completed)
+        worker.log_message.connect(self.log_tab.add_log)
+        worker.finished.connect(lambda: self.background_workers.pop(bucket_name, None))
+        worker.set_operation(operation, **kwargs)
+        self.background_workers[bucket_name] = worker
+        worker.start()
+        self.status_bar.showMessage(f"En segundo plano: {operation} de {bucket_name}")
+    
+    def cancel_background_operation(self, bucket_name):
+        """Cancela la caducidad de un bucket: se quitan las reglas y el bucket se conserva"""
+        worker = self.background_workers.get(bucket_name)
+        if worker:
+            worker.cancel()
+            self.log_tab.add_log(f"Cancelando la caducidad de {bucket_name}...", "warning")
+    
+    def closeEvent(self, event):
+        """
+        Cancela las transferencias de la cola y espera a que sus workers
+        terminen, para no cerrar con archivos parciales o el diario a medio
+        escribir, y deja de esperar las caducidades en curso sin quitar sus
+        reglas.
+        """
+        queued = list(self.queued_workers)
+        for worker in queued:
+            # Al cerrar no se muestran los avisos de las transferencias canceladas
+            worker.operation_completed.disconnect()
+            worker.cancel()
+        # Cancela las tareas pendientes y espera a las que están en marcha
+        self.transfer_queue.shutdown()
+        for worker in queued:
+            worker.wait()
+        for worker in list(self.background_workers.values()):
+            # Al cerrar no se muestra el aviso de que se dejó de esperar
+            worker.operation_completed.disconnect()
+            worker.stop_waiting()
+            worker.wait()
+        super().closeEvent(event)
+    
+    def transfer_finished(self, worker, job):
+        """Retira de la cola un trabajo terminado"""
+        job.close()
+        if worker in self.queued_workers:
+            self.queued_workers.remove(worker)
+        if not self.queued_workers and not self.worker.isRunning():
+            self.progress_bar.setRange(0, 100)
+            self.progress_bar.setVisible(False)
+        self.queue_tab.refresh_jobs()
+    
     def update_progress(self, value, message):
         """Actualiza la barra de progreso"""
         self.progress_bar.setValue(value)
         self.status_bar.showMessage(message)
         self.log_tab.add_log(message, "info")
     
+    def update_transfer_progress(self, value, message):
+        """
+        Actualiza la barra con el progreso de una transferencia, sin
+        registrarlo en el log. Un valor negativo indica que el total aún no
+        se conoce y muestra la barra en modo indeterminado.
+        """
+        if value < 0:
+            self.progress_bar.setRange(0, 0)
+        else:
+            self.progress_bar.setRange(0, 100)
+            self.progress_bar.setValue(value)
+        self.status_bar.showMessage(message)
+    
     def operation_completed(self, success, message):
         """Maneja la finalización de operaciones de forma centralizada."""
-        self.progress_bar.setVisible(False)
+        # La barra es compartida: no se oculta mientras quede una transferencia en
+        # la cola (el worker que termina sigue en la lista hasta transfer_finished)
+        if not self.queued_workers:
+            self.progress_bar.setVisible(False)
+            self.progress_bar.setRange(0, 100)
 
         if success:
             self.status_bar.showMessage("✅ Operación completada")
@@ -983,8 +2413,9 @@ class S3ManagerApp(QMainWindow):
                 QMessageBox.information(self, "Éxito", message)
                 self.bucket_tab.refresh_buckets()
             
-            # Caso 2: Borrado de archivos exitoso
-            elif "eliminaron" in message and self.files_tab.current_bucket:
+            # Caso 2: Borrado, subida o copia de archivos exitosa
+            elif (any(word in message for word in ("eliminaron", "subieron", "copiaron", "movieron"))
+                  and self.files_tab.current_bucket):
                 self.log_tab.add_log(message, "success")
                 self.files_tab.refresh_files()
 
@@ -1059,9 +2490,24 @@ Nota: Puedes cambiarlas más tarde desde el menú Archivo → Configuración AWS
         """Muestra el diálogo de configuración AWS"""
         dialog = AWSConfigDialog(self)
         if dialog.exec():
+            # Los clientes creados con las credenciales anteriores ya no sirven
+            self.worker.reset_client()
             self.check_credentials()
             self.refresh_all()
     
+    def show_transfer_settings_dialog(self):
+        """Muestra el diálogo de configuración de transferencias"""
+        dialog = TransferSettingsDialog(self)
+        if dialog.exec():
+            settings = TransferSettingsManager.load_settings()
+            self.files_tab.workers_spin.setValue(settings.max_workers)
+            self.transfer_queue.resize(queue_workers_for(settings))
+            self.global_bandwidth_spin.setValue(settings.max_bandwidth_mb_s)
+            self.log_tab.add_log(
+                f"Configuración de transferencias guardada para el perfil "
+                f"'{TransferSettingsManager.current_profile()}'", "success"
+            )
+    
     def show_about(self):
         """Muestra información sobre la aplicación"""
         QMessageBox.about(
@@ -1079,6 +2525,7 @@ Nota: Puedes cambiarlas más tarde desde el menú Archivo → Configuración AWS
                 <li>✅ Listado de buckets S3</li>
                 <li>✅ Verificación de permisos</li>
                 <li>✅ Descarga selectiva de archivos</li>
+                <li>✅ Subida de archivos y carpetas</li>
                 <li>✅ Eliminación selectiva de archivos</li>
                 <li>✅ Interfaz gráfica moderna</li>
                 <li>✅ Logs detallados</li>
@@ -1181,6 +2628,7 @@ class AWSConfigDialog(QDialog):
         # Guardar usando el gestor de credenciales
         success, error_message = AWSCredentialsManager.save_credentials(access_key, secret_key)
         if success:
+            S3ClientPool.clear()
             QMessageBox.information(
                 self,
                 "Configuración Guardada (V2)",
@@ -1195,6 +2643,109 @@ class AWSConfigDialog(QDialog):
                 detailed_error
             )
 
+class TransferSettingsDialog(QDialog):
+    """Diálogo para configurar los parámetros de transferencia del perfil activo"""
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.settings = TransferSettingsManager.load_settings()
+        self.init_ui()
+    
+    def init_ui(self):
+        """Inicializa la interfaz del diálogo"""
+        self.setWindowTitle("Configuración de Transferencias")
+        self.setMinimumWidth(400)
+        
+        layout = QVBoxLayout()
+        
+        title_label = QLabel("CONFIGURACIÓN DE TRANSFERENCIAS")
+        title_label.setFont(QFont("SF Pro Display", 14, QFont.Weight.Bold))
+        layout.addWidget(title_label)
+        
+        subtitle_label = QLabel(f"Perfil AWS: {TransferSettingsManager.current_profile()}")
+        subtitle_label.setStyleSheet("color: gray;")
+        layout.addWidget(subtitle_label)
+        
+        layout.addSpacing(10)
+        
+        self.workers_spin = self._add_spin_row(
+            layout, "Archivos en paralelo:", 1, MAX_WORKERS_LIMIT, self.settings.max_workers)
+        self.threshold_spin = self._add_spin_row(
+            layout, "Umbral multiparte (MB):", 5, 5 * 1024, self.settings.multipart_threshold_mb)
+        self.chunksize_spin = self._add_spin_row(
+            layout, "Tamaño de parte (MB):", 5, 5 * 1024, self.settings.multipart_chunksize_mb)
+        self.concurrency_spin = self._add_spin_row(
+            layout, "Hilos por archivo:", 1, MAX_WORKERS_LIMIT, self.settings.max_concurrency)
+        self.bandwidth_spin = self._add_spin_row(
+            layout, "Límite global (MB/s, 0 = sin límite):", 0, 10000, self.settings.max_bandwidth_mb_s)
+        self.small_object_spin = self._add_spin_row(
+            layout, "Petición única hasta (KB, 0 = nunca):", 0, 64 * 1024, self.settings.small_object_kb)
+        self.small_object_spin.setToolTip("Los objetos de hasta este tamaño se descargan con un único GET")
+        
+        self.use_threads_check = QCheckBox("Usar hilos en transferencias multiparte")
+        self.use_threads_check.setChecked(self.settings.use_threads)
+        layout.addWidget(self.use_threads_check)
+        
+        self.ranged_check = QCheckBox("Modo dividido: descargar rangos en paralelo directamente al archivo")
+        self.ranged_check.setChecked(self.settings.ranged_download)
+        layout.addWidget(self.ranged_check)
+        
+        self.skip_unchanged_check = QCheckBox("Omitir archivos que no han cambiado desde la última descarga")
+        self.skip_unchanged_check.setChecked(self.settings.skip_unchanged)
+        self.skip_unchanged_check.setToolTip(
+            "Guarda en la carpeta de destino un archivo oculto (.s3manager_metadata.sqlite3) "
+            "con el ETag de cada descarga para no repetirla si no ha cambiado")
+        layout.addWidget(self.skip_unchanged_check)
+        
+        self.verify_check = QCheckBox("Verificar la integridad de las descargas (MD5/ETag, SHA256, CRC32C)")
+        self.verify_check.setChecked(self.settings.verify_integrity)
+        layout.addWidget(self.verify_check)
+        
+        self.adaptive_check = QCheckBox("Concurrencia adaptativa: ajustar los archivos en paralelo según el rendimiento")
+        self.adaptive_check.setChecked(self.settings.adaptive_concurrency)
+        layout.addWidget(self.adaptive_check)
+        
+        layout.addSpacing(20)
+        
+        button_box = QDialogButtonBox(QDialogButtonBox.StandardButton.Save | QDialogButtonBox.StandardButton.Cancel)
+        button_box.accepted.connect(self.save_settings)
+        button_box.rejected.connect(self.reject)
+        layout.addWidget(button_box)
+        
+        self.setLayout(layout)
+    
+    def _add_spin_row(self, layout, label, minimum, maximum, value):
+        """Añade una fila etiqueta + QSpinBox y devuelve el QSpinBox"""
+        row = QHBoxLayout()
+        row.addWidget(QLabel(label))
+        spin = QSpinBox()
+        spin.setRange(minimum, maximum)
+        spin.setValue(value)
+        row.addWidget(spin)
+        layout.addLayout(row)
+        return spin
+    
+    def save_settings(self):
+        """Guarda la configuración de transferencias"""
+        settings = TransferSettings(
+            max_workers=self.workers_spin.value(),
+            multipart_threshold_mb=self.threshold_spin.value(),
+            multipart_chunksize_mb=self.chunksize_spin.value(),
+            max_concurrency=self.concurrency_spin.value(),
+            use_threads=self.use_threads_check.isChecked(),
+            ranged_download=self.ranged_check.isChecked(),
+            skip_unchanged=self.skip_unchanged_check.isChecked(),
+            max_bandwidth_mb_s=self.bandwidth_spin.value(),
+            adaptive_concurrency=self.adaptive_check.isChecked(),
+            verify_integrity=self.verify_check.isChecked(),
+            small_object_kb=self.small_object_spin.value()
+        )
+        success, error_message = TransferSettingsManager.save_settings(settings)
+        if success:
+            self.accept()
+        else:
+            QMessageBox.critical(self, "Error al Guardar", error_message)
+
 def main():
     """Función principal de la aplicación"""
     app = QApplication(sys.argv)
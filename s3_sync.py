@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+Sincronización entre prefijos de S3 y carpetas locales
+Autor: EDF Developer - 2025
+"""
+
+import os
+import threading
+
+from diagnose_s3_permissions import iter_bucket_contents
+from local_metadata_cache import LocalMetadataCache, remote_timestamp
+from s3_batch_delete import delete_keys
+from s3_checksums import etag_is_comparable, file_etag, normalize_etag
+from s3_transfer_engine import (
+    DownloadEngine, UploadEngine, is_internal_local_file, upload_etag_part_size
+)
+from transfer_settings_manager import TransferSettings
+
+def normalize_prefix(prefix):
+    """Quita la barra inicial y asegura la barra final de un prefijo no vacío"""
+    prefix = (prefix or '').strip().lstrip('/')
+    if prefix and not prefix.endswith('/'):
+        prefix += '/'
+    return prefix
+
+
+def iter_local_files(local_path):
+    """
+    Recorre una carpeta y devuelve tuplas (clave relativa, ruta) en el mismo
+    orden en que S3 lista las claves. Cada directorio se ordena como si su
+    nombre terminase en '/', que es como aparece dentro de las claves; así
+    basta con mantener en memoria el contenido de un directorio a la vez.
+    """
+    def walk(directory, relative_prefix):
+        with os.scandir(directory) as iterator:
+            entries = [
+                (entry.name + '/' if entry.is_dir(follow_symlinks=False) else entry.name, entry)
+                for entry in iterator
+            ]
+        for sort_name, entry in sorted(entries, key=lambda pair: pair[0]):
+            if sort_name.endswith('/'):
+                yield from walk(entry.path, relative_prefix + sort_name)
+            elif entry.is_file() and not is_internal_local_file(entry.name):
+                yield relative_prefix + entry.name, entry.path
+
+    if os.path.isdir(local_path):
+        yield from walk(local_path, '')
+
+
+def iter_remote_files(s3_client, bucket_name, prefix):
+    """Objetos de un prefijo como tuplas (clave relativa, objeto), sin carpetas"""
+    for obj in iter_bucket_contents(s3_client, bucket_name, prefix):
+        if not obj['Key'].endswith('/'):
+            yield obj['Key'][len(prefix):], obj
+
+
+class MirrorDiff:
+    """Diferencias entre un prefijo remoto y una carpeta local"""
+
+    def __init__(self):
+        self.new = []        # Objetos remotos sin copia local
+        self.changed = []    # Objetos remotos cuya copia local es distinta
+        self.deleted = []    # Rutas locales que ya no existen en el bucket
+        self.unchanged_count = 0
+        self.unchanged_bytes = 0
+
+    @property
+    def to_download(self):
+        return self.new + self.changed
+
+    def summary(self):
+        return (f"{len(self.new)} nuevos, {len(self.changed)} modificados, "
+                f"{len(self.deleted)} eliminados en el bucket, "
+                f"{self.unchanged_count} sin cambios")
+
+
+def compute_mirror_diff(s3_client, bucket_name, prefix, local_path,
+                        metadata_cache, cancel_event=None):
+    """
+    Compara el listado de un prefijo con una carpeta local mediante un
+    recorrido en paralelo de ambos flujos ordenados. Solo se conserva en
+    memoria la diferencia, no el listado completo.
+    """
+    diff = MirrorDiff()
+    remote = iter_remote_files(s3_client, bucket_name, prefix)
+    local = iter_local_files(local_path)
+    remote_entry = next(remote, None)
+    local_entry = next(local, None)
+
+    while remote_entry or local_entry:
+        if cancel_event and cancel_event.is_set():
+            break
+        if local_entry is None or (remote_entry and remote_entry[0] < local_entry[0]):
+            diff.new.append(remote_entry[1])
+            remote_entry = next(remote, None)
+        elif remote_entry is None or local_entry[0] < remote_entry[0]:
+            diff.deleted.append(local_entry[1])
+            local_entry = next(local, None)
+        else:
+            obj = remote_entry[1]
+            if metadata_cache.is_unchanged(bucket_name, obj, local_entry[1]):
+                diff.unchanged_count += 1
+                diff.unchanged_bytes += obj.get('Size', 0)
+            else:
+                diff.changed.append(obj)
+            remote_entry = next(remote, None)
+            local_entry = next(local, None)
+
+    return diff
+
+
+def remove_empty_parents(path, root):
+    """Elimina los directorios que hayan quedado vacíos entre path y root"""
+    root = os.path.abspath(root)
+    directory = os.path.dirname(os.path.abspath(path))
+    while directory != root and directory.startswith(root + os.sep):
+        try:
+            os.rmdir(directory)
+        except OSError:
+            break
+        directory = os.path.dirname(directory)
+
+
+class MirrorResult:
+    """Resultado de una sincronización prefijo → carpeta"""
+
+    def __init__(self, diff):
+        self.diff = diff
+        self.transfer = None
+        self.removed = []
+        self.remove_errors = []  # Tuplas (ruta, mensaje de error)
+
+    @property
+    def success(self):
+        return (self.transfer is None or self.transfer.success) and not self.remove_errors
+
+    def summary(self):
+        message = self.diff.summary()
+        if self.transfer:
+            message += f"; {self.transfer.summary()}"
+        if self.removed:
+            message += f"; {len(self.removed)} archivos locales eliminados"
+        return message
+
+
+def mirror_prefix_to_folder(s3_client, bucket_name, prefix, local_path,
+                            delete_extras=False, settings=None, journal=None,
+                            progress_callback=None, cancel_event=None, bandwidth=None):
+    """
+    Deja una carpeta local igual que un prefijo del bucket: descarga en
+    paralelo solo los objetos nuevos o modificados y, si se pide, elimina
+    los archivos locales que ya no existen en el bucket.
+
+    Returns:
+        MirrorResult: diferencias calculadas y resultado de cada fase.
+    """
+    prefix = normalize_prefix(prefix)
+    cancel_event = cancel_event or threading.Event()
+    os.makedirs(local_path, exist_ok=True)
+
+    metadata_cache = LocalMetadataCache(local_path)
+    try:
+        diff = compute_mirror_diff(
+            s3_client, bucket_name, prefix, local_path, metadata_cache, cancel_event)
+        result = MirrorResult(diff)
+
+        if diff.to_download and not cancel_event.is_set():
+            engine = DownloadEngine(
+                s3_client, progress_callback=progress_callback,
+                cancel_event=cancel_event, settings=settings, journal=journal,
+                bandwidth=bandwidth
+            )
+            result.transfer = engine.download(
+                bucket_name, diff.to_download, local_path, strip_prefix=prefix)
+
+        if delete_extras and not cancel_event.is_set():
+            for path in diff.deleted:
+                try:
+                    os.remove(path)
+                    relative = os.path.relpath(path, local_path).replace(os.sep, '/')
+                    metadata_cache.forget(bucket_name, prefix + relative)
+                    remove_empty_parents(path, local_path)
+                    result.removed.append(path)
+                except OSError as e:
+                    result.remove_errors.append((path, str(e)))
+        return result
+    finally:
+        metadata_cache.close()
+
+
+class PushDiff:
+    """Diferencias entre una carpeta local y un prefijo remoto"""
+
+    def __init__(self):
+        self.new = []        # Archivos locales que no existen en el bucket
+        self.changed = []    # Archivos locales distintos del objeto remoto
+        self.extra = []      # Claves remotas sin archivo local
+        self.unchanged_count = 0
+        self.unchanged_bytes = 0
+        self.hashed_files = 0  # Archivos cuyo contenido hubo que leer
+
+    @property
+    def to_upload(self):
+        return self.new + self.changed
+
+    def summary(self):
+        return (f"{len(self.new)} nuevos, {len(self.changed)} modificados, "
+                f"{len(self.extra)} solo en el bucket, "
+                f"{self.unchanged_count} sin cambios")
+
+
+def _part_count(size, part_size):
+    return -(-size // part_size) if part_size else 0
+
+
+def is_remote_current(relative_key, stat, path, obj, metadata_cache, settings, diff):
+    """
+    True si el objeto remoto ya tiene el contenido del archivo local.
+
+    Con distinto tamaño siempre hay cambios. Si el ETag remoto es comparable
+    con el que produciría la subida (MD5 simple o multiparte con el mismo
+    número de partes) se compara el contenido; el ETag local se toma de la
+    caché mientras el archivo no cambie de tamaño ni de mtime. Si no es
+    comparable (otra herramienta, cifrado KMS) se sube solo si el archivo
+    local es más reciente que el objeto.
+    """
+    if stat.st_size != obj.get('Size', 0):
+        return False
+
+    part_size = upload_etag_part_size(stat.st_size, settings)
+    remote_etag = obj.get('ETag')
+    if etag_is_comparable(remote_etag, _part_count(stat.st_size, part_size)):
+        etag = metadata_cache.cached_local_etag(relative_key, stat, part_size)
+        if etag is None:
+            etag = file_etag(path, part_size)
+            diff.hashed_files += 1
+            metadata_cache.record_local_etag(relative_key, stat, part_size, etag)
+        return etag == normalize_etag(remote_etag)
+
+    last_modified = remote_timestamp(obj)
+    return last_modified is not None and stat.st_mtime <= last_modified
+
+
+def compute_push_diff(s3_client, bucket_name, prefix, local_path, metadata_cache,
+                      settings, cancel_event=None):
+    """
+    Compara una carpeta local con el listado de un prefijo recorriendo ambos
+    flujos ordenados a la vez, igual que compute_mirror_diff pero en sentido
+    contrario. Cada elemento a subir es un dict {'Key', 'Size', 'LocalPath'}.
+    """
+    diff = PushDiff()
+    remote = iter_remote_files(s3_client, bucket_name, prefix)
+    local = iter_local_files(local_path)
+    remote_entry = next(remote, None)
+    local_entry = next(local, None)
+
+    while remote_entry or local_entry:
+        if cancel_event and cancel_event.is_set():
+            break
+        if local_entry is None or (remote_entry and remote_entry[0] < local_entry[0]):
+            diff.extra.append(remote_entry[1]['Key'])
+            remote_entry = next(remote, None)
+            continue
+
+        relative_key, path = local_entry
+        stat = os.stat(path)
+        item = {
+            'Key': prefix + relative_key,
+            'Size': stat.st_size,
+            'LocalPath': path,
+            'RelativeKey': relative_key,
+            'Stat': stat,
+        }
+        if remote_entry is None or relative_key < remote_entry[0]:
+            diff.new.append(item)
+        else:
+            obj = remote_entry[1]
+            if is_remote_current(relative_key, stat, path, obj, metadata_cache, settings, diff):
+                diff.unchanged_count += 1
+                diff.unchanged_bytes += stat.st_size
+            else:
+                diff.changed.append(item)
+            remote_entry = next(remote, None)
+        local_entry = next(local, None)
+
+    return diff
+
+
+def delete_remote_keys(s3_client, bucket_name, keys):
+    """
+    Elimina claves con DeleteObjects en lotes de 1000 enviados en paralelo.
+
+    Returns:
+        tuple: (claves eliminadas, lista de tuplas (clave, mensaje de error))
+    """
+    deleted = []
+    result = delete_keys(s3_client, bucket_name, keys,
+                         progress_callback=lambda result, batch_deleted, batch_errors: deleted.extend(batch_deleted))
+    return deleted, result.errors
+
+
+class PushResult(MirrorResult):
+    """Resultado de una sincronización carpeta → prefijo"""
+
+    def summary(self):
+        message = self.diff.summary()
+        if self.transfer:
+            message += f"; {self.transfer.summary()}"
+        if self.removed:
+            message += f"; {len(self.removed)} objetos eliminados del bucket"
+        return message
+
+
+def push_folder_to_prefix(s3_client, bucket_name, local_path, prefix,
+                          delete_extras=False, settings=None,
+                          progress_callback=None, cancel_event=None, bandwidth=None):
+    """
+    Deja un prefijo del bucket igual que una carpeta local: sube en paralelo
+    solo los archivos nuevos o modificados y, si se pide, elimina los
+    objetos que ya no existen en la carpeta. Los ETag locales se guardan en
+    la caché de la carpeta, de modo que sincronizar de nuevo un árbol sin
+    cambios no lee el contenido de ningún archivo.
+
+    Returns:
+        PushResult: diferencias calculadas y resultado de cada fase.
+    """
+    if not os.path.isdir(local_path):
+        raise ValueError(f"La carpeta local no existe: {local_path}")
+    prefix = normalize_prefix(prefix)
+    settings = settings or TransferSettings()
+    cancel_event = cancel_event or threading.Event()
+
+    metadata_cache = LocalMetadataCache(local_path)
+    try:
+        diff = compute_push_diff(
+            s3_client, bucket_name, prefix, local_path, metadata_cache, settings, cancel_event)
+        result = PushResult(diff)
+
+        def remember_etag(item):
+            if item.get('ETag'):
+                metadata_cache.record_local_etag(
+                    item['RelativeKey'], item['Stat'],
+                    upload_etag_part_size(item['Size'], settings), normalize_etag(item['ETag']))
+
+        if diff.to_upload and not cancel_event.is_set():
+            engine = UploadEngine(
+                s3_client, progress_callback=progress_callback,
+                cancel_event=cancel_event, settings=settings, bandwidth=bandwidth
+            )
+            result.transfer = engine.upload(bucket_name, diff.to_upload, on_success=remember_etag)
+
+        if delete_extras and diff.extra and not cancel_event.is_set():
+            result.removed, result.remove_errors = delete_remote_keys(
+                s3_client, bucket_name, diff.extra)
+        return result
+    finally:
+        metadata_cache.close()
@@ -0,0 +1,890 @@
+#!/usr/bin/env python3
+"""
+Motor de transferencias concurrentes para S3Manager
+Autor: EDF Developer - 2025
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from contextlib import nullcontext
+
+from bandwidth_limiter import GLOBAL_BANDWIDTH, TokenBucket
+from concurrency_controller import AdaptiveConcurrency, is_throttle_error
+from local_metadata_cache import LocalMetadataCache, remote_timestamp
+from preallocated_file import BufferPool, PreallocatedFile, read_into_file
+from s3_checksums import (
+    IntegrityError, PartDigestVerifier, VerificationStats, etag_is_content_md5,
+    is_multipart_etag, verifier_for_response
+)
+from transfer_settings_manager import MB, TransferSettings
+
+# Número de descargas simultáneas por defecto. Con miles de objetos pequeños
+# el cuello de botella es la latencia de cada petición, no el ancho de banda.
+DEFAULT_MAX_WORKERS = TransferSettings.DEFAULTS['max_workers']
+MAX_WORKERS_LIMIT = 64
+
+# Tamaño de lectura del cuerpo de cada rango en el modo dividido
+RANGE_READ_SIZE = 1024 * 1024
+
+# Sufijo de los archivos a medio descargar que pueden reanudarse
+PARTIAL_SUFFIX = '.s3part'
+
+# Límite de partes de una subida multiparte en S3
+MAX_UPLOAD_PARTS = 10000
+
+# Reintentos de un objeto rechazado con SlowDown/503
+MAX_THROTTLE_RETRIES = 3
+
+# Intervalo mínimo entre notificaciones de progreso a la interfaz (10 Hz)
+PROGRESS_INTERVAL = 0.1
+
+# Ventana usada para calcular el throughput y la ETA
+THROUGHPUT_WINDOW = 5.0
+
+
+class TransferProgress:
+    """Progreso por objeto y total de un trabajo de transferencia (thread-safe)"""
+
+    def __init__(self, objects):
+        self._lock = threading.Lock()
+        self.total_objects = len(objects)
+        self.total_bytes = sum(obj.get('Size', 0) for obj in objects)
+        self.completed_objects = 0
+        self.failed_objects = 0
+        self.transferred_bytes = 0
+        # Clave -> bytes transferidos de ese objeto
+        self.object_bytes = {}
+        # AdaptiveConcurrency del trabajo si la concurrencia es adaptativa
+        self.concurrency = None
+
+    def add_objects(self, objects):
+        """Amplía el total con objetos descubiertos mientras avanza el trabajo"""
+        with self._lock:
+            self.total_objects += len(objects)
+            self.total_bytes += sum(obj.get('Size', 0) for obj in objects)
+
+    def add_bytes(self, key, amount):
+        """Suma bytes transferidos a un objeto y al total"""
+        with self._lock:
+            self.object_bytes[key] = self.object_bytes.get(key, 0) + amount
+            self.transferred_bytes += amount
+
+    def reset_object(self, key):
+        """Descuenta los bytes de un objeto antes de volver a transferirlo"""
+        with self._lock:
+            self.transferred_bytes -= self.object_bytes.pop(key, 0)
+
+    def mark_done(self, key, success):
+        """Marca un objeto como terminado (con éxito o con error)"""
+        with self._lock:
+            if success:
+                self.completed_objects += 1
+            else:
+                self.failed_objects += 1
+
+    @property
+    def finished_objects(self):
+        return self.completed_objects + self.failed_objects
+
+    @property
+    def percent(self):
+        """Porcentaje total, por bytes si se conoce el tamaño o por objetos"""
+        with self._lock:
+            if self.total_bytes:
+                return min(100, int(self.transferred_bytes * 100 / self.total_bytes))
+            if self.total_objects:
+                return int(self.finished_objects * 100 / self.total_objects)
+            return 100
+
+
+def format_duration(seconds):
+    """Formatea una duración como m:ss o h:mm:ss"""
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes}:{seconds:02d}"
+
+
+class ProgressReporter:
+    """
+    Callback de progreso que convierte los eventos por bloque de bytes de
+    los motores en como mucho una notificación cada PROGRESS_INTERVAL
+    segundos, con bytes transferidos, throughput y ETA. La notificación
+    final (todos los objetos terminados) se envía siempre.
+
+    Args:
+        emit: Función llamada como emit(porcentaje, mensaje).
+        label (str): Verbo que encabeza el mensaje, por ejemplo "Descargando".
+        interval (float): Segundos mínimos entre notificaciones.
+    """
+
+    def __init__(self, emit, label, interval=PROGRESS_INTERVAL):
+        self.emit = emit
+        self.label = label
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._last_emit = 0.0
+        self._samples = []  # (instante, bytes transferidos)
+        self.emitted = 0
+
+    def __call__(self, progress, key, finished):
+        now = time.monotonic()
+        complete = progress.total_objects and progress.finished_objects >= progress.total_objects
+        with self._lock:
+            if now - self._last_emit < self.interval and not complete:
+                return
+            self._last_emit = now
+            rate = self._throughput(progress.transferred_bytes, now)
+            self.emitted += 1
+        self.emit(progress.percent, self.format(progress, key, rate))
+
+    def _throughput(self, transferred, now):
+        """Bytes/s en la ventana THROUGHPUT_WINDOW más reciente"""
+        self._samples.append((now, transferred))
+        while len(self._samples) > 2 and now - self._samples[1][0] >= THROUGHPUT_WINDOW:
+            self._samples.pop(0)
+        start_time, start_bytes = self._samples[0]
+        elapsed = now - start_time
+        return (transferred - start_bytes) / elapsed if elapsed > 0 else 0.0
+
+    def format(self, progress, key, rate):
+        message = (f"{self.label} {progress.finished_objects}/{progress.total_objects} · "
+                   f"{progress.transferred_bytes / MB:.1f}/{progress.total_bytes / MB:.1f} MB · "
+                   f"{rate / MB:.2f} MB/s")
+        remaining = progress.total_bytes - progress.transferred_bytes
+        if rate > 0 and remaining > 0:
+            message += f" · ETA {format_duration(remaining / rate)}"
+        if key:
+            message += f" · {key}"
+        return message
+
+
+class TransferResult:
+    """Resultado de un trabajo de transferencia"""
+
+    def __init__(self):
+        self.succeeded = []
+        self.failed = []  # Lista de tuplas (clave, mensaje de error)
+        self.resumed = []  # Claves completadas en una ejecución anterior
+        self.skipped = []  # Claves omitidas por no haber cambiado
+        self.skipped_bytes = 0
+        self.skipped_requests = 0
+        # Tuplas (clave, mensaje) de subidas multiparte que no se pudieron
+        # abortar: sus partes siguen ocupando espacio en el bucket
+        self.abort_errors = []
+        self.cancelled = False
+        self.verification = None  # VerificationStats si se verificó la integridad
+
+    @property
+    def success(self):
+        return not self.failed and not self.cancelled
+
+    def summary(self):
+        """Mensaje resumen legible del resultado"""
+        message = f"{len(self.succeeded)} archivo(s) transferidos"
+        if self.failed:
+            message += f", {len(self.failed)} con errores"
+        if self.skipped:
+            message += f", {len(self.skipped)} sin cambios omitidos"
+        if self.abort_errors:
+            message += f", {len(self.abort_errors)} subidas multiparte sin abortar"
+        if self.resumed:
+            message += f" ({len(self.resumed)} ya completados anteriormente)"
+        if self.cancelled:
+            message += " (operación cancelada)"
+        return message
+
+
+def clamp_workers(max_workers):
+    """Limita el número de hilos a un rango razonable"""
+    try:
+        max_workers = int(max_workers)
+    except (TypeError, ValueError):
+        return DEFAULT_MAX_WORKERS
+    return max(1, min(MAX_WORKERS_LIMIT, max_workers))
+
+
+def local_path_for_key(local_path, key):
+    """Devuelve la ruta local de un objeto sin permitir salir de local_path"""
+    base = os.path.abspath(local_path)
+    target = os.path.abspath(os.path.join(base, key))
+    if os.path.commonpath([base, target]) != base:
+        raise ValueError(f"Clave fuera del directorio de destino: {key}")
+    return target
+
+
+def split_ranges(size, part_size):
+    """Divide un objeto en rangos (inicio, fin) inclusivos de part_size bytes"""
+    return [
+        (start, min(start + part_size, size) - 1)
+        for start in range(0, size, part_size)
+    ]
+
+
+def is_internal_local_file(name):
+    """True para archivos auxiliares de la aplicación que no deben subirse"""
+    return name.startswith(LocalMetadataCache.CACHE_FILE) or name.endswith(PARTIAL_SUFFIX)
+
+
+def collect_upload_items(local_paths, prefix=''):
+    """
+    Convierte archivos y carpetas locales en elementos a subir.
+
+    Cada archivo se sube como prefix + nombre; cada carpeta conserva su
+    nombre y su estructura interna bajo el prefijo.
+
+    Returns:
+        list: dicts {'Key', 'Size', 'LocalPath'}.
+    """
+    prefix = prefix.strip().lstrip('/')
+    if prefix and not prefix.endswith('/'):
+        prefix += '/'
+
+    items = []
+    for path in local_paths:
+        path = os.path.abspath(path)
+        if os.path.isdir(path):
+            base = os.path.basename(path)
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    if is_internal_local_file(name):
+                        continue
+                    file_path = os.path.join(root, name)
+                    relative = os.path.relpath(file_path, path).replace(os.sep, '/')
+                    items.append({
+                        'Key': f"{prefix}{base}/{relative}",
+                        'Size': os.path.getsize(file_path),
+                        'LocalPath': file_path,
+                    })
+        elif os.path.isfile(path):
+            items.append({
+                'Key': prefix + os.path.basename(path),
+                'Size': os.path.getsize(path),
+                'LocalPath': path,
+            })
+    return items
+
+
+def upload_part_size(size, chunksize):
+    """Tamaño de parte que respeta el límite de 10.000 partes de S3"""
+    part_size = max(chunksize, 5 * MB)
+    while -(-size // part_size) > MAX_UPLOAD_PARTS:
+        part_size *= 2
+    return part_size
+
+
+def upload_etag_part_size(size, settings):
+    """
+    Tamaño de parte con el que UploadEngine subiría un archivo de size
+    bytes, o None si se sube con una única petición put_object. Determina
+    el ETag que S3 asignará al objeto.
+    """
+    if size >= settings.multipart_threshold and size > settings.multipart_chunksize:
+        return upload_part_size(size, settings.multipart_chunksize)
+    return None
+
+
+class TransferEngine:
+    """
+    Base común de los motores de transferencia: pool de hilos acotado,
+    progreso por objeto y total, y cancelación.
+
+    Args:
+        s3_client: Cliente de boto3 S3 (los clientes son thread-safe).
+        max_workers (int): Número máximo de objetos transferidos a la vez.
+            Si es None se usa el valor de la configuración de transferencias.
+        progress_callback: Función opcional llamada como
+            callback(progress, key, finished) desde los hilos de trabajo.
+        cancel_event (threading.Event): Evento opcional para cancelar.
+        settings (TransferSettings): Configuración de transferencias.
+        bandwidth (TokenBucket): Límite de ancho de banda propio del trabajo,
+            que se aplica además del límite global GLOBAL_BANDWIDTH.
+        job (QueuedJob): Trabajo de una TransferQueue compartida. Si se indica,
+            los objetos se ejecutan en los hilos de la cola, según su
+            prioridad, en lugar de en un pool propio; el trabajo no pasa de
+            max_workers tareas simultáneas (o del límite adaptativo).
+    """
+
+    def __init__(self, s3_client, max_workers=None, progress_callback=None,
+                 cancel_event=None, settings=None, bandwidth=None, job=None):
+        self.s3_client = s3_client
+        self.settings = settings or TransferSettings()
+        if max_workers is None:
+            max_workers = self.settings.max_workers
+        self.max_workers = clamp_workers(max_workers)
+        self.transfer_config = self.settings.to_transfer_config()
+        self.progress_callback = progress_callback
+        self.cancel_event = cancel_event or threading.Event()
+        self.bandwidth = bandwidth or TokenBucket()
+        self.job = job
+        self.progress = None
+        self._abort_errors = []
+
+    def _notify(self, key, finished):
+        if self.progress_callback:
+            self.progress_callback(self.progress, key, finished)
+
+    def _throttle(self, amount):
+        """Espera lo necesario para respetar los límites global y del trabajo"""
+        GLOBAL_BANDWIDTH.consume(amount, self.cancel_event)
+        self.bandwidth.consume(amount, self.cancel_event)
+
+    def _abort_multipart(self, s3_client, bucket_name, key, upload_id):
+        """
+        Aborta una subida multiparte fallida. Si tampoco se puede abortar,
+        el error queda en abort_errors del resultado para avisar de que las
+        partes siguen en el bucket.
+        """
+        try:
+            s3_client.abort_multipart_upload(Bucket=bucket_name, Key=key, UploadId=upload_id)
+        except Exception as e:
+            self._abort_errors.append((key, str(e)))
+
+    def _make_concurrency_controller(self):
+        """
+        Crea el controlador AIMD si la configuración lo pide. Parte de
+        max_workers y puede llegar hasta MAX_WORKERS_LIMIT.
+        """
+        if not self.settings.adaptive_concurrency:
+            return None
+        progress = self.progress
+        return AdaptiveConcurrency(
+            self.max_workers, maximum=MAX_WORKERS_LIMIT,
+            bytes_source=lambda: progress.transferred_bytes,
+            on_adjust=lambda controller, reason: self._on_concurrency_adjust()
+        )
+
+    def _on_concurrency_adjust(self):
+        if self.job:
+            # Si el límite sube, la cola puede dar más hilos al trabajo
+            self.job.capacity_changed()
+        self._notify(None, False)
+
+    def _run_parallel(self, items, task, result, on_success=None):
+        """
+        Ejecuta task(item) en el pool para cada item (un dict con 'Key').
+        Los errores de un objeto no detienen al resto; al cancelar se
+        descartan las tareas que aún no habían empezado. Los objetos
+        rechazados con SlowDown/503 se reintentan hasta MAX_THROTTLE_RETRIES
+        veces y, con concurrencia adaptativa, reducen el número de tareas
+        simultáneas.
+
+        Con un trabajo de una TransferQueue las tareas se envían a la cola,
+        que no da al trabajo más hilos que max_workers o que el límite del
+        controlador adaptativo, sin pasar del total de la cola.
+        """
+        controller = self._make_concurrency_controller()
+        self.progress.concurrency = controller
+        if self.job:
+            self.job.set_concurrency(controller or self.max_workers)
+
+        def run(item):
+            if controller is None:
+                return task(item)
+            if not controller.acquire(self.cancel_event):
+                raise RuntimeError("Transferencia cancelada")
+            start = time.monotonic()
+            try:
+                return task(item)
+            except Exception as e:
+                if is_throttle_error(e):
+                    controller.record_throttle()
+                raise
+            finally:
+                controller.release(time.monotonic() - start)
+
+        pool_size = MAX_WORKERS_LIMIT if controller else self.max_workers
+        own_pool = ThreadPoolExecutor(max_workers=pool_size) if self.job is None else nullcontext()
+        with own_pool as executor:
+            def submit(item):
+                if self.job:
+                    return self.job.submit(run, item, key=item['Key'])
+                return executor.submit(run, item)
+
+            pending = {submit(item): (item, 0) for item in items}
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    item, attempts = pending.pop(future)
+                    key = item['Key']
+                    if future.cancelled():
+                        continue
+                    try:
+                        future.result()
+                        if on_success:
+                            on_success(item)
+                        self.progress.mark_done(key, True)
+                        result.succeeded.append(key)
+                    except Exception as e:
+                        if (is_throttle_error(e) and attempts < MAX_THROTTLE_RETRIES
+                                and not self.cancel_event.is_set()):
+                            # El reintento vuelve a contar los bytes desde cero
+                            self.progress.reset_object(key)
+                            pending[submit(item)] = (item, attempts + 1)
+                            continue
+                        self.progress.mark_done(key, False)
+                        result.failed.append((key, str(e)))
+                    self._notify(key, True)
+
+                if self.cancel_event.is_set():
+                    for pending_future in pending:
+                        pending_future.cancel()
+
+        result.abort_errors.extend(self._abort_errors)
+        self._abort_errors.clear()
+        result.cancelled = self.cancel_event.is_set()
+        return result
+
+
+class DownloadEngine(TransferEngine):
+    """
+    Descarga varios objetos de un bucket usando un pool de hilos acotado.
+
+    Acepta los mismos argumentos que TransferEngine y además:
+
+        journal (TransferJournal): Diario opcional. Con él los trabajos
+            interrumpidos se reanudan: se saltan los objetos completados y los
+            objetos grandes se descargan por rangos registrando cada rango.
+    """
+
+    def __init__(self, s3_client, max_workers=None, progress_callback=None,
+                 cancel_event=None, settings=None, journal=None, bandwidth=None, job=None):
+        super().__init__(s3_client, max_workers, progress_callback, cancel_event, settings,
+                         bandwidth, job)
+        self.journal = journal
+        self.job_id = None
+        self.metadata_cache = None
+        self.strip_prefix = ''
+        self.verification = None
+        # Búferes de lectura compartidos por los rangos de todos los objetos
+        self.buffers = BufferPool(RANGE_READ_SIZE)
+
+    def _local_file_path(self, local_path, key):
+        """Ruta local de una clave, sin el prefijo remoto que se esté espejando"""
+        if self.strip_prefix and key.startswith(self.strip_prefix):
+            key = key[len(self.strip_prefix):]
+        return local_path_for_key(local_path, key)
+
+    def _download_one(self, bucket_name, obj, local_path):
+        """Descarga un único objeto; se ejecuta en un hilo del pool"""
+        key = obj['Key']
+        local_file_path = self._local_file_path(local_path, key)
+        local_dir = os.path.dirname(local_file_path)
+        if local_dir:
+            os.makedirs(local_dir, exist_ok=True)
+
+        if self.settings.verify_integrity:
+            # Un ETag multiparte se verifica por partes, con rangos paralelos
+            # alineados con las partes originales; el resto en un único flujo
+            if is_multipart_etag(obj.get('ETag')):
+                self._download_ranged(bucket_name, obj, local_file_path, verify=True)
+            else:
+                self._download_streaming(bucket_name, obj, local_file_path)
+        elif self._use_ranged_download(obj):
+            self._download_ranged(bucket_name, obj, local_file_path)
+        elif obj.get('Size', 0) <= self.settings.small_object_threshold:
+            self._download_small(bucket_name, obj, local_file_path)
+        else:
+            def on_bytes(amount):
+                # Bloquear aquí frena la lectura del cuerpo en el hilo de boto3
+                self._throttle(amount)
+                self.progress.add_bytes(key, amount)
+                self._notify(key, False)
+
+            self.s3_client.download_file(
+                bucket_name, key, local_file_path,
+                Callback=on_bytes, Config=self.transfer_config
+            )
+        self._finalize_local_file(bucket_name, obj, local_file_path)
+        return key
+
+    def _download_small(self, bucket_name, obj, local_file_path):
+        """
+        Descarga un objeto pequeño con una única petición get_object y escribe
+        el cuerpo directamente. download_file añade por cada objeto un
+        head_object, hilos y un archivo temporal, un coste que domina cuando
+        los objetos ocupan pocos KB.
+        """
+        key = obj['Key']
+        response = self.s3_client.get_object(Bucket=bucket_name, Key=key)
+        data = response['Body'].read()
+        self._throttle(len(data))
+        with open(local_file_path, 'wb') as f:
+            f.write(data)
+        self.progress.add_bytes(key, len(data))
+        self._notify(key, False)
+
+    def _finalize_local_file(self, bucket_name, obj, local_file_path):
+        """
+        Fija el mtime local al LastModified remoto y lo anota en la caché de
+        metadatos para poder omitir el objeto en la próxima descarga.
+        """
+        last_modified = remote_timestamp(obj)
+        if last_modified is not None:
+            os.utime(local_file_path, (last_modified, last_modified))
+        if self.metadata_cache:
+            self.metadata_cache.record_download(bucket_name, obj, local_file_path)
+
+    def _use_ranged_download(self, obj):
+        """
+        Indica si un objeto debe descargarse en modo dividido. Con diario se
+        usa siempre para objetos grandes, ya que es lo que permite registrar
+        y reanudar rangos de bytes.
+        """
+        size = obj.get('Size', 0)
+        return ((self.settings.ranged_download or self.journal is not None)
+                and size >= self.settings.multipart_threshold
+                and size > self.settings.multipart_chunksize)
+
+    def _is_already_downloaded(self, obj, local_file_path):
+        """Comprueba en el diario si el objeto se completó con el mismo ETag"""
+        if not self.journal or not self.journal.is_object_done(
+                self.job_id, obj['Key'], obj.get('ETag')):
+            return False
+        try:
+            return os.path.getsize(local_file_path) == obj.get('Size', 0)
+        except OSError:
+            return False
+
+    def _resume_partial(self, obj, partial_path):
+        """
+        Devuelve los rangos reutilizables de un archivo parcial. Solo se
+        reutilizan si el diario los registró con el ETag actual del objeto y
+        el archivo parcial sigue teniendo el tamaño final preasignado.
+        """
+        if not self.journal:
+            return set()
+        done = self.journal.completed_ranges(self.job_id, obj['Key'], obj.get('ETag'))
+        try:
+            partial_ok = os.path.getsize(partial_path) == obj['Size']
+        except OSError:
+            partial_ok = False
+        if done and not partial_ok:
+            self.journal.discard_ranges(self.job_id, obj['Key'])
+            return set()
+        return done if partial_ok else set()
+
+    def _download_streaming(self, bucket_name, obj, local_file_path):
+        """
+        Descarga un objeto en un único flujo calculando su checksum a la vez
+        que se escribe, sin volver a leer el archivo. El archivo parcial solo
+        se renombra al destino si el checksum coincide.
+        """
+        key = obj['Key']
+        etag = obj.get('ETag')
+        extra_args = {'IfMatch': etag} if etag else {}
+        partial_path = local_file_path + PARTIAL_SUFFIX
+
+        response = self.s3_client.get_object(
+            Bucket=bucket_name, Key=key, ChecksumMode='ENABLED', **extra_args)
+        verifier = verifier_for_response(response)
+        try:
+            with open(partial_path, 'wb') as f:
+                body = response['Body']
+                while True:
+                    if self.cancel_event.is_set():
+                        raise RuntimeError("Descarga cancelada")
+                    chunk = body.read(RANGE_READ_SIZE)
+                    if not chunk:
+                        break
+                    f.write(chunk)
+                    if verifier:
+                        verifier.update(chunk)
+                    self._throttle(len(chunk))
+                    self.progress.add_bytes(key, len(chunk))
+                    self._notify(key, False)
+            self._check_integrity(key, verifier)
+            os.replace(partial_path, local_file_path)
+        except BaseException:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+            raise
+
+    def _check_integrity(self, key, verifier):
+        """Comprueba el checksum calculado y lo anota en las estadísticas"""
+        if verifier is None:
+            self.verification.record(key, None)
+            return
+        try:
+            verifier.verify(key)
+        except IntegrityError:
+            self.verification.record(key, verifier, ok=False)
+            raise
+        self.verification.record(key, verifier)
+
+    def _download_ranged(self, bucket_name, obj, local_file_path, verify=False):
+        """
+        Descarga un objeto grande pidiendo rangos de bytes en paralelo y
+        escribiendo cada uno directamente en su posición de un archivo parcial
+        que se renombra al destino al completarse. El archivo se preasigna con
+        su tamaño final y todos los rangos escriben con os.pwrite sobre un
+        único descriptor, leyendo el cuerpo en búferes reutilizados.
+
+        Con verify=True los rangos se alinean con las partes de la subida
+        original (tamaño de la parte 1 según head_object) y el MD5 de cada
+        parte se calcula al escribirla, lo que permite comprobar el ETag
+        multiparte sin releer el archivo. Los rangos reanudados de un intento
+        anterior sí se leen del archivo parcial.
+        """
+        key = obj['Key']
+        size = obj['Size']
+        etag = obj.get('ETag')
+        partial_path = local_file_path + PARTIAL_SUFFIX
+        # IfMatch garantiza que todos los rangos pertenecen a la misma versión
+        extra_args = {'IfMatch': etag} if etag else {}
+
+        range_size = self.settings.multipart_chunksize
+        verifier = None
+        if verify:
+            head = self.s3_client.head_object(
+                Bucket=bucket_name, Key=key, PartNumber=1, **extra_args)
+            if etag_is_content_md5(head) and head.get('ContentLength'):
+                range_size = head['ContentLength']
+                verifier = PartDigestVerifier(etag, range_size)
+
+        all_ranges = split_ranges(size, range_size)
+        done = self._resume_partial(obj, partial_path)
+        # Un rango registrado con otro tamaño de rango (cambió la configuración
+        # o, al verificar, el tamaño de las partes) no sirve: se descarga de nuevo
+        stale = done.difference(all_ranges)
+        if stale:
+            self.journal.discard_ranges(self.job_id, key, stale)
+            done = done - stale
+        if done:
+            self.progress.add_bytes(key, sum(end - start + 1 for start, end in done))
+            self._notify(key, False)
+        ranges = [r for r in all_ranges if r not in done]
+        if verifier and done:
+            self._hash_resumed_ranges(partial_path, [r for r in all_ranges if r in done], verifier)
+
+        def fetch_range(target, byte_range):
+            start, end = byte_range
+            response = self.s3_client.get_object(
+                Bucket=bucket_name, Key=key, Range=f"bytes={start}-{end}", **extra_args
+            )
+            hasher = verifier.part_hasher() if verifier else None
+
+            def on_chunk(chunk):
+                if hasher:
+                    verifier.update_part(hasher, chunk)
+                self._throttle(len(chunk))
+                self.progress.add_bytes(key, len(chunk))
+                self._notify(key, False)
+
+            written = read_into_file(response['Body'], target, start, end - start + 1,
+                                     self.buffers, on_chunk, self.cancel_event)
+            if written != end - start + 1:
+                raise IOError(f"Rango incompleto {start}-{end} de {key}")
+            if hasher:
+                verifier.add_part(start, hasher)
+            if self.journal:
+                self.journal.mark_range_done(self.job_id, key, etag, start, end)
+
+        try:
+            with PreallocatedFile(partial_path, size, create=not done) as target:
+                if ranges:
+                    workers = min(self.settings.effective_concurrency, len(ranges))
+                    with ThreadPoolExecutor(max_workers=workers) as executor:
+                        futures = [executor.submit(fetch_range, target, r) for r in ranges]
+                        for future in as_completed(futures):
+                            future.result()
+            if verify:
+                try:
+                    self._check_integrity(key, verifier)
+                except IntegrityError:
+                    # Los rangos registrados no sirven: hay que repetir el objeto
+                    if self.journal:
+                        self.journal.discard_ranges(self.job_id, key)
+                    os.remove(partial_path)
+                    raise
+            os.replace(partial_path, local_file_path)
+        except Exception:
+            # Sin diario un archivo parcial no sirve para nada: se elimina.
+            # Con diario se conserva para reanudar desde los rangos completados.
+            if not self.journal and os.path.exists(partial_path):
+                os.remove(partial_path)
+            raise
+
+    def _hash_resumed_ranges(self, partial_path, ranges, verifier):
+        """Calcula el MD5 de los rangos ya presentes en el archivo parcial"""
+        with open(partial_path, 'rb') as f:
+            for start, end in ranges:
+                hasher = verifier.part_hasher()
+                f.seek(start)
+                remaining = end - start + 1
+                while remaining:
+                    chunk = f.read(min(RANGE_READ_SIZE, remaining))
+                    if not chunk:
+                        raise IOError(f"Archivo parcial incompleto: {partial_path}")
+                    verifier.update_part(hasher, chunk)
+                    remaining -= len(chunk)
+                verifier.add_part(start, hasher)
+
+    def download(self, bucket_name, objects, local_path, strip_prefix=''):
+        """
+        Descarga los objetos indicados en local_path respetando sus claves.
+        Si se indica strip_prefix, ese prefijo se elimina de la ruta local.
+
+        Returns:
+            TransferResult: objetos descargados, fallidos y si se canceló.
+        """
+        result = TransferResult()
+        self.progress = TransferProgress(objects)
+        self.strip_prefix = strip_prefix
+        if self.settings.verify_integrity:
+            self.verification = result.verification = VerificationStats()
+        os.makedirs(local_path, exist_ok=True)
+        if self.journal:
+            self.job_id = self.journal.start_job(
+                'download', bucket_name, os.path.abspath(local_path))
+        if self.settings.skip_unchanged:
+            self.metadata_cache = LocalMetadataCache(local_path)
+        try:
+            return self._download_all(bucket_name, objects, local_path, result)
+        finally:
+            if self.metadata_cache:
+                self.metadata_cache.close()
+                self.metadata_cache = None
+
+    def _download_all(self, bucket_name, objects, local_path, result):
+        """Clasifica los objetos (omitidos, reanudados, pendientes) y descarga"""
+        # Los objetos que terminan en '/' son marcadores de carpeta
+        pending = []
+        for obj in objects:
+            if obj['Key'].endswith('/'):
+                os.makedirs(self._local_file_path(local_path, obj['Key']), exist_ok=True)
+                self.progress.mark_done(obj['Key'], True)
+                result.succeeded.append(obj['Key'])
+            elif self._is_already_downloaded(obj, self._local_file_path(local_path, obj['Key'])):
+                self.progress.add_bytes(obj['Key'], obj.get('Size', 0))
+                self.progress.mark_done(obj['Key'], True)
+                result.succeeded.append(obj['Key'])
+                result.resumed.append(obj['Key'])
+            elif self.metadata_cache and self.metadata_cache.is_unchanged(
+                    bucket_name, obj, self._local_file_path(local_path, obj['Key'])):
+                size = obj.get('Size', 0)
+                self.progress.add_bytes(obj['Key'], size)
+                self.progress.mark_done(obj['Key'], True)
+                result.succeeded.append(obj['Key'])
+                result.skipped.append(obj['Key'])
+                result.skipped_bytes += size
+                result.skipped_requests += self.settings.requests_for_size(size)
+            else:
+                pending.append(obj)
+
+        def on_success(obj):
+            if self.journal:
+                self.journal.mark_object_done(
+                    self.job_id, obj['Key'], obj.get('ETag'), obj.get('Size'))
+
+        self._run_parallel(
+            pending,
+            lambda obj: self._download_one(bucket_name, obj, local_path),
+            result,
+            on_success
+        )
+        if self.journal and result.success:
+            self.journal.finish_job(self.job_id)
+        return result
+
+
+class UploadEngine(TransferEngine):
+    """
+    Sube archivos locales a un bucket en paralelo. Los archivos que superan
+    el umbral multiparte se suben por partes concurrentes; si una subida
+    multiparte falla o se cancela, se aborta para no dejar partes huérfanas
+    (que S3 seguiría cobrando).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Limita las partes en memoria a la vez entre todos los archivos
+        self._part_slots = threading.BoundedSemaphore(self.settings.effective_concurrency)
+
+    def upload(self, bucket_name, items, on_success=None):
+        """
+        Sube los elementos devueltos por collect_upload_items. Tras subir
+        cada archivo se guarda en item['ETag'] el ETag devuelto por S3.
+
+        Args:
+            on_success: Función opcional llamada como on_success(item) desde
+                el hilo que llama por cada archivo subido correctamente.
+
+        Returns:
+            TransferResult: claves subidas, fallidas y si se canceló.
+        """
+        result = TransferResult()
+        self.progress = TransferProgress(items)
+        return self._run_parallel(
+            items, lambda item: self._upload_one(bucket_name, item), result,
+            on_success=on_success
+        )
+
+    def _upload_one(self, bucket_name, item):
+        """Sube un único archivo; se ejecuta en un hilo del pool"""
+        if self.cancel_event.is_set():
+            raise RuntimeError("Subida cancelada")
+        part_size = upload_etag_part_size(item['Size'], self.settings)
+        if part_size:
+            item['ETag'] = self._upload_multipart(bucket_name, item, part_size)
+            return
+
+        with open(item['LocalPath'], 'rb') as f:
+            body = f.read()
+        self._throttle(len(body))
+        response = self.s3_client.put_object(Bucket=bucket_name, Key=item['Key'], Body=body)
+        item['ETag'] = response.get('ETag')
+        self.progress.add_bytes(item['Key'], len(body))
+        self._notify(item['Key'], False)
+
+    def _upload_multipart(self, bucket_name, item, part_size):
+        """Sube un archivo grande por partes en paralelo y devuelve su ETag"""
+        key = item['Key']
+        size = item['Size']
+        ranges = split_ranges(size, part_size)
+        failed = threading.Event()
+
+        upload_id = self.s3_client.create_multipart_upload(
+            Bucket=bucket_name, Key=key)['UploadId']
+
+        def send_part(numbered_range):
+            part_number, (start, end) = numbered_range
+            if failed.is_set() or self.cancel_event.is_set():
+                raise RuntimeError("Subida cancelada")
+            try:
+                with self._part_slots:
+                    with open(item['LocalPath'], 'rb') as f:
+                        f.seek(start)
+                        data = f.read(end - start + 1)
+                    if len(data) != end - start + 1:
+                        raise IOError(f"El archivo {item['LocalPath']} cambió durante la subida")
+                    self._throttle(len(data))
+                    response = self.s3_client.upload_part(
+                        Bucket=bucket_name, Key=key, UploadId=upload_id,
+                        PartNumber=part_number, Body=data
+                    )
+            except Exception:
+                failed.set()
+                raise
+            self.progress.add_bytes(key, len(data))
+            self._notify(key, False)
+            return {'PartNumber': part_number, 'ETag': response['ETag']}
+
+        try:
+            workers = min(self.settings.effective_concurrency, len(ranges))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                parts = list(executor.map(send_part, enumerate(ranges, 1)))
+            response = self.s3_client.complete_multipart_upload(
+                Bucket=bucket_name, Key=key, UploadId=upload_id,
+                MultipartUpload={'Parts': parts}
+            )
+            return response.get('ETag')
+        except BaseException:
+            self._abort_multipart(self.s3_client, bucket_name, key, upload_id)
+            raise
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Listado paralelo de buckets muy grandes repartido en rangos de claves
+Autor: EDF Developer - 2025
+"""
+
+import bisect
+import itertools
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+# Rangos listados a la vez si no se indica otra cosa
+DEFAULT_LISTING_WORKERS = 16
+
+# Claves por petición list_objects_v2 (el máximo que admite S3)
+LIST_PAGE_SIZE = 1000
+
+# Caracteres candidatos para cortar un rango cuando la página no da pistas
+# suficientes. No hace falta que estén todos los posibles: los cortes solo
+# equilibran el reparto, y cualquier clave cae siempre en exactamente un rango.
+SPLIT_ALPHABET = ''.join(sorted('-./_0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'))
+
+# Subrangos en los que se corta como mucho un rango con más de una página
+SPLIT_LIMIT = 64
+
+
+def _common_prefix_length(a, b):
+    length = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        length += 1
+    return length
+
+
+def split_points(keys, upto, prefix, limit=SPLIT_LIMIT):
+    """
+    Puntos de corte para repartir el rango (keys[-1], upto] en subrangos, a
+    partir de la primera página del rango (keys, ordenadas).
+
+    La página cubre las claves que solo varían a partir de la posición en
+    la que difieren la primera y la última. Lo que queda se corta en esa
+    posición y en todas las anteriores hasta el prefijo, con los caracteres
+    que toman las claves de la página en esa posición: cerca de la página los subrangos son
+    estrechos y más lejos son amplios, y los que resulten grandes se
+    vuelven a cortar al listarlos.
+
+    Returns:
+        list: Puntos de corte ordenados; vacía si el rango no se puede cortar.
+    """
+    last_key = keys[-1]
+    varying = _common_prefix_length(keys[0], last_key)
+    alphabet = sorted({key[varying] for key in keys if len(key) > varying})
+    if len(alphabet) < 2:
+        alphabet = sorted({char for key in keys for char in key[varying:]})
+    if len(alphabet) < 2:
+        alphabet = SPLIT_ALPHABET
+
+    start = len(prefix)
+    if upto is not None:
+        start = max(start, _common_prefix_length(last_key, upto))
+    points = []
+    for position in range(min(varying, len(last_key)), start - 1, -1):
+        floor = last_key[position] if position < len(last_key) else ''
+        if position < varying and not floor.isalnum() and floor not in alphabet:
+            # Un separador fijo ('/', '-', ...) seguramente sigue siéndolo
+            continue
+        for char in alphabet:
+            point = last_key[:position] + char
+            if char > floor and (upto is None or point < upto):
+                points.append(point)
+        if len(points) >= limit:
+            break
+    return sorted(points[:limit])
+
+
+class _Shard:
+    """Rango de claves (after, upto] bajo prefix; after/upto None = sin límite"""
+
+    __slots__ = ('prefix', 'after', 'upto', 'sort_key', 'objects', 'done')
+
+    def __init__(self, prefix, after=None, upto=None, objects=None, done=False):
+        self.prefix = prefix
+        self.after = after
+        self.upto = upto
+        self.sort_key = prefix if after is None else after
+        self.objects = objects or []
+        self.done = done
+
+
+class ShardedLister:
+    """
+    Lista un bucket (o un prefijo) con varias peticiones list_objects_v2 en
+    paralelo en lugar de un único paginador secuencial.
+
+    1. Se pide la primera página del prefijo con Delimiter='/'. Si el nivel
+       cabe en ella, cada subcarpeta es un rango inicial y los objetos del
+       nivel ya están listados.
+    2. Si no, el prefijo entero es un único rango.
+    3. Cada rango se lista por páginas desde su límite inferior (StartAfter).
+       Si una página no lo agota, lo que queda se corta en
+       subrangos que se listan en paralelo, y así sucesivamente: el trabajo
+       se reparte solo donde hay muchas claves.
+
+    Los rangos no se solapan, y los resultados se devuelven en el orden de
+    las claves, igual que el paginador: un rango se entrega en cuanto
+    terminan él y todos los anteriores.
+
+    Args:
+        s3_client: Cliente de boto3 S3 (thread-safe).
+        max_workers (int): Peticiones de listado simultáneas.
+        cancel_event (threading.Event): Evento opcional para detener el listado.
+    """
+
+    def __init__(self, s3_client, max_workers=DEFAULT_LISTING_WORKERS, cancel_event=None):
+        self.s3_client = s3_client
+        self.max_workers = max(1, int(max_workers))
+        self.cancel_event = cancel_event or threading.Event()
+        self.requests = 0
+        self.shards = 0
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    def _cancelled(self):
+        return self.cancel_event.is_set() or self._stopped.is_set()
+
+    def _list(self, **params):
+        with self._lock:
+            self.requests += 1
+        return self.s3_client.list_objects_v2(MaxKeys=LIST_PAGE_SIZE, **params)
+
+    def _initial_shards(self, bucket_name, prefix):
+        """Rangos iniciales a partir del primer nivel del prefijo"""
+        page = self._list(Bucket=bucket_name, Prefix=prefix, Delimiter='/')
+        if page.get('IsTruncated'):
+            return [_Shard(prefix)]
+
+        entries = [(obj['Key'], obj) for obj in page.get('Contents', [])]
+        entries += [(entry['Prefix'], None) for entry in page.get('CommonPrefixes', [])]
+        entries.sort(key=lambda entry: entry[0])
+
+        # Los objetos del nivel entre dos subcarpetas forman un rango ya terminado
+        shards = []
+        for is_folder, group in itertools.groupby(entries, key=lambda entry: entry[1] is None):
+            if is_folder:
+                shards.extend(_Shard(key) for key, _ in group)
+            else:
+                objects = [obj for _, obj in group]
+                shards.append(_Shard(prefix, after='', objects=objects, done=True))
+                shards[-1].sort_key = objects[0]['Key']
+        return shards
+
+    def _list_shard(self, bucket_name, shard):
+        """
+        Lista un rango. En cuanto una página no lo agota, se corta lo que
+        queda en subrangos nuevos; si no se puede cortar, se sigue
+        paginando.
+
+        Returns:
+            list: Subrangos creados (vacía si el rango se listó entero).
+        """
+        params = {'Bucket': bucket_name, 'Prefix': shard.prefix}
+        if shard.after:
+            params['StartAfter'] = shard.after
+        while not self._cancelled():
+            page = self._list(**params)
+            contents = page.get('Contents', [])
+            for obj in contents:
+                if shard.upto is not None and obj['Key'] > shard.upto:
+                    return []
+                shard.objects.append(obj)
+            if not page.get('IsTruncated') or not contents:
+                return []
+
+            points = split_points([obj['Key'] for obj in contents], shard.upto, shard.prefix)
+            if points:
+                bounds = [contents[-1]['Key']] + points + [shard.upto]
+                return [_Shard(shard.prefix, after=low, upto=high)
+                        for low, high in zip(bounds, bounds[1:])]
+            params.pop('StartAfter', None)
+            params['ContinuationToken'] = page['NextContinuationToken']
+        return []
+
+    def iter_pages(self, bucket_name, prefix=''):
+        """
+        Recorre el listado y devuelve, en orden de clave, la lista de
+        objetos de cada rango según se completan.
+        """
+        self._stopped.clear()
+        ordered = self._initial_shards(bucket_name, prefix)
+        self.shards = len(ordered)
+        sort_keys = [shard.sort_key for shard in ordered]
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            running = {executor.submit(self._list_shard, bucket_name, shard): shard
+                       for shard in ordered if not shard.done}
+            try:
+                yield from self._merge(executor, bucket_name, ordered, sort_keys, running)
+            finally:
+                # Si se deja de consumir el generador, los rangos en curso paran
+                self._stopped.set()
+                for future in running:
+                    future.cancel()
+
+    def _merge(self, executor, bucket_name, ordered, sort_keys, running):
+        """Entrega los rangos en orden y lanza los subrangos que van apareciendo"""
+        while True:
+            # Entregar los rangos terminados que ya no tienen ninguno pendiente delante
+            while ordered and ordered[0].done:
+                shard = ordered.pop(0)
+                sort_keys.pop(0)
+                if shard.objects:
+                    yield shard.objects
+            if not running:
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                shard = running.pop(future)
+                children = future.result()
+                shard.done = True
+                for child in children:
+                    index = bisect.bisect_right(sort_keys, child.sort_key)
+                    sort_keys.insert(index, child.sort_key)
+                    ordered.insert(index, child)
+                    running[executor.submit(self._list_shard, bucket_name, child)] = child
+                self.shards += len(children)
+
+            if self.cancel_event.is_set():
+                for future in running:
+                    future.cancel()
+                return
+
+    def list(self, bucket_name, prefix=''):
+        """Lista completa de objetos, en orden de clave"""
+        return [obj for page in self.iter_pages(bucket_name, prefix) for obj in page]
+
+
+def list_bucket_sharded(s3_client, bucket_name, prefix='', max_workers=DEFAULT_LISTING_WORKERS):
+    """Atajo de ShardedLister(...).list(bucket_name, prefix)"""
+    return ShardedLister(s3_client, max_workers=max_workers).list(bucket_name, prefix)
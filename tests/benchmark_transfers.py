@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""
+Benchmarks de transferencias de S3Manager contra el cliente S3 simulado
+Autor: EDF Developer - 2025
+"""
+
+import bisect
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import boto3
+from botocore.config import Config
+
+# Añadir el directorio raíz del proyecto al sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from diagnose_s3_permissions import list_bucket_contents
+from fake_s3_client import FakeS3Client
+from listing_store import ListingStore
+from preallocated_file import BufferPool, PreallocatedFile, read_into_file
+from s3_client_pool import S3ClientPool, pool_size_for
+from s3_transfer_engine import RANGE_READ_SIZE, DownloadEngine, split_ranges
+from sharded_listing import ShardedLister
+from transfer_settings_manager import MB, TransferSettings
+
+BUCKET = 'bucket-benchmark'
+
+
+def make_client(count, size):
+    """Cliente simulado con count objetos de size bytes"""
+    payload = os.urandom(size)
+    return FakeS3Client({(BUCKET, f"objetos/{i:06d}.bin"): payload for i in range(count)})
+
+
+def timed_download(client, settings):
+    """Descarga todo el bucket y devuelve (segundos, resultado)"""
+    with tempfile.TemporaryDirectory() as destination:
+        engine = DownloadEngine(client, settings=settings)
+        start = time.perf_counter()
+        result = engine.download(BUCKET, client.listing(BUCKET), destination)
+        return time.perf_counter() - start, result
+
+
+def benchmark_integrity():
+    """Coste de verificar el checksum mientras se escribe cada descarga"""
+    print("🧪 BENCHMARK: Verificación de integridad")
+    print("-" * 40)
+
+    client = make_client(64, 4 * MB)
+    total_mb = 64 * 4
+    base = dict(skip_unchanged=False, max_workers=8)
+
+    plain_seconds, _ = timed_download(client, TransferSettings(**base))
+    verified_seconds, result = timed_download(
+        client, TransferSettings(verify_integrity=True, **base))
+    stats = result.verification
+
+    print(f"   Sin verificar:  {total_mb / plain_seconds:8.1f} MB/s")
+    print(f"   Verificando:    {total_mb / verified_seconds:8.1f} MB/s")
+    print(f"   Checksums:      {stats.throughput / MB:8.1f} MB/s de cálculo "
+          f"({stats.seconds:.2f} s en {len(stats.verified)} objetos)")
+    print(f"   Sobrecoste:     {(verified_seconds / plain_seconds - 1) * 100:8.1f} %")
+    return stats.verified and not stats.mismatched
+
+
+class _ObjectHandler(BaseHTTPRequestHandler):
+    """Endpoint S3 mínimo: responde a cualquier GET/HEAD con el mismo objeto"""
+
+    protocol_version = 'HTTP/1.1'  # Conexiones persistentes, como S3
+    body = b''
+
+    def _send_headers(self):
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(self.body)))
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('ETag', '"0123456789abcdef0123456789abcdef"')
+        self.send_header('Last-Modified', 'Wed, 01 Jan 2025 00:00:00 GMT')
+        self.end_headers()
+
+    def do_HEAD(self):
+        self._send_headers()
+
+    def do_GET(self):
+        self._send_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def timed_local_download(endpoint, objects, settings, pool_connections, warm):
+    """Descarga objects desde el endpoint local con un cliente boto3 real"""
+    client = boto3.client(
+        's3', endpoint_url=endpoint, region_name='us-east-1',
+        aws_access_key_id='benchmark', aws_secret_access_key='benchmark',
+        config=Config(s3={'addressing_style': 'path'}, max_pool_connections=pool_connections)
+    )
+    start = time.perf_counter()
+    if warm:
+        S3ClientPool.warm_up(client, BUCKET, pool_connections)
+    with tempfile.TemporaryDirectory() as destination:
+        result = DownloadEngine(client, settings=settings).download(BUCKET, objects, destination)
+    return time.perf_counter() - start, result
+
+
+def benchmark_small_objects():
+    """Objetos/s con download_file frente a get_object sobre un pool precalentado"""
+    print("🧪 BENCHMARK: Objetos pequeños")
+    print("-" * 40)
+
+    count, size, workers = 2000, 4 * 1024, 16
+    _ObjectHandler.body = os.urandom(size)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _ObjectHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    endpoint = f"http://127.0.0.1:{server.server_address[1]}"
+    objects = [
+        {'Key': f"pequenos/{i:06d}.bin", 'Size': size,
+         'LastModified': datetime(2025, 1, 1, tzinfo=timezone.utc)}
+        for i in range(count)
+    ]
+
+    try:
+        legacy = TransferSettings(max_workers=workers, skip_unchanged=False, small_object_kb=0)
+        legacy_seconds, legacy_result = timed_local_download(
+            endpoint, objects, legacy, pool_connections=10, warm=False)
+
+        fast = TransferSettings(max_workers=workers, skip_unchanged=False)
+        fast_seconds, fast_result = timed_local_download(
+            endpoint, objects, fast, pool_connections=pool_size_for(fast), warm=True)
+    finally:
+        server.shutdown()
+
+    print(f"   download_file:     {count / legacy_seconds:8.0f} objetos/s (pool de 10)")
+    print(f"   get_object:        {count / fast_seconds:8.0f} objetos/s "
+          f"(pool de {pool_size_for(fast)} precalentado)")
+    print(f"   Mejora:            {legacy_seconds / fast_seconds:8.2f}x")
+    return legacy_result.success and fast_result.success and fast_seconds < legacy_seconds
+
+
+def _write_ranges_with_seek(path, payload):
+    """Escritura anterior: un archivo abierto por rango y un bytes por bloque"""
+    with open(path, 'wb') as f:
+        f.truncate(len(payload))
+
+    def write_range(byte_range):
+        start, end = byte_range
+        body = io.BytesIO(payload[start:end + 1])
+        with open(path, 'r+b') as f:
+            f.seek(start)
+            while True:
+                chunk = body.read(RANGE_READ_SIZE)
+                if not chunk:
+                    break
+                f.write(chunk)
+
+    return write_range
+
+
+def _write_ranges_with_pwrite(path, payload, buffers):
+    """Escritura actual: archivo preasignado, pwrite y búferes reutilizados"""
+    target = PreallocatedFile(path, len(payload))
+
+    def write_range(byte_range):
+        start, end = byte_range
+        body = io.BytesIO(payload[start:end + 1])
+        return read_into_file(body, target, start, end - start + 1, buffers)
+
+    return write_range, target
+
+
+def benchmark_range_writes():
+    """Coste en Python de copiar los rangos al archivo de destino"""
+    print("🧪 BENCHMARK: Escritura de rangos")
+    print("-" * 40)
+
+    payload = os.urandom(256 * MB)
+    ranges = split_ranges(len(payload), 8 * MB)
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for name in ('seek', 'pwrite'):
+            path = os.path.join(directory, f"{name}.bin")
+            buffers = BufferPool(RANGE_READ_SIZE)
+            target = None
+            if name == 'seek':
+                write_range = _write_ranges_with_seek(path, payload)
+            else:
+                write_range, target = _write_ranges_with_pwrite(path, payload, buffers)
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                list(executor.map(write_range, ranges))
+            if target:
+                target.close()
+            results[name] = (time.perf_counter() - start, buffers)
+
+    total_mb = len(payload) / MB
+    seek_seconds, _ = results['seek']
+    pwrite_seconds, buffers = results['pwrite']
+    print(f"   open+seek+write:   {total_mb / seek_seconds:8.1f} MB/s "
+          f"({len(payload) // RANGE_READ_SIZE} bloques nuevos)")
+    print(f"   pwrite + pool:     {total_mb / pwrite_seconds:8.1f} MB/s "
+          f"({buffers.allocated} búferes creados, {buffers.reused} reutilizados)")
+    return buffers.allocated <= 8
+
+
+class ListingClient:
+    """
+    Cliente de solo listado sobre una lista de claves ya ordenada, con una
+    latencia fija por petición como la de S3. El paginador y
+    list_objects_v2 pagan lo mismo por cada página de 1000 claves.
+    """
+
+    def __init__(self, keys, latency):
+        self.keys = keys
+        self.latency = latency
+        self.modified = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+    def _entry(self, key):
+        return {'Key': key, 'Size': 1024, 'ETag': '"0"', 'LastModified': self.modified,
+                'StorageClass': 'STANDARD'}
+
+    def list_objects_v2(self, Bucket, Prefix='', Delimiter=None, StartAfter=None,
+                        ContinuationToken=None, MaxKeys=1000, **kwargs):
+        time.sleep(self.latency)
+        index = bisect.bisect_right(self.keys, max(ContinuationToken or StartAfter or '', Prefix))
+        contents, prefixes, last = [], [], None
+        while index < len(self.keys) and len(contents) + len(prefixes) < MaxKeys:
+            key = self.keys[index]
+            if not key.startswith(Prefix):
+                break
+            rest = key[len(Prefix):]
+            if Delimiter and Delimiter in rest:
+                last = Prefix + rest[:rest.index(Delimiter) + 1]
+                prefixes.append({'Prefix': last})
+                # Saltar el resto de claves de la subcarpeta
+                index = bisect.bisect_left(self.keys, last[:-1] + chr(ord(Delimiter) + 1))
+                continue
+            last = key
+            contents.append(self._entry(key))
+            index += 1
+        truncated = index < len(self.keys) and self.keys[index].startswith(Prefix)
+        response = {'Contents': contents, 'CommonPrefixes': prefixes, 'IsTruncated': truncated}
+        if truncated:
+            response['NextContinuationToken'] = last
+        return response
+
+    def get_paginator(self, operation_name):
+        client = self
+
+        class Paginator:
+            def paginate(self, Bucket, Prefix='', **kwargs):
+                params = {'Bucket': Bucket, 'Prefix': Prefix}
+                while True:
+                    page = client.list_objects_v2(**params, **kwargs)
+                    yield page
+                    if not page['IsTruncated']:
+                        return
+                    params['ContinuationToken'] = page['NextContinuationToken']
+
+        return Paginator()
+
+
+def benchmark_sharded_listing():
+    """Listado secuencial con el paginador frente al listado paralelo por rangos"""
+    print("🧪 BENCHMARK: Listado de buckets grandes")
+    print("-" * 40)
+
+    keys = sorted(
+        [f"logs/{day:03d}/{i:04d}.gz" for day in range(40) for i in range(2500)]
+        + [f"fotos/{i:06d}.jpg" for i in range(50000)]
+        + [f"leeme-{i}.txt" for i in range(20)]
+    )
+    client = ListingClient(keys, latency=0.02)
+
+    start = time.perf_counter()
+    sequential = list_bucket_contents(client, BUCKET)
+    sequential_seconds = time.perf_counter() - start
+
+    lister = ShardedLister(client, max_workers=16)
+    start = time.perf_counter()
+    sharded = lister.list(BUCKET)
+    sharded_seconds = time.perf_counter() - start
+
+    same_order = [obj['Key'] for obj in sharded] == [obj['Key'] for obj in sequential] == keys
+    print(f"   Paginador:          {len(keys) / sequential_seconds:10.0f} claves/s "
+          f"({sequential_seconds:.2f} s)")
+    print(f"   Por rangos (x16):   {len(keys) / sharded_seconds:10.0f} claves/s "
+          f"({sharded_seconds:.2f} s, {lister.shards} rangos, {lister.requests} peticiones)")
+    print(f"   Aceleración:        {sequential_seconds / sharded_seconds:10.1f}x "
+          f"({'mismo orden' if same_order else 'ORDEN DISTINTO'})")
+    return same_order and sharded_seconds < sequential_seconds
+
+
+def benchmark_listing_memory():
+    """Memoria de un listado de millones de objetos: dicts de boto3 frente a ListingStore"""
+    print("🧪 BENCHMARK: Memoria de listados")
+    print("-" * 40)
+
+    count = 2_000_000
+    modified = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+    def entries():
+        for i in range(count):
+            yield {
+                'Key': f"clientes/{i % 1000:04d}/facturas/{i:09d}.pdf",
+                'Size': i * 131,
+                'ETag': f'"{i:032x}"' if i % 20 else f'"{i:032x}-{i % 50 + 2}"',
+                'LastModified': modified + timedelta(seconds=i),
+                'StorageClass': 'STANDARD',
+            }
+
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        listing = list(entries())
+        dicts_bytes = tracemalloc.get_traced_memory()[0] - before
+        del listing
+
+        before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        store = ListingStore(entries())
+        build_seconds = time.perf_counter() - start
+        store_bytes = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+
+    ratio = dicts_bytes / store_bytes
+    print(f"   Lista de dicts:     {dicts_bytes / count:8.1f} bytes/objeto ({dicts_bytes / MB:.0f} MB)")
+    print(f"   ListingStore:       {store_bytes / count:8.1f} bytes/objeto ({store_bytes / MB:.0f} MB, "
+          f"{count / build_seconds:.0f} objetos/s al construir)")
+    print(f"   Reducción:          {ratio:8.1f}x")
+    return ratio >= 5 and store[count - 1]['Key'] == f"clientes/0999/facturas/{count - 1:09d}.pdf"
+
+
+BENCHMARKS = [
+    benchmark_integrity,
+    benchmark_small_objects,
+    benchmark_range_writes,
+    benchmark_sharded_listing,
+    benchmark_listing_memory,
+]
+
+
+def main():
+    """Ejecuta todos los benchmarks"""
+    print("🚀 BENCHMARKS DE TRANSFERENCIAS - S3Manager")
+    print("=" * 50)
+    ok = True
+    for benchmark in BENCHMARKS:
+        ok = bool(benchmark()) and ok
+        print()
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
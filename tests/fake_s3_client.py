@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+"""
+Cliente S3 simulado en memoria para las pruebas sin conexión
+Autor: EDF Developer - 2025
+"""
+
+import base64
+import hashlib
+import io
+import threading
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from botocore.exceptions import ClientError
+
+
+def _listing_response(page):
+    """Respuesta de list_objects_v2 para una página de entradas de level_entries"""
+    response = {'Contents': [entry for entry in page if 'Key' in entry], 'KeyCount': len(page)}
+    prefixes = [entry for entry in page if 'Prefix' in entry]
+    if prefixes:
+        response['CommonPrefixes'] = prefixes
+    return response
+
+
+class FakePaginator:
+    """Paginador de list_objects_v2 sobre los objetos del cliente simulado"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def paginate(self, Bucket, Prefix='', Delimiter=None, PaginationConfig=None, **kwargs):
+        page_size = (PaginationConfig or {}).get('PageSize', self.client.page_size)
+        entries = self.client.level_entries(Bucket, Prefix, Delimiter)
+        for start in range(0, max(len(entries), 1), page_size):
+            with self.client._lock:
+                self.client.calls.append('list_objects_v2')
+            page = entries[start:start + page_size]
+            if not page:
+                yield {'KeyCount': 0}
+                continue
+            yield _listing_response(page)
+
+
+class FakeVersionPaginator:
+    """Paginador de list_object_versions: versiones actuales, antiguas y marcadores"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def paginate(self, Bucket, Prefix='', PaginationConfig=None, **kwargs):
+        page_size = (PaginationConfig or {}).get('PageSize', self.client.page_size)
+        entries = self.client.version_listing(Bucket, Prefix)
+        for start in range(0, max(len(entries), 1), page_size):
+            with self.client._lock:
+                self.client.calls.append('list_object_versions')
+            page = entries[start:start + page_size]
+            yield {
+                'Versions': [entry for entry in page if 'Size' in entry],
+                'DeleteMarkers': [entry for entry in page if 'Size' not in entry],
+                'IsTruncated': start + page_size < len(entries),
+            }
+
+
+def numbered_keys(count, pattern='datos/{:05d}'):
+    """Claves numeradas en orden para llenar un bucket de prueba"""
+    return [pattern.format(i) for i in range(count)]
+
+
+class FakeS3Client:
+    """Implementa el subconjunto de la API de boto3 S3 que usa S3Manager"""
+
+    def __init__(self, objects=None, fail_keys=None, latency=0):
+        self._lock = threading.Lock()
+        # Latencia simulada por petición, dentro de la ventana de concurrencia
+        self.latency = latency
+        # (bucket, clave) -> bytes
+        self.objects = {}
+        # (bucket, clave) -> ETag de la subida multiparte que creó el objeto
+        self.multipart_etags = {}
+        # (bucket, clave) -> tamaños de las partes de la subida multiparte
+        self.part_sizes = {}
+        # (bucket, clave) -> checksums adicionales ({'ChecksumSHA256': ...})
+        self.checksums = {}
+        # Claves que se devuelven con un byte alterado
+        self.corrupt_keys = set()
+        self.fail_keys = set(fail_keys or [])
+        self.calls = []
+        # (bucket, clave) -> versiones anteriores y marcadores de borrado,
+        # como dicts {'VersionId': ..., 'Size': ...} (sin 'Size' si es un marcador)
+        self.old_versions = {}
+        self.versioning = {}  # bucket -> 'Enabled' / 'Suspended'
+        self.deleted_buckets = []
+        self.lifecycle_rules = {}  # bucket -> reglas de ciclo de vida
+        self.locations = {}  # bucket -> LocationConstraint (None en us-east-1)
+        self.meta = SimpleNamespace(region_name='us-east-1')
+        self.multipart_uploads = {}  # UploadId -> (bucket, clave, {número: bytes})
+        self.aborted_uploads = []
+        self.fail_parts = set()
+        self.page_size = 1000
+        self.active_calls = 0
+        self.max_active_calls = 0
+        for (bucket, key), body in (objects or {}).items():
+            self.put_object(Bucket=bucket, Key=key, Body=body)
+        self.calls.clear()
+
+    @classmethod
+    def with_keys(cls, bucket, keys, body=b'x', page_size=None, **kwargs):
+        """
+        Crea un cliente con las claves indicadas en un bucket. body puede
+        ser el contenido de todos los objetos o una función clave -> bytes;
+        page_size cambia el tamaño de página de los listados. El resto de
+        argumentos se pasan al constructor (fail_keys, latency).
+        """
+        make_body = body if callable(body) else (lambda key: body)
+        client = cls({(bucket, key): make_body(key) for key in keys}, **kwargs)
+        if page_size is not None:
+            client.page_size = page_size
+        return client
+
+    def _enter(self, name):
+        with self._lock:
+            self.calls.append(name)
+            self.active_calls += 1
+            self.max_active_calls = max(self.max_active_calls, self.active_calls)
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _leave(self):
+        with self._lock:
+            self.active_calls -= 1
+
+    def put_object(self, Bucket, Key, Body=b'', **kwargs):
+        if isinstance(Body, str):
+            Body = Body.encode('utf-8')
+        with self._lock:
+            self.calls.append('put_object')
+            self.objects[(Bucket, Key)] = bytes(Body)
+            self.multipart_etags.pop((Bucket, Key), None)
+            self.part_sizes.pop((Bucket, Key), None)
+            self.checksums.pop((Bucket, Key), None)
+            if kwargs.get('ChecksumAlgorithm') == 'SHA256':
+                digest = hashlib.sha256(bytes(Body)).digest()
+                self.checksums[(Bucket, Key)] = {
+                    'ChecksumSHA256': base64.b64encode(digest).decode('ascii')}
+        return {'ETag': self.etag(Bucket, Key)}
+
+    def etag(self, bucket, key):
+        """ETag como lo calcula S3: MD5 del cuerpo o MD5 de los MD5 de las partes"""
+        if (bucket, key) in self.multipart_etags:
+            return self.multipart_etags[(bucket, key)]
+        return f'"{hashlib.md5(self.objects[(bucket, key)]).hexdigest()}"'
+
+    def listing(self, bucket):
+        """Devuelve las entradas de listado de un bucket como list_objects_v2"""
+        return [
+            {
+                'Key': key,
+                'Size': len(body),
+                'ETag': self.etag(bucket, key),
+                'LastModified': datetime(2025, 1, 1, tzinfo=timezone.utc),
+                'StorageClass': 'STANDARD',
+            }
+            for (b, key), body in sorted(self.objects.items())
+            if b == bucket
+        ]
+
+    def level_entries(self, bucket, prefix='', delimiter=None):
+        """Objetos bajo prefix; con delimiter, los de subprefijos se agrupan en {'Prefix': ...}"""
+        entries = []
+        for obj in self.listing(bucket):
+            if not obj['Key'].startswith(prefix):
+                continue
+            rest = obj['Key'][len(prefix):]
+            if delimiter and delimiter in rest:
+                common = prefix + rest[:rest.index(delimiter) + len(delimiter)]
+                if not entries or entries[-1].get('Prefix') != common:
+                    entries.append({'Prefix': common})
+                continue
+            entries.append(obj)
+        return entries
+
+    def version_listing(self, bucket, prefix=''):
+        """Entradas de list_object_versions; la versión actual tiene VersionId 'null'"""
+        entries = []
+        keys = sorted({key for b, key in list(self.objects) + list(self.old_versions)
+                       if b == bucket and key.startswith(prefix)})
+        for key in keys:
+            if (bucket, key) in self.objects:
+                entries.append({'Key': key, 'VersionId': 'null', 'IsLatest': True,
+                                'Size': len(self.objects[(bucket, key)])})
+            for version in self.old_versions.get((bucket, key), []):
+                entries.append(dict(version, Key=key, IsLatest=False))
+        return entries
+
+    def get_paginator(self, operation_name):
+        if operation_name == 'list_object_versions':
+            return FakeVersionPaginator(self)
+        assert operation_name == 'list_objects_v2'
+        return FakePaginator(self)
+
+    def list_objects_v2(self, Bucket, Prefix='', Delimiter=None, StartAfter=None,
+                        ContinuationToken=None, MaxKeys=1000, **kwargs):
+        """Una página de listado; el token de continuación es la última entrada devuelta"""
+        self._enter('list_objects_v2')
+        try:
+            after = ContinuationToken or StartAfter or ''
+            entries = [entry for entry in self.level_entries(Bucket, Prefix, Delimiter)
+                       if entry.get('Key', entry.get('Prefix')) > after]
+            page = entries[:MaxKeys]
+            response = _listing_response(page)
+            response['IsTruncated'] = len(entries) > MaxKeys
+            if response['IsTruncated']:
+                response['NextContinuationToken'] = page[-1].get('Key', page[-1].get('Prefix'))
+            return response
+        finally:
+            self._leave()
+
+    def get_bucket_location(self, Bucket):
+        self.calls.append(('get_bucket_location', Bucket))
+        return {'LocationConstraint': self.locations.get(Bucket)}
+
+    def get_bucket_versioning(self, Bucket):
+        status = self.versioning.get(Bucket)
+        return {'Status': status} if status else {}
+
+    def get_bucket_lifecycle_configuration(self, Bucket):
+        if Bucket not in self.lifecycle_rules:
+            raise ClientError({'Error': {'Code': 'NoSuchLifecycleConfiguration'}},
+                              'GetBucketLifecycleConfiguration')
+        return {'Rules': list(self.lifecycle_rules[Bucket])}
+
+    def put_bucket_lifecycle_configuration(self, Bucket, LifecycleConfiguration):
+        self.calls.append('put_bucket_lifecycle_configuration')
+        self.lifecycle_rules[Bucket] = list(LifecycleConfiguration['Rules'])
+
+    def delete_bucket_lifecycle(self, Bucket):
+        self.calls.append('delete_bucket_lifecycle')
+        self.lifecycle_rules.pop(Bucket, None)
+
+    def delete_bucket(self, Bucket):
+        with self._lock:
+            self.calls.append('delete_bucket')
+            if any(b == Bucket for b, _ in list(self.objects) + list(self.old_versions)):
+                raise ClientError({'Error': {'Code': 'BucketNotEmpty',
+                                             'Message': 'The bucket you tried to delete is not empty'}},
+                                  'DeleteBucket')
+            self.deleted_buckets.append(Bucket)
+        return {}
+
+    def download_file(self, Bucket, Key, Filename, ExtraArgs=None, Callback=None, Config=None):
+        self._enter('download_file')
+        try:
+            if Key in self.fail_keys:
+                raise IOError(f"Fallo simulado descargando {Key}")
+            body = self._body(Bucket, Key)
+            with open(Filename, 'wb') as f:
+                f.write(body)
+            if Callback:
+                Callback(len(body))
+        finally:
+            self._leave()
+
+    def _body(self, bucket, key):
+        body = self.objects[(bucket, key)]
+        if key in self.corrupt_keys and body:
+            body = bytes([body[0] ^ 0xFF]) + body[1:]
+        return body
+
+    def get_object(self, Bucket, Key, Range=None, IfMatch=None, ChecksumMode=None, **kwargs):
+        self._enter('get_object')
+        try:
+            if Key in self.fail_keys:
+                raise IOError(f"Fallo simulado leyendo {Key}")
+            body = self._body(Bucket, Key)
+            if Range:
+                start, end = Range.replace('bytes=', '').split('-')
+                body = body[int(start):int(end) + 1]
+            response = {'Body': io.BytesIO(body), 'ContentLength': len(body),
+                        'ETag': self.etag(Bucket, Key)}
+            if ChecksumMode == 'ENABLED' and not Range:
+                response.update(self.checksums.get((Bucket, Key), {}))
+            return response
+        finally:
+            self._leave()
+
+    def head_object(self, Bucket, Key, PartNumber=None, **kwargs):
+        self._enter('head_object')
+        try:
+            size = len(self.objects[(Bucket, Key)])
+            response = {'ContentLength': size, 'ETag': self.etag(Bucket, Key)}
+            part_sizes = self.part_sizes.get((Bucket, Key))
+            if PartNumber and part_sizes:
+                response['ContentLength'] = part_sizes[PartNumber - 1]
+                response['PartsCount'] = len(part_sizes)
+            return response
+        finally:
+            self._leave()
+
+    def _copy_source(self, CopySource, CopySourceIfMatch=None):
+        source = (CopySource['Bucket'], CopySource['Key'])
+        if CopySource['Key'] in self.fail_keys:
+            raise IOError(f"Fallo simulado copiando {CopySource['Key']}")
+        if CopySourceIfMatch and CopySourceIfMatch != self.etag(*source):
+            raise IOError(f"PreconditionFailed: {CopySource['Key']} ha cambiado")
+        return self.objects[source]
+
+    def copy_object(self, Bucket, Key, CopySource, CopySourceIfMatch=None, **kwargs):
+        self._enter('copy_object')
+        try:
+            body = self._copy_source(CopySource, CopySourceIfMatch)
+            self.put_object(Bucket=Bucket, Key=Key, Body=body)
+            return {'CopyObjectResult': {'ETag': self.etag(Bucket, Key)}}
+        finally:
+            self._leave()
+
+    def upload_part_copy(self, Bucket, Key, UploadId, PartNumber, CopySource,
+                         CopySourceRange, CopySourceIfMatch=None, **kwargs):
+        self._enter('upload_part_copy')
+        try:
+            if PartNumber in self.fail_parts:
+                raise IOError(f"Fallo simulado en la parte {PartNumber}")
+            body = self._copy_source(CopySource, CopySourceIfMatch)
+            start, end = CopySourceRange.replace('bytes=', '').split('-')
+            data = body[int(start):int(end) + 1]
+            with self._lock:
+                self.multipart_uploads[UploadId][2][PartNumber] = data
+            return {'CopyPartResult': {'ETag': f'"{hashlib.md5(data).hexdigest()}"'}}
+        finally:
+            self._leave()
+
+    def create_multipart_upload(self, Bucket, Key, **kwargs):
+        with self._lock:
+            self.calls.append('create_multipart_upload')
+            upload_id = f"upload-{len(self.multipart_uploads) + len(self.aborted_uploads) + 1}"
+            self.multipart_uploads[upload_id] = (Bucket, Key, {})
+        return {'UploadId': upload_id}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body, **kwargs):
+        self._enter('upload_part')
+        try:
+            if PartNumber in self.fail_parts:
+                raise IOError(f"Fallo simulado en la parte {PartNumber}")
+            with self._lock:
+                self.multipart_uploads[UploadId][2][PartNumber] = bytes(Body)
+            return {'ETag': f'"part-{PartNumber}"'}
+        finally:
+            self._leave()
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload, **kwargs):
+        with self._lock:
+            self.calls.append('complete_multipart_upload')
+            _, _, parts = self.multipart_uploads.pop(UploadId)
+            numbers = [part['PartNumber'] for part in MultipartUpload['Parts']]
+            assert numbers == sorted(numbers), "Las partes deben ir en orden"
+            self.objects[(Bucket, Key)] = b''.join(parts[n] for n in numbers)
+            digests = b''.join(hashlib.md5(parts[n]).digest() for n in numbers)
+            self.multipart_etags[(Bucket, Key)] = (
+                f'"{hashlib.md5(digests).hexdigest()}-{len(numbers)}"')
+            self.part_sizes[(Bucket, Key)] = [len(parts[n]) for n in numbers]
+        return {'ETag': self.multipart_etags[(Bucket, Key)]}
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId, **kwargs):
+        with self._lock:
+            self.calls.append('abort_multipart_upload')
+            self.multipart_uploads.pop(UploadId, None)
+            self.aborted_uploads.append(UploadId)
+        return {}
+
+    def delete_objects(self, Bucket, Delete, **kwargs):
+        self._enter('delete_objects')
+        try:
+            deleted, errors = [], []
+            with self._lock:
+                for entry in Delete['Objects']:
+                    if entry['Key'] in self.fail_keys:
+                        errors.append({'Key': entry['Key'], 'Code': 'AccessDenied',
+                                       'Message': 'Fallo simulado'})
+                        continue
+                    version_id = entry.get('VersionId')
+                    if version_id not in (None, 'null'):
+                        versions = self.old_versions.get((Bucket, entry['Key']), [])
+                        versions[:] = [v for v in versions if v['VersionId'] != version_id]
+                        if not versions:
+                            self.old_versions.pop((Bucket, entry['Key']), None)
+                        deleted.append({'Key': entry['Key'], 'VersionId': version_id})
+                        continue
+                    self.objects.pop((Bucket, entry['Key']), None)
+                    self.multipart_etags.pop((Bucket, entry['Key']), None)
+                    self.part_sizes.pop((Bucket, entry['Key']), None)
+                    deleted.append({'Key': entry['Key']})
+            response = {'Errors': errors} if errors else {}
+            if not Delete.get('Quiet'):
+                response['Deleted'] = deleted
+            return response
+        finally:
+            self._leave()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Pruebas del limitador de ancho de banda (token bucket)
+Autor: EDF Developer - 2025
+"""
+
+import os
+import sys
+import threading
+import time
+
+# Añadir el directorio raíz del proyecto al sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bandwidth_limiter import BURST_SECONDS, TokenBucket
+from fake_s3_client import FakeS3Client, numbered_keys
+from s3_transfer_engine import DownloadEngine
+
+BUCKET = 'bucket-de-prueba'
+
+
+def test_unlimited_bucket_never_waits():
+    bucket = TokenBucket()
+    start = time.monotonic()
+    bucket.consume(10 ** 12)
+    assert time.monotonic() - start < 0.05
+
+
+def test_rate_is_respected_across_threads():
+    """Varios hilos comparten el límite: la media no supera la tasa"""
+    rate = 200_000
+    bucket = TokenBucket(rate)
+    total = 100_000
+
+    def consume():
+        for _ in range(10):
+            bucket.consume(total // 40)
+
+    start = time.monotonic()
+    threads = [threading.Thread(target=consume) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - start
+    # La ráfaga inicial se concede sin esperar
+    expected = (total - rate * BURST_SECONDS) / rate
+    assert elapsed >= expected * 0.9
+
+
+def test_rate_change_releases_waiting_threads():
+    """Quitar el límite despierta a los hilos que estaban esperando"""
+    bucket = TokenBucket(1000)
+    done = threading.Event()
+
+    def consume():
+        bucket.consume(1_000_000)
+        done.set()
+
+    threading.Thread(target=consume, daemon=True).start()
+    time.sleep(0.05)
+    assert not done.is_set()
+    bucket.set_rate(None)
+    assert done.wait(1)
+
+
+def test_job_limit_applies_to_downloads(tmp_path):
+    client = FakeS3Client.with_keys(BUCKET, numbered_keys(4, 'f{}.bin'), body=b'x' * 20_000)
+    engine = DownloadEngine(client, max_workers=4, bandwidth=TokenBucket(100_000))
+
+    start = time.monotonic()
+    result = engine.download(BUCKET, client.listing(BUCKET), str(tmp_path))
+
+    assert result.success
+    assert time.monotonic() - start >= (80_000 - 100_000 * BURST_SECONDS) / 100_000 * 0.9
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la eliminación por lotes con DeleteObjects
+Autor: EDF Developer - 2025
+"""
+
+import os
+import sys
+import threading
+
+from botocore.exceptions import ClientError
+
+# Añadir el directorio raíz del proyecto al sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import s3_batch_delete
+from diagnose_s3_permissions import delete_bucket_and_contents, delete_selected_files
+from fake_s3_client import FakeS3Client, numbered_keys
+from s3_batch_delete import BatchDeleter, delete_keys
+
+BUCKET = 'bucket-pruebas'
+
+
+def test_keys_are_deleted_in_parallel_batches_of_1000():
+    client = FakeS3Client.with_keys(BUCKET, numbered_keys(4500), latency=0.02)
+    batches = []
+
+    result = delete_keys(client, BUCKET, client.listing(BUCKET), max_workers=4,
+                         progress_callback=lambda r, deleted, errors: batches.append(len(deleted)))
+
+    assert result.success
+    assert result.deleted == 4500
+    assert not client.objects
+    assert client.calls.count('delete_objects') == 5
+    assert sorted(batches) == [500, 1000, 1000, 1000, 1000]
+    assert client.max_active_calls > 1
+
+
+def test_per_key_errors_do_not_stop_the_batch():
+    client = FakeS3Client.with_keys(BUCKET, numbered_keys(10), fail_keys={'datos/00003', 'datos/00007'})
+
+    result = delete_keys(client, BUCKET, [f"datos/{i:05d}" for i in range(10)])
+
+    assert not result.success
+    assert sorted(key for key, _ in result.errors) == ['datos/00003', 'datos/00007']
+    assert result.deleted == 8
+    assert set(key for _, key in client.objects) == {'datos/00003', 'datos/00007'}
+    assert delete_selected_files(client, BUCKET, [{'Key': 'datos/00003'}]) is False
+
+
+class ThrottledClient(FakeS3Client):
+    """Rechaza la primera petición con SlowDown y una clave suelta después"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.rejections = ['batch', 'key']
+
+    def delete_objects(self, Bucket, Delete, **kwargs):
+        rejection = self.rejections.pop(0) if self.rejections else None
+        if rejection == 'batch':
+            raise ClientError({'Error': {'Code': 'SlowDown'}}, 'DeleteObjects')
+        if rejection == 'key':
+            slow = Delete['Objects'][0]
+            rest = dict(Delete, Objects=Delete['Objects'][1:])
+            response = super().delete_objects(Bucket, rest, **kwargs)
+            response.setdefault('Errors', []).append(
+                {'Key': slow['Key'], 'Code': 'SlowDown', 'Message': 'Reduzca la velocidad'})
+            return response
+        return super().delete_objects(Bucket, Delete, **kwargs)
+
+
+def test_throttled_batches_and_keys_are_retried(monkeypatch):
+    monkeypatch.setattr(s3_batch_delete, 'RETRY_BACKOFF', 0)
+    client = ThrottledClient({(BUCKET, f"k{i}"): b'x' for i in range(3)})
+
+    deleted = []
+    result = delete_keys(client, BUCKET, ['k0', 'k1', 'k2'],
+                         progress_callback=lambda r, batch_deleted, errors: deleted.extend(batch_deleted))
+
+    assert result.success
+    assert result.deleted == 3 and sorted(deleted) == ['k0', 'k1', 'k2']
+    assert not client.objects
+    assert client.calls.count('delete_objects') == 2
+
+
+def test_cancel_stops_sending_batches():
+    client = FakeS3Client.with_keys(BUCKET, numbered_keys(5000))
+    cancel = threading.Event()
+
+    def stop_after_first(result, deleted, errors):
+        cancel.set()
+
+    result = BatchDeleter(client, max_workers=1, progress_callback=stop_after_first,
+                          cancel_event=cancel).delete(BUCKET, client.listing(BUCKET))
+
+    assert result.cancelled
+    assert result.deleted == 1000
+    assert len(client.objects) == 4000
+
+
+def make_versioned_client(count):
+    client = FakeS3Client.with_keys(BUCKET, numbered_keys(count))
+    client.versioning[BUCKET] = 'Enabled'
+    for i in range(0, count, 2):
+        client.old_versions[(BUCKET, f"datos/{i:05d}")] = [
+            {'VersionId': f"v{i}", 'Size': 10},
+            {'VersionId': f"m{i}"},  # Marcador de borrado
+        ]
+    return client
+
+
+def test_versioned_bucket_is_emptied_while_listing():
+    client = make_versioned_client(3000)
+    client.page_size = 500
+    updates = []
+
+    success, message = delete_bucket_and_contents(
+        client, BUCKET, progress_callback=lambda *counts: updates.append(counts), max_workers=4)
+
+    assert success, message
+    assert client.deleted_buckets == [BUCKET]
+    assert not client.objects and not client.old_versions
+    assert 'han sido eliminados' in message
+    # 3000 actuales + 1500 versiones antiguas + 1500 marcadores
+    assert updates[-1] == (6000, 3000 + 1500 * 10, 6000)
+    assert client.calls.count('delete_objects') == 6
+    # El borrado empieza antes de terminar el listado
+    first_delete = client.calls.index('delete_objects')
+    assert client.calls[first_delete:].count('list_object_versions') > 0
+
+
+def test_unversioned_bucket_does_not_list_versions():
+    client = FakeS3Client.with_keys(BUCKET, numbered_keys(5))
+
+    success, _ = delete_bucket_and_contents(client, BUCKET)
+
+    assert success
+    assert 'list_object_versions' not in client.calls
+
+
+def test_cancelled_emptying_keeps_the_bucket():
+    client = make_versioned_client(4000)
+    cancel = threading.Event()
+
+    success, message = delete_bucket_and_contents(
+        client, BUCKET, progress_callback=lambda *counts: cancel.set(),
+        cancel_event=cancel, max_workers=1)
+
+    assert not success
+    assert 'cancelado' in message
+    assert client.deleted_buckets == []
+    assert 'delete_bucket' not in client.calls
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Pruebas del vaciado de buckets con reglas de ciclo de vida
+Autor: EDF Developer - 2025
+"""
+
+import os
+import sys
+import threading
+
+# Añadir el directorio raíz del proyecto al sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fake_s3_client import FakeS3Client, numbered_keys
+from s3_bucket_expiry import (
+    EXPIRE_ALL_RULE_ID, EXPIRE_RULE_IDS, estimate_remaining, expire_bucket_and_delete
+)
+
+BUCKET = 'bucket-enorme'
+OTHER_RULE = {'ID': 'archivar', 'Filter': {'Prefix': 'logs/'}, 'Status': 'Enabled',
+              'Transitions': [{'Days': 30, 'StorageClass': 'GLACIER'}]}
+
+
+def versioned_client(count):
+    client = FakeS3Client.with_keys(BUCKET, numbered_keys(count, 'k{:04d}'), page_size=100)
+    client.versioning[BUCKET] = 'Enabled'
+    client.old_versions[(BUCKET, 'k0000')] = [{'VersionId': 'v1', 'Size': 1}]
+    client.lifecycle_rules[BUCKET] = [OTHER_RULE]
+    return client
+
+
+def expire_some(client, count):
+    """Simula una pasada del ciclo de vida de S3 que elimina count entradas"""
+    for key in sorted(key for bucket, key in client.objects if bucket == BUCKET)[:count]:
+        del client.objects[(BUCKET, key)]
+        client.old_versions.pop((BUCKET, key), None)
+
+
+def test_rules_expire_until_empty_then_bucket_is_deleted():
+    client = versioned_client(300)
+    estimates = []
+
+    def on_estimate(*values):
+        estimates.append(values)
+        rule_ids = {rule['ID'] for rule in client.lifecycle_rules[BUCKET]}
+        assert EXPIRE_RULE_IDS <= rule_ids and 'archivar' in rule_ids
+        expire_some(client, 150)
+
+    success, message = expire_bucket_and_delete(client, BUCKET, progress_callback=on_estimate,
+                                                poll_interval=0)
+
+    assert success, message
+    assert client.deleted_buckets == [BUCKET]
+    assert [remaining for remaining, *_ in estimates] == [301, 150, 0]
+    assert estimates[0][2:] == (301, False)
+    rule = next(r for r in client.lifecycle_rules[BUCKET] if r['ID'] == EXPIRE_ALL_RULE_ID)
+    assert rule['NoncurrentVersionExpiration'] == {'NoncurrentDays': 1}
+    assert rule['AbortIncompleteMultipartUpload'] == {'DaysAfterInitiation': 1}
+
+
+def test_large_buckets_report_a_lower_bound():
+    client = versioned_client(500)
+    assert estimate_remaining(client, BUCKET, max_pages=2) == (200, True)
+    assert estimate_remaining(client, BUCKET, max_pages=10) == (501, False)
+
+
+def test_cancel_removes_only_the_expiry_rules():
+    client = versioned_client(10)
+    cancel = threading.Event()
+
+    success, message = expire_bucket_and_delete(
+        client, BUCKET, progress_callback=lambda *values: cancel.set(), cancel_event=cancel)
+
+    assert not success
+    assert 'cancelada' in message
+    assert client.lifecycle_rules[BUCKET] == [OTHER_RULE]
+    assert client.deleted_buckets == []
+
+
+def test_stop_waiting_keeps_the_rules():
+    client = versioned_client(10)
+    stop = threading.Event()
+
+    def on_estimate(*values):
+        stop.set()
+
+    success, message = expire_bucket_and_delete(
+        client, BUCKET, progress_callback=on_estimate, stop_event=stop, poll_interval=0)
+
+    assert not success
+    assert 'siguen activas' in message
+    assert EXPIRE_RULE_IDS <= {rule['ID'] for rule in client.lifecycle_rules[BUCKET]}
+    assert client.deleted_buckets == []
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Pruebas del listado de buckets por páginas
+Autor: EDF Developer - 2025
+"""
+
+import os
+import sys
+import threading
+
+# Añadir el directorio raíz del proyecto al sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from diagnose_s3_permissions import iter_bucket_pages, iter_folder_pages, list_bucket_contents
+from fake_s3_client import FakeS3Client, numbered_keys
+
+BUCKET = 'bucket-listado'
+
+
+def test_pages_arrive_before_the_listing_ends():
+    client = FakeS3Client.with_keys(BUCKET, numbered_keys(250), page_size=100)
+    pages = iter_bucket_pages(client, BUCKET)
+
+    first = next(pages)
+    assert len(first) == 100
+    assert client.calls.count('list_objects_v2') == 1
+    assert [len(page) for page in pages] == [100, 50]
+    assert len(list_bucket_contents(client, BUCKET)) == 250
+
+
+def test_cancel_stops_before_the_next_page():
+    client = FakeS3Client.with_keys(BUCKET, numbered_keys(1000), page_size=100)
+    cancel = threading.Event()
+    received = []
+
+    for page in iter_bucket_pages(client, BUCKET, cancel_event=cancel):
+        received.extend(page)
+        if len(received) >= 300:
+            cancel.set()
+
+    assert len(received) == 300
+    assert client.calls.count('list_objects_v2') == 3
+
+
+def test_folder_listing_reads_one_level():
+    client = FakeS3Client.with_keys(BUCKET, (
+        'raiz.txt', 'fotos/', 'fotos/2024/a.jpg', 'fotos/2024/b.jpg', 'fotos/c.jpg', 'videos/d.mp4'))
+
+    root = list(iter_folder_pages(client, BUCKET))
+    assert root == [(['fotos/', 'videos/'], [next(o for o in client.listing(BUCKET) if o['Key'] == 'raiz.txt')])]
+    assert client.calls.count('list_objects_v2') == 1
+
+    folders, objects = zip(*iter_folder_pages(client, BUCKET, 'fotos/'))
+    assert sum(folders, []) == ['fotos/2024/']
+    assert [obj['Key'] for page in objects for obj in page] == ['fotos/c.jpg']
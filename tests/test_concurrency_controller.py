@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Pruebas del control adaptativo de concurrencia (AIMD)
+Autor: EDF Developer - 2025
+"""
+
+import os
+import sys
+import threading
+
+from botocore.exceptions import ClientError
+
+# Añadir el directorio raíz del proyecto al sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from concurrency_controller import AdaptiveConcurrency, is_throttle_error, sparkline
+from fake_s3_client import FakeS3Client, numbered_keys
+from s3_transfer_engine import DownloadEngine
+from transfer_settings_manager import TransferSettings
+
+BUCKET = 'bucket-de-prueba'
+
+
+def slow_down_error():
+    return ClientError(
+        {'Error': {'Code': 'SlowDown', 'Message': 'Please reduce your request rate.'},
+         'ResponseMetadata': {'HTTPStatusCode': 503}},
+        'GetObject'
+    )
+
+
+def test_additive_increase_and_multiplicative_decrease():
+    transferred = [0]
+    controller = AdaptiveConcurrency(4, maximum=16, bytes_source=lambda: transferred[0],
+                                     window_seconds=0)
+
+    for _ in range(3):
+        for _ in range(controller.limit):
+            assert controller.acquire()
+        transferred[0] += 1000
+        for _ in range(controller.limit):
+            controller.release(0.01)
+    assert controller.limit > 4
+
+    before = controller.limit
+    controller.record_throttle()
+    assert controller.limit == before // 2
+    assert is_throttle_error(slow_down_error())
+    assert not is_throttle_error(IOError("disco lleno"))
+    assert sparkline([1, 2, 3]) == '▁▄█'
+
+
+def test_throttled_objects_are_retried_with_lower_concurrency(tmp_path):
+    """Un SlowDown reduce la concurrencia y el objeto se reintenta"""
+    client = FakeS3Client.with_keys(BUCKET, numbered_keys(20, 'f{:02d}.txt'))
+    original = client.get_object
+    throttled = set()
+    lock = threading.Lock()
+
+    def flaky_get(Bucket, Key, **kwargs):
+        with lock:
+            first_time = Key not in throttled
+            throttled.add(Key)
+        if first_time and Key.endswith('3.txt'):
+            raise slow_down_error()
+        return original(Bucket=Bucket, Key=Key, **kwargs)
+
+    client.get_object = flaky_get
+    engine = DownloadEngine(client, max_workers=8,
+                            settings=TransferSettings(adaptive_concurrency=True))
+    result = engine.download(BUCKET, client.listing(BUCKET), str(tmp_path))
+
+    assert result.success
+    assert len(result.succeeded) == 20
+    assert engine.progress.concurrency.limit < 8
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la caché persistente de listados
+Autor: EDF Developer - 2025
+"""
+
+import os
+import sys
+import time
+
+# Añadir el directorio raíz del proyecto al sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from diagnose_s3_permissions import iter_folder_pages
+from fake_s3_client import FakeS3Client
+from listing_cache import ListingCache, entry_sort_key
+
+BUCKET = 'bucket-cache'
+
+
+def list_level(client, prefix=''):
+    entries = []
+    for folders, objects in iter_folder_pages(client, BUCKET, prefix):
+        entries.extend([{'Prefix': p} for p in folders] + objects)
+    return entries
+
+
+def test_levels_survive_reopening(tmp_path):
+    client = FakeS3Client.with_keys(BUCKET, ('a.txt', 'fotos/b.jpg', 'fotos/2024/c.jpg'), body=b'datos')
+    cache = ListingCache(tmp_path / 'cache.sqlite3')
+    assert cache.get_level(BUCKET, '') == (None, None)
+    assert cache.store_level(BUCKET, '', list_level(client), listed_at=1000.0)
+    cache.close()
+
+    reopened = ListingCache(tmp_path / 'cache.sqlite3')
+    entries, listed_at = reopened.get_level(BUCKET, '')
+    assert listed_at == 1000.0
+    assert entries == sorted(list_level(client), key=entry_sort_key)
+
+
+def test_only_changed_levels_are_rewritten(tmp_path):
+    client = FakeS3Client.with_keys(BUCKET, ('a.txt', 'fotos/b.jpg'))
+    cache = ListingCache(tmp_path / 'cache.sqlite3')
+    cache.store_level(BUCKET, '', list_level(client))
+    cache.store_level(BUCKET, 'fotos/', list_level(client, 'fotos/'))
+
+    assert not cache.store_level(BUCKET, '', list_level(client))
+    client.put_object(Bucket=BUCKET, Key='fotos/b.jpg', Body=b'otro contenido')
+    assert not cache.store_level(BUCKET, '', list_level(client))
+    assert cache.store_level(BUCKET, 'fotos/', list_level(client, 'fotos/'))
+    assert cache.get_level(BUCKET, 'fotos/')[0][0]['Size'] == len(b'otro contenido')
+
+
+def test_stale_levels_and_forgetting_subtrees(tmp_path):
+    cache = ListingCache(tmp_path / 'cache.sqlite3')
+    old = time.time() - 3600
+    for prefix in ('', 'datos_2024/', 'datos_2024/enero/', 'datosX2024/'):
+        cache.store_level(BUCKET, prefix, [], listed_at=old)
+    cache.store_level(BUCKET, 'reciente/', [])
+
+    assert cache.stale_levels(BUCKET, 60, exclude='') == ['datosX2024/', 'datos_2024/', 'datos_2024/enero/']
+
+    cache.forget_level(BUCKET, 'datos_2024/')
+    assert cache.get_level(BUCKET, 'datos_2024/enero/') == (None, None)
+    assert cache.get_level(BUCKET, 'datosX2024/')[0] == []
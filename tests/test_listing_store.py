@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Pruebas del almacén compacto de listados
+Autor: EDF Developer - 2025
+"""
+
+import os
+import sys
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+# Añadir el directorio raíz del proyecto al sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fake_s3_client import FakeS3Client
+from listing_store import ListingStore, pack_etag, split_key
+
+BUCKET = 'bucket-almacen'
+
+
+def make_entries(count):
+    modified = datetime(2025, 3, 1, 12, 30, tzinfo=timezone.utc)
+    return [
+        {
+            'Key': f"datos/{i % 50:03d}/registro-{i:08d}.json",
+            'Size': i * 37,
+            'ETag': f'"{i:032x}"' if i % 10 else f'"{i:032x}-{i % 7 + 2}"',
+            'LastModified': modified + timedelta(seconds=i),
+            'StorageClass': 'STANDARD' if i % 3 else 'GLACIER',
+        }
+        for i in range(count)
+    ]
+
+
+def test_entries_round_trip():
+    client = FakeS3Client.with_keys(BUCKET, ('a.txt', 'fotos/año 2024/ñandú.jpg', 'fotos/b.jpg', 'vacío'),
+                                    body=lambda key: key.encode('utf-8'))
+    listing = client.listing(BUCKET) + [{'Prefix': 'fotos/'}, {'Prefix': 'fotos/año 2024/'}]
+    store = ListingStore(listing)
+
+    assert len(store) == len(listing)
+    assert list(store) == listing
+    assert store[-1] == {'Prefix': 'fotos/año 2024/'}
+    assert store[1:3] == listing[1:3]
+    assert store.key(1) == 'fotos/año 2024/ñandú.jpg'
+    assert store.is_folder(-2) and not store.is_folder(0)
+    assert store.total_size() == sum(obj['Size'] for obj in client.listing(BUCKET))
+    with pytest.raises(IndexError):
+        store[len(listing)]
+
+
+def test_unusual_entries_are_kept_as_they_came():
+    listing = [
+        {'Key': 'sin-etag', 'Size': 0},
+        {'Key': 'mayusculas', 'Size': 1, 'ETag': '"D41D8CD98F00B204E9800998ECF8427E"'},
+        {'Key': 'multiparte', 'Size': 2, 'ETag': '"d41d8cd98f00b204e9800998ecf8427e-12"'},
+        {'Key': 'otro-proveedor', 'Size': 3, 'ETag': 'abc', 'StorageClass': 'ONEZONE_IA'},
+    ]
+    store = ListingStore()
+    store.extend(listing)
+
+    assert list(store) == listing
+    assert pack_etag('"d41d8cd98f00b204e9800998ecf8427e-12"')[1] == 12
+    assert pack_etag('"d41d8cd98f00b204e9800998ecf8427e-012"') is None
+    assert pack_etag(None) is None
+
+
+def test_split_key():
+    assert split_key('a/b/c.txt') == ('a/b/', 'c.txt')
+    assert split_key('a/b/') == ('a/', 'b/')
+    assert split_key('raiz.txt') == ('', 'raiz.txt')
+
+
+def test_store_is_much_smaller_than_dicts():
+    count = 20000
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        entries = make_entries(count)
+        dicts_bytes = tracemalloc.get_traced_memory()[0] - before
+        store = ListingStore(entries)
+        store_bytes = tracemalloc.get_traced_memory()[0] - before - dicts_bytes
+    finally:
+        tracemalloc.stop()
+
+    assert list(store) == entries
+    assert dicts_bytes / store_bytes >= 5
+    assert store.nbytes() <= store_bytes * 1.5
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Pruebas de los archivos preasignados y del pool de búferes
+Autor: EDF Developer - 2025
+"""
+
+import io
+import os
+import sys
+import threading
+
+# Añadir el directorio raíz del proyecto al sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from preallocated_file import BufferPool, PreallocatedFile, read_into_file
+from s3_transfer_engine import split_ranges
+
+
+class ReadOnlyBody:
+    """Cuerpo de respuesta sin readinto, como en versiones antiguas de botocore"""
+
+    def __init__(self, data):
+        self._stream = io.BytesIO(data)
+
+    def read(self, size=-1):
+        return self._stream.read(size)
+
+
+def test_parallel_ranges_reassemble_in_place(tmp_path):
+    """Varios hilos escriben rangos en un único descriptor preasignado"""
+    payload = os.urandom(3 * 1024 * 1024 + 17)
+    path = str(tmp_path / 'destino.s3part')
+    buffers = BufferPool(64 * 1024)
+
+    with PreallocatedFile(path, len(payload)) as target:
+        assert os.path.getsize(path) == len(payload)
+
+        def write_range(byte_range):
+            start, end = byte_range
+            body = io.BytesIO(payload[start:end + 1])
+            assert read_into_file(body, target, start, end - start + 1, buffers) == end - start + 1
+
+        threads = [threading.Thread(target=write_range, args=(r,))
+                   for r in split_ranges(len(payload), 512 * 1024)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    with open(path, 'rb') as f:
+        assert f.read() == payload
+    assert buffers.allocated <= len(threads)
+
+
+def test_reopen_keeps_completed_ranges(tmp_path):
+    path = str(tmp_path / 'parcial.s3part')
+    with PreallocatedFile(path, 10) as target:
+        target.write_at(0, b'abcde')
+    with PreallocatedFile(path, 10, create=False) as target:
+        target.write_at(5, memoryview(b'fghij'))
+    with open(path, 'rb') as f:
+        assert f.read() == b'abcdefghij'
+
+
+def test_buffers_are_reused_and_short_bodies_detected(tmp_path):
+    buffers = BufferPool(4)
+    seen = []
+    with PreallocatedFile(str(tmp_path / 'a'), 10) as target:
+        copied = read_into_file(ReadOnlyBody(b'0123456'), target, 0, 10, buffers,
+                                on_chunk=lambda chunk: seen.append(bytes(chunk)))
+        read_into_file(io.BytesIO(b'xyz'), target, 7, 3, buffers)
+
+    assert copied == 7
+    assert seen == [b'0123', b'456']
+    assert (buffers.allocated, buffers.reused) == (1, 1)
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la exportación de objetos a un archivo zip o tar
+Autor: EDF Developer - 2025
+"""
+
+import os
+import sys
+import tarfile
+import threading
+import zipfile
+
+import pytest
+
+# Añadir el directorio raíz del proyecto al sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_s3_client import FakeS3Client
+from s3_archive import ArchiveEngine, archive_format_for_path, zstandard
+from transfer_settings_manager import MB, TransferSettings
+
+BUCKET = 'bucket-de-prueba'
+
+
+def make_client(count=20, fail_keys=None):
+    objects = {(BUCKET, f"datos/archivo-{i:03d}.txt"): f"contenido {i}".encode() for i in range(count)}
+    objects[(BUCKET, 'datos/grande.bin')] = os.urandom(6 * MB)
+    objects[(BUCKET, 'datos/carpeta/')] = b''
+    return FakeS3Client(objects, fail_keys=fail_keys, latency=0.002)
+
+
+def test_format_from_extension():
+    assert archive_format_for_path('copia.TAR.ZST') == ('tar', 'zstd')
+    assert archive_format_for_path('copia.tgz') == ('tar', 'gzip')
+    assert archive_format_for_path('copia.zip') == ('zip', None)
+    with pytest.raises(ValueError):
+        archive_format_for_path('copia.rar')
+
+
+def test_zip_export_keeps_order_and_contents(tmp_path):
+    """El zip contiene todos los objetos en orden, sin archivos temporales"""
+    client = make_client()
+    listing = client.listing(BUCKET)
+    output = tmp_path / 'salida' / 'copia.zip'
+    engine = ArchiveEngine(client, max_workers=4,
+                           settings=TransferSettings(multipart_chunksize_mb=5))
+
+    result = engine.export(BUCKET, listing, str(output), 'zip', strip_prefix='datos/')
+
+    assert result.success
+    assert len(result.succeeded) == 21
+    assert os.listdir(output.parent) == ['copia.zip']
+    with zipfile.ZipFile(output) as archive:
+        names = archive.namelist()
+        assert names == sorted(names)
+        assert archive.read('archivo-007.txt') == b'contenido 7'
+        assert archive.read('grande.bin') == client.objects[(BUCKET, 'datos/grande.bin')]
+    assert client.max_active_calls > 1
+    assert engine.progress.transferred_bytes == engine.progress.total_bytes
+
+
+@pytest.mark.parametrize('compression', [None, 'gzip', 'zstd'])
+def test_tar_export(tmp_path, compression):
+    if compression == 'zstd' and zstandard is None:
+        pytest.skip("zstandard no instalado")
+    client = make_client(count=5, fail_keys={'datos/archivo-002.txt'})
+    output = tmp_path / 'copia.tar'
+    result = ArchiveEngine(client, max_workers=3).export(
+        BUCKET, client.listing(BUCKET), str(output), 'tar', compression)
+
+    assert [key for key, _ in result.failed] == ['datos/archivo-002.txt']
+    if compression == 'zstd':
+        with open(output, 'rb') as f:
+            raw = zstandard.ZstdDecompressor().stream_reader(f).read()
+        output.write_bytes(raw)
+    with tarfile.open(output) as archive:
+        names = archive.getnames()
+        assert 'datos/archivo-002.txt' not in names
+        assert archive.extractfile('datos/archivo-004.txt').read() == b'contenido 4'
+
+
+def test_cancelled_export_leaves_no_file(tmp_path):
+    client = make_client()
+    cancel_event = threading.Event()
+
+    def cancel_after_first(progress, key, finished):
+        if finished:
+            cancel_event.set()
+
+    output = tmp_path / 'copia.zip'
+    result = ArchiveEngine(client, max_workers=2, cancel_event=cancel_event,
+                           progress_callback=cancel_after_first).export(
+        BUCKET, client.listing(BUCKET), str(output))
+
+    assert result.cancelled
+    assert os.listdir(tmp_path) == []
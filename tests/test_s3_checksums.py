@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Pruebas del cálculo de ETag compatibles con S3
+Autor: EDF Developer - 2025
+"""
+
+import hashlib
+import os
+import sys
+
+# Añadir el directorio raíz del proyecto al sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_s3_client import FakeS3Client
+from s3_checksums import S3ETagHasher, etag_is_comparable, file_etag, verifier_for_response
+from s3_transfer_engine import DownloadEngine, UploadEngine, collect_upload_items
+from transfer_settings_manager import MB, TransferSettings
+
+BUCKET = 'bucket-de-prueba'
+
+
+def test_multipart_etag_formula(tmp_path):
+    """El ETag multiparte es el MD5 de los MD5 de las partes más '-N'"""
+    data = os.urandom(25)
+    path = tmp_path / 'datos.bin'
+    path.write_bytes(data)
+
+    parts = [data[0:10], data[10:20], data[20:25]]
+    expected = hashlib.md5(b''.join(hashlib.md5(p).digest() for p in parts)).hexdigest()
+
+    hasher = S3ETagHasher(part_size=10)
+    for start in range(0, len(data), 3):  # Trozos que no coinciden con las partes
+        hasher.update(data[start:start + 3])
+    assert hasher.hexdigest() == f"{expected}-3"
+    assert file_etag(str(path), part_size=10) == f"{expected}-3"
+    assert file_etag(str(path)) == hashlib.md5(data).hexdigest()
+
+
+def test_etag_comparability():
+    """Solo se comparan ETag con el mismo número de partes"""
+    assert etag_is_comparable('"0123456789abcdef0123456789abcdef"', 0)
+    assert etag_is_comparable('"0123456789abcdef0123456789abcdef-3"', 3)
+    assert not etag_is_comparable('"0123456789abcdef0123456789abcdef-3"', 4)
+    assert not etag_is_comparable('"0123456789abcdef0123456789abcdef-3"', 0)
+
+
+def test_verifier_choice():
+    """Se prefiere un checksum adicional; con SSE-KMS el ETag no sirve"""
+    etag = '"0123456789abcdef0123456789abcdef"'
+    assert verifier_for_response({'ETag': etag, 'ChecksumSHA256': 'abc='}).algorithm == 'ChecksumSHA256'
+    assert verifier_for_response({'ETag': etag}).algorithm == 'ETag'
+    assert verifier_for_response({'ETag': etag, 'ServerSideEncryption': 'aws:kms'}) is None
+    assert verifier_for_response({'ETag': etag[:-1] + '-2"'}) is None
+    assert verifier_for_response({'ETag': etag, 'ChecksumCRC32': 'AAAAAA==-3'}).algorithm == 'ETag'
+
+
+def test_download_verifies_md5_and_sha256(tmp_path):
+    """Las descargas verificadas comprueban el MD5 o el SHA256 al escribir"""
+    client = FakeS3Client({(BUCKET, 'a.txt'): b'uno', (BUCKET, 'b.txt'): b'dos'})
+    client.put_object(Bucket=BUCKET, Key='c.txt', Body=b'tres', ChecksumAlgorithm='SHA256')
+    client.corrupt_keys.add('b.txt')
+    engine = DownloadEngine(client, settings=TransferSettings(verify_integrity=True))
+
+    result = engine.download(BUCKET, client.listing(BUCKET), str(tmp_path))
+
+    assert sorted(result.verification.verified) == ['a.txt', 'c.txt']
+    assert result.verification.mismatched == ['b.txt']
+    assert [key for key, _ in result.failed] == ['b.txt']
+    assert 'no coincide' in result.failed[0][1]
+    assert not (tmp_path / 'b.txt').exists()
+    assert not (tmp_path / 'b.txt.s3part').exists()
+    assert 'download_file' not in client.calls
+
+
+def test_multipart_etag_verified_with_aligned_ranges(tmp_path):
+    """El ETag multiparte se comprueba con rangos alineados a las partes originales"""
+    payload = os.urandom(12 * MB)
+    source = tmp_path / 'grande.bin'
+    source.write_bytes(payload)
+    client = FakeS3Client()
+    upload_settings = TransferSettings(multipart_threshold_mb=5, multipart_chunksize_mb=5)
+    UploadEngine(client, settings=upload_settings).upload(BUCKET, collect_upload_items([str(source)]))
+    client.calls.clear()
+
+    settings = TransferSettings(multipart_chunksize_mb=16, verify_integrity=True)
+    result = DownloadEngine(client, settings=settings).download(
+        BUCKET, client.listing(BUCKET), str(tmp_path / 'destino'))
+
+    assert result.success
+    assert result.verification.verified == ['grande.bin']
+    assert client.calls.count('get_object') == 3
+    assert (tmp_path / 'destino' / 'grande.bin').read_bytes() == payload
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la copia y el movimiento de objetos en el lado del servidor
+Autor: EDF Developer - 2025
+"""
+
+import os
+import sys
+
+import pytest
+
+# Añadir el directorio raíz del proyecto al sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_s3_client import FakeS3Client
+import s3_copy
+from s3_client_pool import S3ClientPool
+from s3_copy import CopyEngine, PrefixRenameEngine, client_for_bucket, copy_destination_key
+from transfer_journal import TransferJournal
+from transfer_settings_manager import MB, TransferSettings
+
+SOURCE = 'bucket-origen'
+DEST = 'bucket-destino'
+SETTINGS = TransferSettings(multipart_threshold_mb=8, multipart_chunksize_mb=5)
+
+
+def make_client(fail_keys=None):
+    objects = {(SOURCE, f"datos/archivo-{i:02d}.txt"): f"contenido {i}".encode() for i in range(10)}
+    objects[(SOURCE, 'datos/grande.bin')] = os.urandom(12 * MB)
+    return FakeS3Client(objects, fail_keys=fail_keys, latency=0.002)
+
+
+def test_destination_key():
+    assert copy_destination_key('datos/a.txt', 'copia') == 'copia/datos/a.txt'
+    assert copy_destination_key('datos/a.txt', 'copia/', strip_prefix='datos/') == 'copia/a.txt'
+    assert copy_destination_key('datos/a.txt') == 'datos/a.txt'
+
+
+def test_copy_between_buckets(tmp_path):
+    """Los pequeños usan copy_object y el grande partes copiadas en paralelo"""
+    client = make_client()
+    engine = CopyEngine(client, max_workers=4, settings=SETTINGS)
+
+    result = engine.copy(SOURCE, client.listing(SOURCE), DEST, 'copia')
+
+    assert result.success
+    assert len(result.succeeded) == 11
+    assert client.calls.count('copy_object') == 10
+    assert client.calls.count('upload_part_copy') == 3
+    for (bucket, key), body in list(client.objects.items()):
+        if bucket == SOURCE:
+            assert client.objects[(DEST, f"copia/{key}")] == body
+    assert client.etag(DEST, 'copia/datos/grande.bin').endswith('-3"')
+    assert engine.progress.transferred_bytes == engine.progress.total_bytes
+    assert client.max_active_calls > 1
+
+
+def test_move_deletes_only_copied_sources():
+    client = make_client(fail_keys={'datos/archivo-03.txt'})
+    result = CopyEngine(client, max_workers=4, settings=SETTINGS).copy(
+        SOURCE, client.listing(SOURCE), DEST, move=True)
+
+    assert [key for key, _ in result.failed] == ['datos/archivo-03.txt']
+    assert len(result.moved) == 10
+    remaining = [key for bucket, key in client.objects if bucket == SOURCE]
+    assert remaining == ['datos/archivo-03.txt']
+    assert (DEST, 'datos/grande.bin') in client.objects
+
+
+def test_move_deletes_sources_while_copying(monkeypatch):
+    """Los originales se eliminan por lotes durante la copia, no al final"""
+    monkeypatch.setattr(s3_copy, 'DELETE_BATCH_SIZE', 3)
+    client = make_client()
+    small = [obj for obj in client.listing(SOURCE) if obj['Size'] < MB]
+
+    result = CopyEngine(client, max_workers=1, settings=SETTINGS).copy(SOURCE, small, DEST, move=True)
+
+    assert len(result.moved) == 10
+    calls = [call for call in client.calls if call in ('copy_object', 'delete_objects')]
+    # El primer lote se elimina mientras quedan objetos por copiar
+    assert calls.index('delete_objects') < calls.count('copy_object') // 2
+    assert calls.count('delete_objects') == 4
+
+
+def test_failed_part_aborts_multipart_copy():
+    client = make_client()
+    client.fail_parts = {2}
+    large = [obj for obj in client.listing(SOURCE) if obj['Key'] == 'datos/grande.bin']
+
+    result = CopyEngine(client, settings=SETTINGS).copy(SOURCE, large, DEST, move=True)
+
+    assert [key for key, _ in result.failed] == ['datos/grande.bin']
+    assert client.aborted_uploads and not client.multipart_uploads
+    assert (DEST, 'datos/grande.bin') not in client.objects
+    assert (SOURCE, 'datos/grande.bin') in client.objects
+
+
+def test_failed_abort_is_reported_in_result(capsys):
+    client = make_client()
+    client.fail_parts = {2}
+
+    def abort_multipart_upload(**kwargs):
+        raise IOError("Sin conexión")
+
+    client.abort_multipart_upload = abort_multipart_upload
+    large = [obj for obj in client.listing(SOURCE) if obj['Key'] == 'datos/grande.bin']
+
+    result = CopyEngine(client, settings=SETTINGS).copy(SOURCE, large, DEST, dest_prefix='copia/')
+
+    assert result.abort_errors == [('copia/datos/grande.bin', 'Sin conexión')]
+    assert '1 copias multiparte sin abortar' in result.summary()
+    assert capsys.readouterr().out == ''
+
+
+def test_copy_onto_itself_is_rejected():
+    client = make_client()
+    with pytest.raises(ValueError):
+        CopyEngine(client).copy(SOURCE, client.listing(SOURCE), SOURCE)
+
+
+class CrashingDeleteClient(FakeS3Client):
+    """Se interrumpe al eliminar los originales, como si el proceso muriese"""
+
+    def delete_objects(self, Bucket, Delete, **kwargs):
+        raise KeyboardInterrupt("Proceso interrumpido")
+
+
+def test_rename_prefix_in_batches():
+    client = make_client()
+    client.page_size = 4
+    for i in range(2500):
+        client.objects[(SOURCE, f"datos/lote/{i:04d}")] = b'x'
+
+    engine = PrefixRenameEngine(client, max_workers=8, settings=SETTINGS)
+    result = engine.rename(SOURCE, 'datos', 'renombrados/')
+
+    assert result.success
+    assert len(result.moved) == 2511
+    assert not [key for bucket, key in client.objects if key.startswith('datos/')]
+    assert client.objects[(SOURCE, 'renombrados/archivo-04.txt')] == b'contenido 4'
+    assert client.calls.count('delete_objects') == 3
+    assert engine.progress.total_objects == 2511
+
+
+def test_interrupted_rename_resumes_without_recopying(tmp_path):
+    journal = TransferJournal(tmp_path / 'journal.sqlite3')
+    crashing = CrashingDeleteClient({(SOURCE, f"a/{i}.txt"): b'dato' for i in range(5)})
+    with pytest.raises(KeyboardInterrupt):
+        PrefixRenameEngine(crashing).rename(SOURCE, 'a/', 'b/', journal=journal)
+    assert len([key for _, key in crashing.objects if key.startswith('b/')]) == 5
+
+    # Reanudar con un cliente que vea el mismo estado del bucket
+    client = FakeS3Client()
+    client.objects = dict(crashing.objects)
+    result = PrefixRenameEngine(client).rename(SOURCE, 'a/', 'b/', journal=journal)
+    journal.close()
+
+    assert result.success
+    assert len(result.resumed) == 5
+    assert 'copy_object' not in client.calls
+    assert sorted(key for _, key in client.objects) == [f"b/{i}.txt" for i in range(5)]
+
+
+def test_rename_rejects_nested_prefixes():
+    with pytest.raises(ValueError):
+        PrefixRenameEngine(make_client()).rename(SOURCE, 'datos/', 'datos/viejos/')
+
+
+def test_destination_client_in_bucket_region():
+    """Los buckets antiguos de Irlanda ('EU') usan el cliente compartido de eu-west-1"""
+    client = make_client()
+    client.locations = {'irlanda': 'EU'}
+    assert client_for_bucket(client, DEST) is client
+
+    S3ClientPool.clear()
+    try:
+        dest_client = client_for_bucket(client, 'irlanda', 30)
+        assert dest_client.meta.region_name == 'eu-west-1'
+        assert dest_client is S3ClientPool.get_client(30, region_name='eu-west-1')
+    finally:
+        S3ClientPool.clear()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la sincronización prefijo de S3 → carpeta local
+Autor: EDF Developer - 2025
+"""
+
+import os
+import sys
+
+# Añadir el directorio raíz del proyecto al sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_s3_client import FakeS3Client
+import s3_sync
+from s3_sync import (
+    iter_local_files, mirror_prefix_to_folder, normalize_prefix, push_folder_to_prefix
+)
+from transfer_settings_manager import MB, TransferSettings
+
+BUCKET = 'bucket-de-prueba'
+
+
+def make_client():
+    client = FakeS3Client({
+        (BUCKET, 'datos/a.txt'): b'uno',
+        (BUCKET, 'datos/sub/b.txt'): b'dos',
+        (BUCKET, 'datos/sub-c.txt'): b'tres',
+        (BUCKET, 'datos/carpeta/'): b'',
+        (BUCKET, 'otros/x.txt'): b'fuera del prefijo',
+    })
+    client.page_size = 2
+    return client
+
+
+def test_local_walk_matches_s3_key_order(tmp_path):
+    """El recorrido local sigue el orden lexicográfico de las claves"""
+    for relative in ['sub/b.txt', 'sub-c.txt', 'a.txt', 'sub/z/y.txt', 'sub0.txt']:
+        path = tmp_path / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b'x')
+
+    keys = [key for key, _ in iter_local_files(str(tmp_path))]
+    assert keys == sorted(keys)
+    assert keys == ['a.txt', 'sub-c.txt', 'sub/b.txt', 'sub/z/y.txt', 'sub0.txt']
+    assert normalize_prefix('/datos') == 'datos/'
+
+
+def test_first_mirror_downloads_prefix(tmp_path):
+    """La primera sincronización descarga todo el prefijo sin el prefijo en la ruta"""
+    client = make_client()
+    result = mirror_prefix_to_folder(client, BUCKET, 'datos', str(tmp_path))
+
+    assert result.success
+    assert len(result.diff.new) == 3
+    assert (tmp_path / 'sub' / 'b.txt').read_bytes() == b'dos'
+    assert not (tmp_path / 'x.txt').exists()
+
+
+def test_second_mirror_only_transfers_diff(tmp_path):
+    """Solo se descargan los cambios y se eliminan los extras si se pide"""
+    client = make_client()
+    mirror_prefix_to_folder(client, BUCKET, 'datos/', str(tmp_path))
+
+    client.put_object(Bucket=BUCKET, Key='datos/nuevo.txt', Body=b'nuevo')
+    client.put_object(Bucket=BUCKET, Key='datos/a.txt', Body=b'uno modificado')
+    del client.objects[(BUCKET, 'datos/sub/b.txt')]
+    (tmp_path / 'local' / 'extra').mkdir(parents=True)
+    (tmp_path / 'local' / 'extra' / 'e.txt').write_bytes(b'extra')
+    client.calls.clear()
+
+    result = mirror_prefix_to_folder(client, BUCKET, 'datos/', str(tmp_path), delete_extras=True)
+
+    assert result.success
+    assert [obj['Key'] for obj in result.diff.new] == ['datos/nuevo.txt']
+    assert [obj['Key'] for obj in result.diff.changed] == ['datos/a.txt']
+    assert result.diff.unchanged_count == 1
+    assert client.calls.count('get_object') == 2
+    assert (tmp_path / 'a.txt').read_bytes() == b'uno modificado'
+    assert not (tmp_path / 'sub' / 'b.txt').exists()
+    assert not (tmp_path / 'local').exists()
+    assert len(result.removed) == 2
+
+
+def test_extras_are_kept_by_default(tmp_path):
+    """Sin delete_extras los archivos locales adicionales se conservan"""
+    client = make_client()
+    (tmp_path / 'mio.txt').write_bytes(b'local')
+
+    result = mirror_prefix_to_folder(client, BUCKET, 'datos', str(tmp_path))
+
+    assert [os.path.basename(p) for p in result.diff.deleted] == ['mio.txt']
+    assert (tmp_path / 'mio.txt').exists()
+
+
+def make_local_tree(root):
+    for relative, body in [('a.txt', b'uno'), ('sub/b.txt', b'dos'), ('grande.bin', b'g' * 12 * MB)]:
+        path = root / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(body)
+
+
+def test_push_uploads_only_changes(tmp_path, monkeypatch):
+    """Una segunda sincronización sin cambios no lee ningún archivo ni sube nada"""
+    make_local_tree(tmp_path)
+    client = FakeS3Client({(BUCKET, 'destino/sobra.txt'): b'x'})
+    settings = TransferSettings(multipart_threshold_mb=5, multipart_chunksize_mb=5)
+
+    result = push_folder_to_prefix(client, BUCKET, str(tmp_path), 'destino', settings=settings)
+    assert result.success
+    assert len(result.diff.new) == 3
+    assert result.diff.extra == ['destino/sobra.txt']
+    assert client.objects[(BUCKET, 'destino/sub/b.txt')] == b'dos'
+
+    hashed = []
+    monkeypatch.setattr(s3_sync, 'file_etag', lambda *args: hashed.append(args))
+    client.calls.clear()
+    result = push_folder_to_prefix(client, BUCKET, str(tmp_path), 'destino', settings=settings)
+    assert result.diff.unchanged_count == 3
+    assert result.transfer is None
+    assert hashed == []
+    assert client.calls == ['list_objects_v2']
+
+
+def test_push_detects_content_changes_and_deletes_extras(tmp_path):
+    """Se sube lo modificado aunque el tamaño coincida y se borran los extras"""
+    make_local_tree(tmp_path)
+    client = FakeS3Client({(BUCKET, 'destino/sobra.txt'): b'x'})
+    push_folder_to_prefix(client, BUCKET, str(tmp_path), 'destino')
+
+    (tmp_path / 'a.txt').write_bytes(b'UNO')  # Mismo tamaño, otro contenido
+    os.utime(tmp_path / 'sub' / 'b.txt')      # Solo cambia la fecha
+    client.calls.clear()
+
+    result = push_folder_to_prefix(
+        client, BUCKET, str(tmp_path), 'destino', delete_extras=True)
+
+    assert result.success
+    assert [item['Key'] for item in result.diff.changed] == ['destino/a.txt']
+    assert result.diff.hashed_files == 2
+    assert client.calls.count('put_object') == 1
+    assert client.objects[(BUCKET, 'destino/a.txt')] == b'UNO'
+    assert result.removed == ['destino/sobra.txt']
+    assert (BUCKET, 'destino/sobra.txt') not in client.objects
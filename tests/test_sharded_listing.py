@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Pruebas del listado paralelo por rangos de claves
+Autor: EDF Developer - 2025
+"""
+
+import os
+import sys
+import threading
+
+import pytest
+
+# Añadir el directorio raíz del proyecto al sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import sharded_listing
+from diagnose_s3_permissions import list_bucket_contents
+from fake_s3_client import FakeS3Client
+from sharded_listing import ShardedLister, list_bucket_sharded, split_points
+
+BUCKET = 'bucket-listado'
+
+
+@pytest.fixture(autouse=True)
+def small_pages(monkeypatch):
+    # Páginas pequeñas para que los rangos se corten con pocos objetos
+    monkeypatch.setattr(sharded_listing, 'LIST_PAGE_SIZE', 10)
+
+
+def listed_keys(objects):
+    return [obj['Key'] for obj in objects]
+
+
+def test_flat_keys_match_sequential_listing():
+    keys = [f'log-{i:05d}.txt' for i in range(500)]
+    client = FakeS3Client.with_keys(BUCKET, keys, page_size=10)
+    lister = ShardedLister(client, max_workers=8)
+
+    objects = lister.list(BUCKET)
+
+    assert listed_keys(objects) == sorted(keys)
+    assert listed_keys(objects) == listed_keys(list_bucket_contents(client, BUCKET))
+    assert lister.shards > 1
+
+
+def test_folders_and_objects_are_merged_in_key_order():
+    keys = ['a.txt', 'a/1.txt', 'a/2.txt', 'a0', 'b/c/d.txt', 'b/c/e.txt', 'b-final', 'z.txt']
+    keys += [f'b/c/masivo/{i:04d}' for i in range(120)]
+    client = FakeS3Client.with_keys(BUCKET, keys, page_size=10)
+
+    objects = list_bucket_sharded(client, BUCKET, max_workers=4)
+
+    assert listed_keys(objects) == sorted(keys)
+    assert objects[0]['Size'] == 1
+
+
+def test_listing_a_prefix():
+    keys = [f'datos/{i:03d}.csv' for i in range(60)] + ['datos.csv', 'datosX/1', 'otros/1']
+    client = FakeS3Client.with_keys(BUCKET, keys, page_size=10)
+
+    assert listed_keys(list_bucket_sharded(client, BUCKET, 'datos/')) == [f'datos/{i:03d}.csv' for i in range(60)]
+    assert list_bucket_sharded(client, BUCKET, 'vacio/') == []
+
+
+def test_large_ranges_are_listed_in_parallel():
+    keys = [f'{i:05d}' for i in range(400)]
+    client = FakeS3Client.with_keys(BUCKET, keys, page_size=10, latency=0.01)
+
+    objects = ShardedLister(client, max_workers=8).list(BUCKET)
+
+    assert listed_keys(objects) == keys
+    assert client.max_active_calls > 1
+
+
+def test_cancel_stops_listing():
+    keys = [f'{i:05d}' for i in range(2000)]
+    client = FakeS3Client.with_keys(BUCKET, keys, page_size=10, latency=0.005)
+    cancel_event = threading.Event()
+    lister = ShardedLister(client, max_workers=2, cancel_event=cancel_event)
+
+    pages = lister.iter_pages(BUCKET)
+    next(pages)
+    cancel_event.set()
+    rest = list(pages)
+
+    assert sum(len(page) for page in rest) < len(keys)
+    assert lister.requests < len(keys) // 10
+
+
+def test_split_points():
+    page = [f'fotos/{i:06d}.jpg' for i in range(1000)]
+    points = split_points(page, None, 'fotos/')
+    assert points == sorted(points)
+    assert all(page[-1] < point for point in points)
+    # Cortes cerca de la página (fotos/001...) y más lejos (fotos/1...)
+    assert 'fotos/001' in points and 'fotos/1' in points
+    assert len(points) <= sharded_listing.SPLIT_LIMIT
+
+    # El separador fijo '/' no se usa para cortar
+    page = [f'logs/000/{i:04d}.gz' for i in range(1000)]
+    assert not any(point.startswith('logs/000') and len(point) == 9
+                   for point in split_points(page, None, 'logs/'))
+
+    # Dentro de un rango acotado todos los cortes quedan antes del límite
+    assert split_points(['a/10', 'a/12', 'a/19'], 'a/3', 'a/') == ['a/2']
+    assert split_points(['a/10', 'a/12', 'a/19'], None, 'a/') == ['a/2', 'a/9']
+    assert split_points(['a/10', 'a/19'], 'a/2', 'a/') == []
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Pruebas del motor de transferencias concurrentes (sin conexión a AWS)
+Autor: EDF Developer - 2025
+"""
+
+import os
+import sys
+import threading
+
+# Añadir el directorio raíz del proyecto al sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+from fake_s3_client import FakeS3Client, numbered_keys
+from local_metadata_cache import LocalMetadataCache
+from s3_transfer_engine import (
+    DownloadEngine, ProgressReporter, clamp_workers, local_path_for_key, split_ranges
+)
+from transfer_settings_manager import MB, TransferSettings
+
+BUCKET = 'bucket-de-prueba'
+SKIP = TransferSettings(skip_unchanged=True)
+
+
+class SlowFakeS3Client(FakeS3Client):
+    """Cliente simulado con latencia por petición"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, latency=0.02, **kwargs)
+
+
+def make_client(count, client_class=FakeS3Client, **kwargs):
+    objects = {
+        (BUCKET, f"carpeta/archivo_{i}.txt"): f"contenido {i}".encode('utf-8')
+        for i in range(count)
+    }
+    return client_class(objects, **kwargs)
+
+
+def test_parallel_download_writes_all_files(tmp_path):
+    """Todos los objetos se descargan respetando la estructura de claves"""
+    client = make_client(20, SlowFakeS3Client)
+    engine = DownloadEngine(client, max_workers=4)
+
+    result = engine.download(BUCKET, client.listing(BUCKET), str(tmp_path))
+
+    assert result.success
+    assert len(result.succeeded) == 20
+    assert client.max_active_calls > 1
+    assert client.max_active_calls <= 4
+    for i in range(20):
+        path = tmp_path / 'carpeta' / f'archivo_{i}.txt'
+        assert path.read_bytes() == f"contenido {i}".encode('utf-8')
+
+
+def test_progress_tracks_objects_and_bytes(tmp_path):
+    """El progreso total y por objeto cuadra con lo descargado"""
+    client = make_client(5)
+    finished = []
+    engine = DownloadEngine(
+        client, max_workers=2,
+        progress_callback=lambda progress, key, done: done and finished.append(key)
+    )
+
+    engine.download(BUCKET, client.listing(BUCKET), str(tmp_path))
+
+    progress = engine.progress
+    assert sorted(finished) == sorted(obj['Key'] for obj in client.listing(BUCKET))
+    assert progress.completed_objects == 5
+    assert progress.transferred_bytes == progress.total_bytes
+    assert progress.percent == 100
+    assert progress.object_bytes['carpeta/archivo_3.txt'] == len(b"contenido 3")
+
+
+def test_failed_objects_are_reported(tmp_path):
+    """Un objeto que falla no detiene el resto de descargas"""
+    client = make_client(4, fail_keys={'carpeta/archivo_1.txt'})
+    engine = DownloadEngine(client, max_workers=3)
+
+    result = engine.download(BUCKET, client.listing(BUCKET), str(tmp_path))
+
+    assert not result.success
+    assert [key for key, _ in result.failed] == ['carpeta/archivo_1.txt']
+    assert len(result.succeeded) == 3
+
+
+def test_cancel_stops_pending_downloads(tmp_path):
+    """Al cancelar no se lanzan las descargas pendientes"""
+    client = make_client(50, SlowFakeS3Client)
+    cancel_event = threading.Event()
+
+    def cancel_after_first(progress, key, finished):
+        if finished:
+            cancel_event.set()
+
+    engine = DownloadEngine(client, max_workers=2, progress_callback=cancel_after_first,
+                            cancel_event=cancel_event)
+    result = engine.download(BUCKET, client.listing(BUCKET), str(tmp_path))
+
+    assert result.cancelled
+    assert len(client.calls) < 50
+
+
+def test_keys_cannot_escape_destination(tmp_path):
+    """Las claves con '..' no pueden escribir fuera del directorio destino"""
+    with pytest.raises(ValueError):
+        local_path_for_key(str(tmp_path), '../fuera.txt')
+    assert clamp_workers(0) == 1
+    assert clamp_workers('no es un número') > 0
+
+
+def test_ranged_download_reassembles_large_object(tmp_path):
+    """El modo dividido escribe cada rango en su posición del archivo"""
+    payload = bytes(range(256)) * (48 * 1024)  # 12 MB
+    client = FakeS3Client({(BUCKET, 'grande.bin'): payload})
+    settings = TransferSettings(multipart_threshold_mb=5, multipart_chunksize_mb=5,
+                                max_concurrency=3, ranged_download=True)
+    engine = DownloadEngine(client, settings=settings)
+
+    result = engine.download(BUCKET, client.listing(BUCKET), str(tmp_path))
+
+    assert result.success
+    assert client.calls.count('get_object') == len(split_ranges(len(payload), 5 * MB)) == 3
+    assert 'download_file' not in client.calls
+    assert (tmp_path / 'grande.bin').read_bytes() == payload
+    assert engine.progress.transferred_bytes == len(payload)
+
+
+def test_small_objects_use_transfer_config(tmp_path):
+    """Sin la vía rápida, los objetos bajo el umbral usan download_file con el TransferConfig"""
+    client = make_client(2)
+    settings = TransferSettings(ranged_download=True, multipart_chunksize_mb=8, small_object_kb=0)
+    engine = DownloadEngine(client, settings=settings)
+
+    engine.download(BUCKET, client.listing(BUCKET), str(tmp_path))
+
+    assert client.calls == ['download_file', 'download_file']
+    assert engine.transfer_config.multipart_chunksize == 8 * MB
+
+
+def test_small_objects_use_single_get_object(tmp_path):
+    """Los objetos pequeños se piden con un único get_object, sin download_file"""
+    client = FakeS3Client({(BUCKET, 'diminuto.txt'): b'x' * 100,
+                           (BUCKET, 'mediano.bin'): b'y' * (2 * MB)})
+    settings = TransferSettings(small_object_kb=1024)
+
+    result = DownloadEngine(client, settings=settings).download(
+        BUCKET, client.listing(BUCKET), str(tmp_path))
+
+    assert result.success
+    assert sorted(client.calls) == ['download_file', 'get_object']
+    assert (tmp_path / 'diminuto.txt').read_bytes() == b'x' * 100
+
+
+def test_default_download_writes_only_the_objects(tmp_path):
+    """Sin activar la omisión no se crea la caché oculta ni se omite nada"""
+    client = make_client(3)
+    listing = client.listing(BUCKET)
+    DownloadEngine(client).download(BUCKET, listing, str(tmp_path))
+    result = DownloadEngine(client).download(BUCKET, listing, str(tmp_path))
+
+    assert result.skipped == []
+    assert client.calls.count('get_object') == 6
+    assert sorted(os.listdir(tmp_path)) == ['carpeta']
+    assert sorted(os.listdir(tmp_path / 'carpeta')) == [f'archivo_{i}.txt' for i in range(3)]
+
+
+def test_unchanged_objects_are_skipped(tmp_path):
+    """Una segunda descarga idéntica no vuelve a pedir ningún objeto"""
+    client = make_client(3)
+    listing = client.listing(BUCKET)
+    DownloadEngine(client, settings=SKIP).download(BUCKET, listing, str(tmp_path))
+    assert client.calls.count('get_object') == 3
+
+    client.calls.clear()
+    result = DownloadEngine(client, settings=SKIP).download(BUCKET, listing, str(tmp_path))
+
+    assert result.success
+    assert client.calls == []
+    assert len(result.skipped) == 3
+    assert result.skipped_bytes == sum(obj['Size'] for obj in listing)
+    assert result.skipped_requests == 3
+
+
+def test_changed_objects_are_downloaded_again(tmp_path):
+    """Cambios de ETag remoto o ediciones locales fuerzan la descarga"""
+    client = make_client(3)
+    listing = client.listing(BUCKET)
+    DownloadEngine(client, settings=SKIP).download(BUCKET, listing, str(tmp_path))
+
+    listing[0]['ETag'] = '"nueva-version"'
+    (tmp_path / 'carpeta' / 'archivo_1.txt').write_bytes(b'editado!!!')
+    client.calls.clear()
+    result = DownloadEngine(client, settings=SKIP).download(BUCKET, listing, str(tmp_path))
+
+    assert sorted(set(result.succeeded) - set(result.skipped)) == [
+        'carpeta/archivo_0.txt', 'carpeta/archivo_1.txt']
+    assert result.skipped == ['carpeta/archivo_2.txt']
+
+
+def test_skip_uses_file_stats_without_sidecar(tmp_path):
+    """Sin caché se compara tamaño y mtime con el LastModified remoto"""
+    client = make_client(1)
+    listing = client.listing(BUCKET)
+    DownloadEngine(client, settings=SKIP).download(BUCKET, listing, str(tmp_path))
+    os.remove(tmp_path / LocalMetadataCache.CACHE_FILE)
+
+    client.calls.clear()
+    result = DownloadEngine(client, settings=SKIP).download(BUCKET, listing, str(tmp_path))
+    assert result.skipped == ['carpeta/archivo_0.txt']
+
+    no_skip = TransferSettings(skip_unchanged=False)
+    result = DownloadEngine(client, settings=no_skip).download(BUCKET, listing, str(tmp_path))
+    assert result.skipped == []
+    assert client.calls == ['get_object']
+
+
+def test_progress_reporter_throttles_byte_events(tmp_path):
+    """Miles de eventos de bytes se reducen a pocas notificaciones con ETA"""
+    client = FakeS3Client.with_keys(BUCKET, numbered_keys(500, 'f{:04d}.txt'), body=b'x' * 100)
+    emitted = []
+    reporter = ProgressReporter(lambda percent, message: emitted.append((percent, message)),
+                                "Descargando", interval=0.05)
+    events = []
+
+    def on_progress(progress, key, finished):
+        events.append(key)
+        reporter(progress, key, finished)
+
+    DownloadEngine(client, max_workers=4, progress_callback=on_progress).download(
+        BUCKET, client.listing(BUCKET), str(tmp_path))
+
+    assert len(events) == 1000  # Un evento de bytes y uno final por objeto
+    assert len(emitted) < len(events) / 10
+    assert emitted[-1][0] == 100
+    assert emitted[-1][1].startswith("Descargando 500/500 · 0.0/0.0 MB")
+    assert "MB/s" in emitted[-1][1]
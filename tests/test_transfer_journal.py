@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Pruebas del diario de transferencias y de la reanudación de descargas
+Autor: EDF Developer - 2025
+"""
+
+import os
+import sys
+
+# Añadir el directorio raíz del proyecto al sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+from fake_s3_client import FakeS3Client
+from s3_transfer_engine import PARTIAL_SUFFIX, DownloadEngine
+from transfer_journal import TransferJournal
+from transfer_settings_manager import MB, TransferSettings
+
+BUCKET = 'bucket-de-prueba'
+PAYLOAD = os.urandom(3 * 5 * MB + 1234)
+SETTINGS = TransferSettings(multipart_threshold_mb=5, multipart_chunksize_mb=5,
+                            max_concurrency=1)
+
+
+class FailingRangeClient(FakeS3Client):
+    """Falla al pedir un rango concreto, como si se cortase la red"""
+
+    def __init__(self, objects, fail_range_start):
+        super().__init__(objects)
+        self.fail_range_start = fail_range_start
+        self.ranges = []
+
+    def get_object(self, Bucket, Key, Range=None, **kwargs):
+        self.ranges.append(Range)
+        if Range and Range.startswith(f"bytes={self.fail_range_start}-"):
+            raise ConnectionError("Conexión perdida")
+        return super().get_object(Bucket=Bucket, Key=Key, Range=Range, **kwargs)
+
+
+@pytest.fixture
+def journal(tmp_path):
+    journal = TransferJournal(tmp_path / 'journal.sqlite3')
+    yield journal
+    journal.close()
+
+
+def test_journal_records_objects_and_ranges(journal):
+    """El diario guarda objetos y rangos y descarta rangos de otro ETag"""
+    job_id = journal.start_job('download', BUCKET, '/tmp/destino')
+    assert job_id == journal.start_job('download', BUCKET, '/tmp/destino')
+
+    journal.mark_range_done(job_id, 'a.bin', '"v1"', 0, 99)
+    journal.mark_range_done(job_id, 'a.bin', '"v1"', 100, 199)
+    assert journal.completed_ranges(job_id, 'a.bin', '"v1"') == {(0, 99), (100, 199)}
+    assert journal.completed_ranges(job_id, 'a.bin', '"v2"') == set()
+    assert journal.completed_ranges(job_id, 'a.bin', '"v1"') == set()
+
+    journal.mark_object_done(job_id, 'b.txt', '"v1"', 10)
+    assert journal.is_object_done(job_id, 'b.txt', '"v1"')
+    assert not journal.is_object_done(job_id, 'b.txt', '"v2"')
+
+    journal.finish_job(job_id)
+    assert journal.completed_object_count(job_id) == 0
+
+
+def test_interrupted_ranged_download_resumes(tmp_path, journal):
+    """Tras un corte solo se piden los rangos que faltaban"""
+    objects = {(BUCKET, 'grande.bin'): PAYLOAD, (BUCKET, 'pequeño.txt'): b'hola'}
+    destination = tmp_path / 'destino'
+
+    broken = FailingRangeClient(objects, fail_range_start=10 * MB)
+    first = DownloadEngine(broken, settings=SETTINGS, journal=journal).download(
+        BUCKET, broken.listing(BUCKET), str(destination))
+
+    assert [key for key, _ in first.failed] == ['grande.bin']
+    partial = destination / ('grande.bin' + PARTIAL_SUFFIX)
+    assert partial.exists()
+    assert not (destination / 'grande.bin').exists()
+
+    healthy = FailingRangeClient(objects, fail_range_start=-1)
+    second = DownloadEngine(healthy, settings=SETTINGS, journal=journal).download(
+        BUCKET, healthy.listing(BUCKET), str(destination))
+
+    assert second.success
+    assert second.resumed == ['pequeño.txt']
+    assert 'download_file' not in healthy.calls
+    # Solo se repite el rango que falló; el resto estaba ya en el diario
+    assert healthy.ranges == [f"bytes={10 * MB}-{15 * MB - 1}"]
+    assert (destination / 'grande.bin').read_bytes() == PAYLOAD
+    assert not partial.exists()
+
+
+def test_resume_with_another_range_size(tmp_path, journal):
+    """Los rangos de un tamaño de rango anterior se descargan de nuevo y no se cuentan dos veces"""
+    objects = {(BUCKET, 'grande.bin'): PAYLOAD}
+    destination = tmp_path / 'destino'
+
+    broken = FailingRangeClient(objects, fail_range_start=10 * MB)
+    DownloadEngine(broken, settings=SETTINGS, journal=journal).download(
+        BUCKET, broken.listing(BUCKET), str(destination))
+    job_id = journal.start_job('download', BUCKET, str(destination))
+    assert journal.completed_ranges(job_id, 'grande.bin', broken.etag(BUCKET, 'grande.bin'))
+
+    healthy = FailingRangeClient(objects, fail_range_start=-1)
+    settings = TransferSettings(multipart_threshold_mb=5, multipart_chunksize_mb=6, max_concurrency=1)
+    engine = DownloadEngine(healthy, settings=settings, journal=journal)
+    result = engine.download(BUCKET, healthy.listing(BUCKET), str(destination))
+
+    assert result.success
+    assert len(healthy.ranges) == 3
+    assert engine.progress.transferred_bytes == engine.progress.total_bytes == len(PAYLOAD)
+    assert (destination / 'grande.bin').read_bytes() == PAYLOAD
+
+
+def test_discard_only_some_ranges(journal):
+    job_id = journal.start_job('download', BUCKET, '/tmp/destino')
+    for start in (0, 100, 200):
+        journal.mark_range_done(job_id, 'a.bin', '"v1"', start, start + 99)
+
+    journal.discard_ranges(job_id, 'a.bin', {(100, 199), (200, 250)})
+
+    assert journal.completed_ranges(job_id, 'a.bin', '"v1"') == {(0, 99), (200, 299)}
+
+
+def test_partial_file_discarded_when_etag_changes(tmp_path, journal):
+    """Si el objeto cambió en S3, el archivo parcial no se reutiliza"""
+    objects = {(BUCKET, 'grande.bin'): PAYLOAD}
+    destination = tmp_path / 'destino'
+
+    broken = FailingRangeClient(objects, fail_range_start=5 * MB)
+    DownloadEngine(broken, settings=SETTINGS, journal=journal).download(
+        BUCKET, broken.listing(BUCKET), str(destination))
+
+    healthy = FailingRangeClient(objects, fail_range_start=-1)
+    listing = healthy.listing(BUCKET)
+    listing[0]['ETag'] = '"otra-version"'
+    result = DownloadEngine(healthy, settings=SETTINGS, journal=journal).download(
+        BUCKET, listing, str(destination))
+
+    assert result.success
+    assert len(healthy.ranges) == 4
+    assert (destination / 'grande.bin').read_bytes() == PAYLOAD
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la cola de transferencias con prioridades
+Autor: EDF Developer - 2025
+"""
+
+import os
+import sys
+import threading
+import time
+from concurrent.futures import wait
+
+import pytest
+
+# Añadir el directorio raíz del proyecto al sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_s3_client import FakeS3Client, numbered_keys
+from s3_transfer_engine import DownloadEngine
+from transfer_settings_manager import TransferSettings
+from transfer_queue import TransferQueue
+
+BUCKET = 'bucket-de-prueba'
+
+
+@pytest.fixture
+def queue():
+    queue = TransferQueue(1)
+    yield queue
+    queue.shutdown()
+
+
+def block_worker(queue):
+    """Ocupa el único hilo de la cola hasta que se libere el evento devuelto"""
+    gate = threading.Event()
+    blocker = queue.add_job('bloqueo', priority=100)
+    blocker.submit(gate.wait)
+    while not queue.active:
+        time.sleep(0.001)
+    return gate
+
+
+def test_higher_priority_job_runs_first(queue):
+    order = []
+    gate = block_worker(queue)
+    batch = queue.add_job('lote')
+    urgent = queue.add_job('urgente')
+    futures = [batch.submit(order.append, f"lote-{i}") for i in range(3)]
+    futures.append(urgent.submit(order.append, 'urgente'))
+    urgent.set_priority(5)
+
+    gate.set()
+    wait(futures)
+    assert order == ['urgente', 'lote-0', 'lote-1', 'lote-2']
+
+
+def test_promote_object_and_pause(queue):
+    order = []
+    gate = block_worker(queue)
+    job = queue.add_job('lote')
+    futures = [job.submit(order.append, key, key=key) for key in 'abcde']
+    assert job.promote('d')
+    assert job.pending_keys() == ['d', 'a', 'b', 'c', 'e']
+    job.pause()
+
+    gate.set()
+    time.sleep(0.05)
+    assert order == []
+    job.resume()
+    wait(futures)
+    assert order == ['d', 'a', 'b', 'c', 'e']
+    assert not job.promote('a')
+
+
+def test_close_cancels_pending(queue):
+    gate = block_worker(queue)
+    job = queue.add_job('lote')
+    futures = [job.submit(time.sleep, 0) for _ in range(3)]
+    job.close()
+    # Quien espera los futuros (un motor de transferencia) se despierta
+    done, pending = wait(futures, timeout=1)
+    assert len(done) == 3 and not pending
+    gate.set()
+    assert all(future.cancelled() for future in futures)
+    assert job not in queue.jobs()
+
+
+def test_engines_share_a_fixed_number_of_threads(tmp_path):
+    """Dos descargas simultáneas nunca superan los hilos de la cola"""
+    client = FakeS3Client.with_keys(BUCKET, numbered_keys(40, 'f{:03d}.txt'), latency=0.005)
+    queue = TransferQueue(3)
+    results = []
+
+    def download(name):
+        job = queue.add_job(name)
+        engine = DownloadEngine(client, max_workers=16, job=job)
+        results.append(engine.download(BUCKET, client.listing(BUCKET), str(tmp_path / name)))
+        job.close()
+
+    threads = [threading.Thread(target=download, args=(name,)) for name in ('a', 'b')]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    queue.shutdown()
+
+    assert all(result.success and len(result.succeeded) == 40 for result in results)
+    assert client.max_active_calls <= 3
+
+
+def test_job_concurrency_limit_and_resize():
+    queue = TransferQueue(2)
+    job = queue.add_job('lote')
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def task():
+        with lock:
+            active.append(1)
+            peak.append(len(active))
+        time.sleep(0.01)
+        with lock:
+            active.pop()
+
+    job.set_concurrency(1)
+    wait([job.submit(task) for _ in range(6)])
+    assert max(peak) == 1
+
+    peak.clear()
+    job.set_concurrency(None)
+    queue.resize(4)
+    wait([job.submit(task) for _ in range(12)])
+    assert max(peak) == 4
+
+    queue.resize(1)
+    time.sleep(0.05)
+    peak.clear()
+    wait([job.submit(task) for _ in range(4)])
+    assert max(peak) == 1
+    queue.shutdown()
+
+
+def test_queued_engine_honours_worker_limit_and_adaptive_mode(tmp_path):
+    client = FakeS3Client.with_keys(BUCKET, numbered_keys(30, 'f{:03d}.txt'), latency=0.005)
+    queue = TransferQueue(8)
+
+    job = queue.add_job('limitada')
+    result = DownloadEngine(client, max_workers=2, job=job).download(
+        BUCKET, client.listing(BUCKET), str(tmp_path / 'a'))
+    assert result.success and client.max_active_calls <= 2
+
+    job = queue.add_job('adaptativa')
+    engine = DownloadEngine(client, max_workers=2, job=job,
+                            settings=TransferSettings(adaptive_concurrency=True))
+    result = engine.download(BUCKET, client.listing(BUCKET), str(tmp_path / 'b'))
+    assert result.success
+    assert engine.progress.concurrency is not None
+    assert job.concurrency is engine.progress.concurrency
+    queue.shutdown()
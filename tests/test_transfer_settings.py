@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Pruebas del gestor de configuración de transferencias por perfil
+Autor: EDF Developer - 2025
+"""
+
+import os
+import sys
+
+# Añadir el directorio raíz del proyecto al sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+
+from fake_s3_client import FakeS3Client
+from s3_client_pool import DEFAULT_POOL_CONNECTIONS, S3ClientPool, bucket_region, pool_size_for
+from transfer_settings_manager import MB, TransferSettings, TransferSettingsManager
+
+
+@pytest.fixture
+def settings_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(TransferSettingsManager, 'SETTINGS_DIR', tmp_path)
+    monkeypatch.delenv('AWS_PROFILE', raising=False)
+    return tmp_path
+
+
+def test_defaults_when_nothing_saved(settings_dir):
+    """Sin archivo se devuelven los valores por defecto"""
+    settings = TransferSettingsManager.load_settings()
+    assert settings.to_dict() == TransferSettings.DEFAULTS
+
+
+def test_settings_are_saved_per_profile(settings_dir, monkeypatch):
+    """Cada perfil AWS conserva su propia configuración"""
+    success, error = TransferSettingsManager.save_settings(
+        TransferSettings(max_workers=16, multipart_chunksize_mb=32, ranged_download=True)
+    )
+    assert success and error is None
+
+    monkeypatch.setenv('AWS_PROFILE', 'oficina')
+    TransferSettingsManager.save_settings(TransferSettings(max_concurrency=2, use_threads=False))
+
+    oficina = TransferSettingsManager.load_settings()
+    assert oficina.max_concurrency == 2
+    assert oficina.effective_concurrency == 1
+    assert oficina.max_workers == TransferSettings.DEFAULTS['max_workers']
+
+    default = TransferSettingsManager.load_settings('default')
+    assert default.max_workers == 16
+    assert default.ranged_download
+    assert default.multipart_chunksize == 32 * MB
+
+
+def test_transfer_config_and_validation():
+    """Los valores se normalizan y se trasladan al TransferConfig de boto3"""
+    settings = TransferSettings(multipart_chunksize_mb=1, max_workers=0)
+    assert settings.multipart_chunksize_mb == 5
+    assert settings.max_workers == 1
+
+    config = TransferSettings(multipart_threshold_mb=100, max_concurrency=4).to_transfer_config()
+    assert config.multipart_threshold == 100 * MB
+    assert config.max_concurrency == 4
+
+
+def test_corrupt_file_falls_back_to_defaults(settings_dir):
+    """Un archivo corrupto no impide arrancar la aplicación"""
+    (settings_dir / TransferSettingsManager.SETTINGS_FILE).write_text('{no es json')
+    assert TransferSettingsManager.load_settings().to_dict() == TransferSettings.DEFAULTS
+
+
+def test_connection_pool_sized_to_workers():
+    """El pool tiene una conexión por hilo y se reutiliza entre trabajos"""
+    assert pool_size_for(TransferSettings(max_workers=2, max_concurrency=1)) == DEFAULT_POOL_CONNECTIONS
+    assert pool_size_for(TransferSettings(max_concurrency=10), max_workers=32) == 42
+    assert pool_size_for(TransferSettings(adaptive_concurrency=True, max_concurrency=4)) == 68
+
+    S3ClientPool.clear()
+    client = S3ClientPool.get_client(20, region_name='eu-west-1')
+    assert client.meta.config.max_pool_connections == 20
+    assert S3ClientPool.get_client(10, region_name='eu-west-1') is client
+    assert S3ClientPool.get_client(40, region_name='eu-west-1') is not client
+    S3ClientPool.clear()
+
+
+def test_pool_keyed_by_resolved_credentials(tmp_path, monkeypatch):
+    """Cambiar las credenciales (de entorno o del archivo del perfil) da otro cliente"""
+    for name in ('AWS_ACCESS_KEY_ID', 'AWS_SECRET_ACCESS_KEY', 'AWS_SESSION_TOKEN', 'AWS_PROFILE'):
+        monkeypatch.delenv(name, raising=False)
+    credentials_file = tmp_path / 'credentials'
+    monkeypatch.setenv('AWS_SHARED_CREDENTIALS_FILE', str(credentials_file))
+    monkeypatch.setenv('AWS_CONFIG_FILE', str(tmp_path / 'config'))
+    monkeypatch.setenv('AWS_EC2_METADATA_DISABLED', 'true')
+    S3ClientPool.clear()
+    try:
+        credentials_file.write_text('[default]\naws_access_key_id = AKIAPRIMERA\naws_secret_access_key = x\n')
+        from_file = S3ClientPool.get_client(region_name='eu-west-1')
+        assert S3ClientPool.get_client(region_name='eu-west-1') is from_file
+
+        credentials_file.write_text('[default]\naws_access_key_id = AKIASEGUNDA\naws_secret_access_key = x\n')
+        second = S3ClientPool.get_client(region_name='eu-west-1')
+        assert second is not from_file
+
+        monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'AKIAENTORNO')
+        monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'y')
+        from_env = S3ClientPool.get_client(region_name='eu-west-1')
+        assert from_env is not second and from_env.meta.region_name == 'eu-west-1'
+    finally:
+        S3ClientPool.clear()
+
+
+def test_bucket_client_uses_bucket_region():
+    """Los clientes de transferencia se crean en la región del bucket"""
+    client = FakeS3Client()
+    client.locations = {'antiguo': 'EU', 'madrid': 'eu-south-2'}
+    assert bucket_region(client, 'antiguo') == 'eu-west-1'
+    assert bucket_region(client, 'madrid') == 'eu-south-2'
+    assert bucket_region(client, 'virginia') == 'us-east-1'
+
+    client.calls.clear()
+    S3ClientPool.clear()
+    try:
+        assert S3ClientPool.get_bucket_client(client, 'madrid').meta.region_name == 'eu-south-2'
+        S3ClientPool.get_bucket_client(client, 'madrid')
+        assert client.calls.count(('get_bucket_location', 'madrid')) == 1
+    finally:
+        S3ClientPool.clear()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la subida paralela y multiparte (sin conexión a AWS)
+Autor: EDF Developer - 2025
+"""
+
+import os
+import sys
+
+from botocore.exceptions import ClientError
+
+# Añadir el directorio raíz del proyecto al sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_s3_client import FakeS3Client
+from local_metadata_cache import LocalMetadataCache
+from s3_transfer_engine import (
+    MAX_UPLOAD_PARTS, UploadEngine, collect_upload_items, upload_part_size
+)
+from transfer_settings_manager import MB, TransferSettings
+
+BUCKET = 'bucket-de-prueba'
+SETTINGS = TransferSettings(multipart_threshold_mb=5, multipart_chunksize_mb=5, max_concurrency=3)
+
+
+def make_tree(root):
+    """Crea una carpeta con archivos pequeños, uno grande y metadatos internos"""
+    (root / 'fotos' / 'viaje').mkdir(parents=True)
+    (root / 'fotos' / 'a.txt').write_bytes(b'a' * 10)
+    (root / 'fotos' / 'viaje' / 'b.txt').write_bytes(b'b' * 20)
+    (root / 'fotos' / 'grande.bin').write_bytes(os.urandom(12 * MB))
+    (root / 'fotos' / LocalMetadataCache.CACHE_FILE).write_bytes(b'interno')
+    (root / 'suelto.txt').write_bytes(b'suelto')
+    return root
+
+
+def test_collect_upload_items_keeps_structure(tmp_path):
+    """Las carpetas conservan su estructura y se ignoran archivos internos"""
+    make_tree(tmp_path)
+    items = collect_upload_items([tmp_path / 'fotos', tmp_path / 'suelto.txt'], 'backup')
+
+    assert [item['Key'] for item in items] == [
+        'backup/fotos/a.txt', 'backup/fotos/grande.bin',
+        'backup/fotos/viaje/b.txt', 'backup/suelto.txt',
+    ]
+    assert items[0]['Size'] == 10
+
+
+def test_upload_directory_with_multipart(tmp_path):
+    """Los archivos grandes se suben por partes y el progreso es exacto"""
+    make_tree(tmp_path)
+    client = FakeS3Client()
+    items = collect_upload_items([tmp_path / 'fotos'])
+    engine = UploadEngine(client, max_workers=4, settings=SETTINGS)
+
+    result = engine.upload(BUCKET, items)
+
+    assert result.success
+    assert client.calls.count('upload_part') == 3
+    assert client.objects[(BUCKET, 'fotos/grande.bin')] == (tmp_path / 'fotos' / 'grande.bin').read_bytes()
+    assert client.objects[(BUCKET, 'fotos/viaje/b.txt')] == b'b' * 20
+    assert engine.progress.transferred_bytes == engine.progress.total_bytes
+    assert engine.progress.percent == 100
+
+
+def test_failed_multipart_upload_is_aborted(tmp_path):
+    """Si una parte falla se aborta la subida multiparte"""
+    make_tree(tmp_path)
+    client = FakeS3Client()
+    client.fail_parts = {2}
+    items = collect_upload_items([tmp_path / 'fotos' / 'grande.bin'])
+
+    result = UploadEngine(client, settings=SETTINGS).upload(BUCKET, items)
+
+    assert [key for key, _ in result.failed] == ['grande.bin']
+    assert client.aborted_uploads == ['upload-1']
+    assert client.multipart_uploads == {}
+    assert (BUCKET, 'grande.bin') not in client.objects
+
+
+def test_failed_abort_is_reported_in_result(tmp_path, capsys):
+    """Si tampoco se puede abortar, el error llega al resultado y no a la consola"""
+    make_tree(tmp_path)
+    client = FakeS3Client()
+    client.fail_parts = {2}
+
+    def abort_multipart_upload(**kwargs):
+        raise IOError("Sin conexión")
+
+    client.abort_multipart_upload = abort_multipart_upload
+    items = collect_upload_items([tmp_path / 'fotos' / 'grande.bin'])
+
+    result = UploadEngine(client, settings=SETTINGS).upload(BUCKET, items)
+
+    assert [key for key, _ in result.failed] == ['grande.bin']
+    assert result.abort_errors == [('grande.bin', 'Sin conexión')]
+    assert '1 subidas multiparte sin abortar' in result.summary()
+    assert capsys.readouterr().out == ''
+
+
+def test_throttled_multipart_upload_counts_bytes_once(tmp_path):
+    """Al reintentar un objeto rechazado con SlowDown no se cuentan dos veces sus partes"""
+    make_tree(tmp_path)
+    client = FakeS3Client()
+    original = client.upload_part
+    throttled = []
+
+    def upload_part(PartNumber, **kwargs):
+        if PartNumber == 2 and not throttled:
+            throttled.append(PartNumber)
+            raise ClientError({'Error': {'Code': 'SlowDown'},
+                               'ResponseMetadata': {'HTTPStatusCode': 503}}, 'UploadPart')
+        return original(PartNumber=PartNumber, **kwargs)
+
+    client.upload_part = upload_part
+    items = collect_upload_items([tmp_path / 'fotos' / 'grande.bin'])
+    engine = UploadEngine(client, settings=TransferSettings(
+        multipart_threshold_mb=5, multipart_chunksize_mb=5, max_concurrency=1))
+
+    result = engine.upload(BUCKET, items)
+
+    assert result.success and throttled
+    assert engine.progress.transferred_bytes == engine.progress.total_bytes == 12 * MB
+    assert engine.progress.object_bytes['grande.bin'] == 12 * MB
+    assert engine.progress.percent == 100
+
+
+def test_part_size_respects_part_limit():
+    """El tamaño de parte crece para no superar 10.000 partes"""
+    assert upload_part_size(100 * MB, 8 * MB) == 8 * MB
+    huge = 200 * 1024 * MB
+    part_size = upload_part_size(huge, 8 * MB)
+    assert -(-huge // part_size) <= MAX_UPLOAD_PARTS
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Diario persistente de transferencias (SQLite) para reanudar trabajos
+Autor: EDF Developer - 2025
+"""
+
+import hashlib
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+
+
+class TransferJournal:
+    """
+    Registra en disco los objetos y rangos de bytes ya completados de cada
+    trabajo, de modo que un trabajo interrumpido pueda continuar donde quedó.
+
+    Todas las operaciones son thread-safe: los hilos del motor de
+    transferencias comparten una única conexión protegida por un lock.
+    """
+
+    JOURNAL_DIR = Path.home() / '.s3manager'
+    JOURNAL_FILE = 'transfer_journal.sqlite3'
+
+    def __init__(self, db_path):
+        self.db_path = str(db_path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._create_tables()
+
+    @classmethod
+    def open_default(cls):
+        """Abre el diario en ~/.s3manager/transfer_journal.sqlite3"""
+        cls.JOURNAL_DIR.mkdir(mode=0o700, parents=True, exist_ok=True)
+        return cls(cls.JOURNAL_DIR / cls.JOURNAL_FILE)
+
+    def _create_tables(self):
+        with self._lock, self._conn:
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    description TEXT,
+                    created_at TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS completed_objects (
+                    job_id TEXT NOT NULL,
+                    object_key TEXT NOT NULL,
+                    etag TEXT,
+                    size INTEGER,
+                    PRIMARY KEY (job_id, object_key)
+                );
+                CREATE TABLE IF NOT EXISTS completed_ranges (
+                    job_id TEXT NOT NULL,
+                    object_key TEXT NOT NULL,
+                    etag TEXT,
+                    range_start INTEGER NOT NULL,
+                    range_end INTEGER NOT NULL,
+                    PRIMARY KEY (job_id, object_key, range_start)
+                );
+            """)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def make_job_id(kind, *parts):
+        """Identificador estable de un trabajo a partir de sus parámetros"""
+        digest = hashlib.sha1('\0'.join([kind, *map(str, parts)]).encode('utf-8'))
+        return f"{kind}-{digest.hexdigest()[:16]}"
+
+    def start_job(self, kind, *parts):
+        """Registra (o recupera) un trabajo y devuelve su identificador"""
+        job_id = self.make_job_id(kind, *parts)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO jobs (job_id, kind, description, created_at) "
+                "VALUES (?, ?, ?, ?)",
+                (job_id, kind, ' → '.join(map(str, parts)), datetime.now().isoformat())
+            )
+        return job_id
+
+    def finish_job(self, job_id):
+        """Elimina todo el estado de un trabajo terminado con éxito"""
+        with self._lock, self._conn:
+            for table in ('completed_ranges', 'completed_objects', 'jobs'):
+                self._conn.execute(f"DELETE FROM {table} WHERE job_id = ?", (job_id,))
+
+    # --- Objetos completos ---
+
+    def mark_object_done(self, job_id, key, etag=None, size=None):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO completed_objects (job_id, object_key, etag, size) "
+                "VALUES (?, ?, ?, ?)",
+                (job_id, key, etag, size)
+            )
+            # Los rangos de un objeto completo ya no hacen falta
+            self._conn.execute(
+                "DELETE FROM completed_ranges WHERE job_id = ? AND object_key = ?",
+                (job_id, key)
+            )
+
+    def is_object_done(self, job_id, key, etag=None):
+        """True si el objeto se completó y, si se indica, con el mismo ETag"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag FROM completed_objects WHERE job_id = ? AND object_key = ?",
+                (job_id, key)
+            ).fetchone()
+        return row is not None and (etag is None or row[0] == etag)
+
+    def completed_object_count(self, job_id):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM completed_objects WHERE job_id = ?", (job_id,)
+            ).fetchone()[0]
+
+    # --- Rangos de bytes ---
+
+    def mark_range_done(self, job_id, key, etag, start, end):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO completed_ranges "
+                "(job_id, object_key, etag, range_start, range_end) VALUES (?, ?, ?, ?, ?)",
+                (job_id, key, etag, start, end)
+            )
+
+    def completed_ranges(self, job_id, key, etag):
+        """
+        Rangos (inicio, fin) completados de un objeto. Si alguno se registró
+        con otro ETag, el objeto cambió en S3: se descartan todos.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT etag, range_start, range_end FROM completed_ranges "
+                "WHERE job_id = ? AND object_key = ? ORDER BY range_start",
+                (job_id, key)
+            ).fetchall()
+        if any(row[0] != etag for row in rows):
+            self.discard_ranges(job_id, key)
+            return set()
+        return {(row[1], row[2]) for row in rows}
+
+    def discard_ranges(self, job_id, key, ranges=None):
+        """Olvida los rangos de un objeto, o solo los (inicio, fin) de ranges"""
+        with self._lock, self._conn:
+            if ranges is None:
+                self._conn.execute(
+                    "DELETE FROM completed_ranges WHERE job_id = ? AND object_key = ?",
+                    (job_id, key)
+                )
+                return
+            self._conn.executemany(
+                "DELETE FROM completed_ranges WHERE job_id = ? AND object_key = ? "
+                "AND range_start = ? AND range_end = ?",
+                [(job_id, key, start, end) for start, end in ranges]
+            )
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Cola de transferencias con prioridades y concurrencia total acotada
+Autor: EDF Developer - 2025
+"""
+
+import heapq
+import itertools
+import threading
+from concurrent.futures import Future
+
+# Claves pendientes que se devuelven como mucho para mostrarlas en la interfaz
+PENDING_KEYS_LIMIT = 500
+
+
+class _Entry:
+    """Tarea pendiente dentro de un trabajo, ordenada por prioridad y llegada"""
+
+    __slots__ = ('priority', 'seq', 'key', 'fn', 'future', 'removed')
+
+    def __init__(self, priority, seq, key, fn, future):
+        self.priority = priority
+        self.seq = seq
+        self.key = key
+        self.fn = fn
+        self.future = future
+        self.removed = False
+
+    def __lt__(self, other):
+        return (-self.priority, self.seq) < (-other.priority, other.seq)
+
+
+class QueuedJob:
+    """
+    Trabajo dentro de una TransferQueue. Sus tareas se envían con submit,
+    que devuelve un concurrent.futures.Future como un executor normal, y se
+    ejecutan por orden de prioridad de objeto y de llegada.
+
+    Cada trabajo puede limitar además cuántas de sus tareas se ejecutan a
+    la vez (set_concurrency), con un número fijo o con un controlador
+    adaptativo cuyo límite se lee cada vez que se reparte un hilo.
+
+    Todas las operaciones son thread-safe; las modificaciones se hacen con
+    el lock de la cola, que reparte los hilos entre los trabajos.
+    """
+
+    def __init__(self, queue, job_id, name, priority):
+        self._queue = queue
+        self.job_id = job_id
+        self.name = name
+        self.priority = priority
+        self.paused = False
+        self.closed = False
+        self.running = 0
+        self.completed = 0
+        self.status = ''  # Último mensaje de progreso, para la interfaz
+        self.concurrency = None  # int, objeto con atributo limit, o None (sin límite propio)
+        self._heap = []
+        self._by_key = {}
+        self._pending = 0
+
+    @property
+    def pending(self):
+        return self._pending
+
+    def submit(self, fn, *args, key=None, priority=0, **kwargs):
+        """Encola fn(*args, **kwargs) y devuelve su Future"""
+        future = Future()
+        with self._queue._condition:
+            if self.closed:
+                raise RuntimeError(f"El trabajo '{self.name}' ya terminó")
+            entry = _Entry(priority, next(self._queue._sequence), key,
+                           lambda: fn(*args, **kwargs), future)
+            heapq.heappush(self._heap, entry)
+            if key is not None:
+                self._by_key[key] = entry
+            self._pending += 1
+            self._queue._condition.notify()
+        return future
+
+    def set_concurrency(self, concurrency):
+        """
+        Limita las tareas simultáneas del trabajo: un número, un objeto con
+        atributo limit (por ejemplo AdaptiveConcurrency) o None.
+        """
+        with self._queue._condition:
+            self.concurrency = concurrency
+            self._queue._condition.notify_all()
+
+    def capacity_changed(self):
+        """Avisa a la cola de que el límite del controlador adaptativo cambió"""
+        with self._queue._condition:
+            self._queue._condition.notify_all()
+
+    @property
+    def limit(self):
+        """Tareas simultáneas permitidas ahora mismo (None = sin límite propio)"""
+        return getattr(self.concurrency, 'limit', self.concurrency)
+
+    def set_priority(self, priority):
+        """Cambia la prioridad del trabajo frente a los demás"""
+        with self._queue._condition:
+            self.priority = priority
+            self._queue._condition.notify_all()
+
+    def pause(self):
+        """Deja de iniciar tareas del trabajo; las que están en curso terminan"""
+        with self._queue._condition:
+            self.paused = True
+
+    def resume(self):
+        with self._queue._condition:
+            self.paused = False
+            self._queue._condition.notify_all()
+
+    def set_object_priority(self, key, priority):
+        """
+        Cambia la prioridad de un objeto pendiente dentro del trabajo.
+
+        Returns:
+            bool: False si el objeto ya no estaba pendiente.
+        """
+        with self._queue._condition:
+            entry = self._by_key.get(key)
+            if entry is None or entry.removed:
+                return False
+            entry.removed = True
+            replacement = _Entry(priority, entry.seq, key, entry.fn, entry.future)
+            heapq.heappush(self._heap, replacement)
+            self._by_key[key] = replacement
+            return True
+
+    def promote(self, key):
+        """Pone un objeto pendiente por delante de todos los del trabajo"""
+        with self._queue._condition:
+            top = max((entry.priority for entry in self._heap if not entry.removed), default=0)
+            return self.set_object_priority(key, top + 1)
+
+    def pending_keys(self, limit=PENDING_KEYS_LIMIT):
+        """Claves pendientes en el orden en que se ejecutarán"""
+        with self._queue._condition:
+            live = [entry for entry in self._heap if not entry.removed and entry.key is not None]
+            return [entry.key for entry in heapq.nsmallest(limit, live)]
+
+    def close(self):
+        """Retira el trabajo de la cola y cancela sus tareas pendientes"""
+        with self._queue._condition:
+            self.closed = True
+            for entry in self._heap:
+                if not entry.removed and entry.future.cancel():
+                    # Ningún hilo sacará ya la tarea: se avisa aquí a quien
+                    # espera el futuro con concurrent.futures.wait
+                    entry.future.set_running_or_notify_cancel()
+            self._heap.clear()
+            self._by_key.clear()
+            self._pending = 0
+            self._queue._jobs.pop(self.job_id, None)
+
+    def _pop(self):
+        """Saca la siguiente tarea válida; se llama con el lock de la cola"""
+        while self._heap:
+            entry = heapq.heappop(self._heap)
+            if entry.removed:
+                continue
+            entry.removed = True
+            self._pending -= 1
+            if entry.key is not None and self._by_key.get(entry.key) is entry:
+                del self._by_key[entry.key]
+            return entry
+        return None
+
+
+class TransferQueue:
+    """
+    Reparte max_workers hilos entre varios trabajos de transferencia. Cada
+    hilo libre toma la siguiente tarea del trabajo no pausado de mayor
+    prioridad (a igual prioridad, el más antiguo) que no haya llegado a su
+    propio límite, de modo que un trabajo urgente adelanta a los que ya
+    estaban en marcha sin superar nunca max_workers tareas simultáneas en
+    total. El número de hilos se puede cambiar en marcha con resize.
+    """
+
+    def __init__(self, max_workers):
+        self.max_workers = 0
+        self._condition = threading.Condition()
+        self._sequence = itertools.count()
+        self._thread_ids = itertools.count()
+        self._job_ids = itertools.count(1)
+        self._jobs = {}
+        self._shutdown = False
+        self._threads = []
+        self.resize(max_workers)
+
+    def resize(self, max_workers):
+        """
+        Cambia el número de hilos. Si baja, los hilos sobrantes terminan en
+        cuanto acaban su tarea actual.
+        """
+        max_workers = max(1, int(max_workers))
+        with self._condition:
+            self._threads = [thread for thread in self._threads if thread.is_alive()]
+            self.max_workers = max_workers
+            for _ in range(max_workers - len(self._threads)):
+                thread = threading.Thread(target=self._worker, name=f"transfer-queue-{next(self._thread_ids)}",
+                                          daemon=True)
+                self._threads.append(thread)
+                thread.start()
+            self._condition.notify_all()
+
+    def add_job(self, name, priority=0):
+        """Crea un trabajo vacío y lo añade a la cola"""
+        with self._condition:
+            job = QueuedJob(self, next(self._job_ids), name, priority)
+            self._jobs[job.job_id] = job
+            return job
+
+    def jobs(self):
+        """Trabajos en el orden en que se atienden"""
+        with self._condition:
+            return sorted(self._jobs.values(), key=lambda job: (-job.priority, job.job_id))
+
+    @property
+    def active(self):
+        """Tareas en ejecución en este momento"""
+        with self._condition:
+            return sum(job.running for job in self._jobs.values())
+
+    def shutdown(self, wait=True):
+        """Cancela lo pendiente y detiene los hilos"""
+        for job in list(self._jobs.values()):
+            job.close()
+        with self._condition:
+            self._shutdown = True
+            self._condition.notify_all()
+            threads = list(self._threads)
+        if wait:
+            for thread in threads:
+                thread.join()
+
+    def _take(self):
+        """Siguiente tarea del trabajo preferente; se llama con el lock"""
+        for job in sorted(self._jobs.values(), key=lambda job: (-job.priority, job.job_id)):
+            if job.paused or not job.pending:
+                continue
+            if job.limit is not None and job.running >= job.limit:
+                continue
+            entry = job._pop()
+            if entry is not None:
+                job.running += 1
+                return job, entry
+        return None
+
+    def _retire(self):
+        """True si sobra el hilo actual tras un resize; se llama con el lock"""
+        if len(self._threads) <= self.max_workers:
+            return False
+        self._threads.remove(threading.current_thread())
+        return True
+
+    def _worker(self):
+        while True:
+            with self._condition:
+                if self._retire():
+                    return
+                task = self._take()
+                while task is None:
+                    if self._shutdown or self._retire():
+                        return
+                    self._condition.wait()
+                    task = self._take()
+            job, entry = task
+            try:
+                if entry.future.set_running_or_notify_cancel():
+                    try:
+                        entry.future.set_result(entry.fn())
+                    except BaseException as e:
+                        entry.future.set_exception(e)
+            finally:
+                with self._condition:
+                    job.running -= 1
+                    job.completed += 1
+                    # Un hueco en el límite del trabajo puede dar paso a otra tarea suya
+                    self._condition.notify_all()
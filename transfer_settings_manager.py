@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Gestor de la configuración de transferencias S3 por perfil
+Autor: EDF Developer - 2025
+"""
+
+import os
+import json
+from pathlib import Path
+
+from boto3.s3.transfer import TransferConfig
+
+MB = 1024 * 1024
+
+
+class TransferSettings:
+    """Parámetros de transferencia aplicados a todas las descargas"""
+
+    DEFAULTS = {
+        'max_workers': 8,              # Objetos descargados a la vez
+        'multipart_threshold_mb': 64,  # A partir de este tamaño se usan partes
+        'multipart_chunksize_mb': 16,  # Tamaño de cada parte / rango
+        'max_concurrency': 10,         # Hilos por objeto grande
+        'use_threads': True,
+        'ranged_download': False,      # Modo dividido: rangos en paralelo
+        'skip_unchanged': False,       # Omitir objetos idénticos a la copia local (crea una caché oculta)
+        'max_bandwidth_mb_s': 0,       # Límite global de ancho de banda (0 = sin límite)
+        'adaptive_concurrency': False, # Ajustar los archivos en paralelo (AIMD)
+        'verify_integrity': False,     # Comprobar el checksum de cada descarga
+        'small_object_kb': 1024,       # Hasta este tamaño: get_object directo (0 = nunca)
+    }
+
+    def __init__(self, **kwargs):
+        for name, default in self.DEFAULTS.items():
+            setattr(self, name, kwargs.get(name, default))
+        self.validate()
+
+    def validate(self):
+        """Normaliza los valores para que siempre sean utilizables"""
+        self.max_workers = max(1, int(self.max_workers))
+        self.multipart_threshold_mb = max(5, int(self.multipart_threshold_mb))
+        # S3 exige partes de al menos 5 MB
+        self.multipart_chunksize_mb = max(5, int(self.multipart_chunksize_mb))
+        self.max_concurrency = max(1, int(self.max_concurrency))
+        self.use_threads = bool(self.use_threads)
+        self.ranged_download = bool(self.ranged_download)
+        self.skip_unchanged = bool(self.skip_unchanged)
+        self.max_bandwidth_mb_s = max(0, int(self.max_bandwidth_mb_s))
+        self.adaptive_concurrency = bool(self.adaptive_concurrency)
+        self.verify_integrity = bool(self.verify_integrity)
+        self.small_object_kb = max(0, int(self.small_object_kb))
+
+    @property
+    def multipart_threshold(self):
+        return self.multipart_threshold_mb * MB
+
+    @property
+    def multipart_chunksize(self):
+        return self.multipart_chunksize_mb * MB
+
+    @property
+    def small_object_threshold(self):
+        return self.small_object_kb * 1024
+
+    def requests_for_size(self, size):
+        """Peticiones GET aproximadas que cuesta descargar un objeto"""
+        if size >= self.multipart_threshold and size > self.multipart_chunksize:
+            return -(-size // self.multipart_chunksize)
+        return 1
+
+    @property
+    def effective_concurrency(self):
+        """Hilos por objeto teniendo en cuenta use_threads"""
+        return self.max_concurrency if self.use_threads else 1
+
+    def to_transfer_config(self):
+        """Crea el TransferConfig de boto3 equivalente"""
+        return TransferConfig(
+            multipart_threshold=self.multipart_threshold,
+            multipart_chunksize=self.multipart_chunksize,
+            max_concurrency=self.max_concurrency,
+            use_threads=self.use_threads,
+        )
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.DEFAULTS}
+
+    @classmethod
+    def from_dict(cls, data):
+        known = {k: v for k, v in (data or {}).items() if k in cls.DEFAULTS}
+        return cls(**known)
+
+
+class TransferSettingsManager:
+    """Guarda y carga la configuración de transferencias de cada perfil AWS"""
+
+    SETTINGS_DIR = Path.home() / '.s3manager'
+    SETTINGS_FILE = 'transfer_settings.json'
+
+    @classmethod
+    def current_profile(cls) -> str:
+        """Perfil AWS activo (AWS_PROFILE o 'default')"""
+        return os.environ.get('AWS_PROFILE') or 'default'
+
+    @classmethod
+    def _settings_path(cls) -> Path:
+        return cls.SETTINGS_DIR / cls.SETTINGS_FILE
+
+    @classmethod
+    def _load_all(cls) -> dict:
+        try:
+            with open(cls._settings_path(), 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            print(f"Error leyendo la configuración de transferencias: {e}")
+            return {}
+
+    @classmethod
+    def load_settings(cls, profile: str | None = None) -> TransferSettings:
+        """Carga la configuración del perfil; si no existe usa los valores por defecto"""
+        profile = profile or cls.current_profile()
+        try:
+            return TransferSettings.from_dict(cls._load_all().get(profile))
+        except (TypeError, ValueError) as e:
+            print(f"Configuración de transferencias inválida para '{profile}': {e}")
+            return TransferSettings()
+
+    @classmethod
+    def save_settings(cls, settings: TransferSettings,
+                      profile: str | None = None) -> tuple[bool, str | None]:
+        """Guarda la configuración del perfil y devuelve (éxito, mensaje de error)"""
+        profile = profile or cls.current_profile()
+        try:
+            settings.validate()
+            data = cls._load_all()
+            data[profile] = settings.to_dict()
+
+            cls.SETTINGS_DIR.mkdir(mode=0o700, parents=True, exist_ok=True)
+            path = cls._settings_path()
+            tmp_path = path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp_path, path)
+            return True, None
+        except Exception as e:
+            error_message = f"Error guardando la configuración de transferencias: {e}"
+            print(error_message)
+            return False, error_message